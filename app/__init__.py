@@ -1,104 +1,108 @@
-from flask import Flask
-from .database import db, init_engine, init_session, init_db
-from .models import *
-from .extensions import bcrypt, jwt
-from flask_cors import CORS
-from config import LocalConfig, ProductionConfig
-from flask_migrate import Migrate, migrate as run_migration, upgrade as apply_upgrade
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from app.services import verificar_pagos_semanal
-from app.constants import TIMEZONE
-import os
-
-
-
-def create_app():
-    app = Flask(__name__, instance_relative_config=True)
-    
-    app.config.from_object(ProductionConfig)
-    print(app.config)
-    # Initialize the database
-    engine = init_engine(app.config['SQLALCHEMY_DATABASE_URI'])
-    print(app.config['SQLALCHEMY_DATABASE_URI'])
-    session = init_session(engine)
-
-    db.init_app(app)
-    init_db(app)
-    
-    # Initialize Flask-Migrate
-    migrate = Migrate(app, db)
-
-    # # Automatically handle migrations
-    # with app.app_context():
-    #     # Run migrations and upgrade if the migration folder exists and is not empty
-    #     if os.path.exists(os.path.join(app.root_path, 'migrations')):
-    #         try:
-    #             # Run migrations to detect changes
-    #             run_migration(message="Automated migration")
-    #             print("Migration script generated.")
-    #         except Exception as e:
-    #             print(f"No new changes to migrate: {e}")
-            
-    #         try:
-    #             # Apply any pending migrations
-    #             apply_upgrade()
-    #             print("Database upgraded successfully.")
-    #         except Exception as e:
-    #             print(f"Failed to upgrade the database: {e}")
-    #     else:
-    #         print("Migration directory does not exist. Initialize it manually if needed.")
-
-    # Load initial catalog data
-    with app.app_context():
-        from .populate_data import populate_data
-        try:
-            populate_data()
-        except Exception as e:
-            raise ValueError(f"Error loading initial data: {str(e)}")
-
-    CORS(app, supports_credentials=True, origins=["*"], allow_headers=["Content-Type", "Authorization", "X-CSRF-TOKEN"], expose_headers=["Content-Type", "Authorization", "X-CSRF-TOKEN"])
-    
-    # Initialize objects of the extensions
-    bcrypt.init_app(app)
-    jwt.init_app(app)
-
-    # Import and register blueprints
-    from .blueprints import auth_blueprint, user_blueprint, role_blueprint, cliente_blueprint, prestamo_blueprint, grupos_blueprint, rutas_blueprint, pagos_blueprint, reporte_blueprint, cortes_blueprint
-
-    app.register_blueprint(auth_blueprint)
-    app.register_blueprint(user_blueprint)
-    app.register_blueprint(role_blueprint)
-    app.register_blueprint(cliente_blueprint)
-    app.register_blueprint(prestamo_blueprint)
-    app.register_blueprint(grupos_blueprint)
-    app.register_blueprint(rutas_blueprint)
-    app.register_blueprint(pagos_blueprint)
-    app.register_blueprint(reporte_blueprint)
-    app.register_blueprint(cortes_blueprint)
-
-    
-    
-    
-    @app.teardown_appcontext
-    def shutdown_session(exception=None):
-        if 'session' in locals():
-            session.remove()
-
-    def handle_general_exception(e):
-        """ Handle exceptions raised during a request. """
-        app.logger.error(str(e), exc_info=True)
-        response = {
-            "error": str(e),
-            "message": "An error occurred."
-            }
-
-    @app.errorhandler(Exception)
-    def handle_error(e):
-        return handle_general_exception(e)
-    
-    @app.route('/')
-    def status_check():
-        return "Hello from Prosmex API!"
-    
-    return app
+import os
+import time
+from flask import Flask
+from .database import db, init_db, opciones_engine, metricas_pool
+from .models import *
+from .extensions import bcrypt, jwt, report_cache, perfil_sql
+from flask_cors import CORS
+from flask_jwt_extended import jwt_required
+from config import LocalConfig, ProductionConfig
+
+
+def esquema_listo(app):
+    """
+    Indica si el arranque puede omitir db.create_all() y la carga de catálogos: en modo FAST_START
+    o cuando existe el marcador que escribe `flask preparar-base` después de preparar la base.
+    """
+    return bool(app.config.get('FAST_START')) or os.path.exists(app.config['SCHEMA_READY_MARKER'])
+
+
+def create_app():
+    inicio_arranque = time.perf_counter()
+    app = Flask(__name__, instance_relative_config=True)
+    
+    app.config.from_object(ProductionConfig)
+    if not app.config.get('SCHEMA_READY_MARKER'):
+        app.config['SCHEMA_READY_MARKER'] = os.path.join(app.instance_path, 'schema_ready')
+
+    # Initialize the database: un solo engine, con el pool configurado desde Config
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opciones_engine(app.config))
+    metricas_pool.umbral_lento_ms = app.config.get('DB_POOL_SLOW_CHECKOUT_MS')
+    db.init_app(app)
+
+    # Flask-Migrate (y alembic) sólo se usa desde la CLI: no se carga en modo FAST_START
+    if not app.config.get('FAST_START'):
+        from flask_migrate import Migrate
+        migrate = Migrate(app, db, directory=app.config['MIGRATIONS_DIR'])
+
+    # Register management commands
+    from .commands import register_commands
+    register_commands(app)
+
+    # Crear el esquema y cargar los catálogos iniciales, salvo que la base ya se haya preparado
+    # con `flask preparar-base`
+    omitir_preparacion = esquema_listo(app)
+    if not omitir_preparacion:
+        init_db(app)
+        with app.app_context():
+            from .populate_data import populate_data
+            try:
+                populate_data()
+            except Exception as e:
+                raise ValueError(f"Error loading initial data: {str(e)}")
+
+    CORS(app, supports_credentials=True, origins=["*"], allow_headers=["Content-Type", "Authorization", "X-CSRF-TOKEN"], expose_headers=["Content-Type", "Authorization", "X-CSRF-TOKEN"])
+    
+    # Initialize objects of the extensions
+    bcrypt.init_app(app)
+    jwt.init_app(app)
+    report_cache.init_app(app)
+    perfil_sql.init_app(app)
+
+    # Import and register blueprints
+    from .blueprints import auth_blueprint, user_blueprint, role_blueprint, cliente_blueprint, prestamo_blueprint, grupos_blueprint, rutas_blueprint, pagos_blueprint, reporte_blueprint, cortes_blueprint
+
+    app.register_blueprint(auth_blueprint)
+    app.register_blueprint(user_blueprint)
+    app.register_blueprint(role_blueprint)
+    app.register_blueprint(cliente_blueprint)
+    app.register_blueprint(prestamo_blueprint)
+    app.register_blueprint(grupos_blueprint)
+    app.register_blueprint(rutas_blueprint)
+    app.register_blueprint(pagos_blueprint)
+    app.register_blueprint(reporte_blueprint)
+    app.register_blueprint(cortes_blueprint)
+
+
+    def handle_general_exception(e):
+        """ Handle exceptions raised during a request. """
+        app.logger.error(str(e), exc_info=True)
+        response = {
+            "error": str(e),
+            "message": "An error occurred."
+            }
+
+    @app.errorhandler(Exception)
+    def handle_error(e):
+        return handle_general_exception(e)
+    
+    @app.route('/')
+    def status_check():
+        return "Hello from Prosmex API!"
+
+    @app.route('/status/pool')
+    @jwt_required()
+    def pool_status():
+        from .blueprints.helpers import create_response
+        return create_response({
+            'modo': app.config['DB_POOL_MODE'],
+            'pool': db.engine.pool.status(),
+            **metricas_pool.resumen()
+        }, 200)
+
+    app.config['COLD_START_MS'] = round((time.perf_counter() - inicio_arranque) * 1000, 1)
+    app.logger.info(
+        f"create_app listo en {app.config['COLD_START_MS']} ms "
+        f"({'sin' if omitir_preparacion else 'con'} creación de esquema y catálogos)."
+    )
+    return app
@@ -1,95 +1,177 @@
-import os
-import pathlib
-from flask import make_response, jsonify, current_app as app
-from app import db
-from typing import Any
-import requests
-
-def create_response(data, status_code):
-    """
-    Create a JSON response with a given payload and status code.
-    """
-    response = make_response(jsonify({'data': data}), status_code)
-    return response
-
-def validate_fields(json_data, required_fields):
-    """
-    Check for missing fields in the provided JSON data.
-    """
-    missing_fields = [field for field in required_fields if field not in json_data]
-    return missing_fields
-
-def make_error_response(error_message, status_code=400):
-    """
-    Create an error JSON response with a given error message and status code.
-    """
-    response = make_response(jsonify({'error': {'message': error_message}}), status_code)
-    return response
-
-def handle_general_exception(e):
-    """ Handle exceptions raised during a request. """
-    app.logger.error(str(e), exc_info=True)
-    response = {
-        "error": str(e),
-        "message": "An error occurred."
-        }
-    
-    return jsonify(response), 500
-
-def handle_exceptions(func) -> dict:
-    """ Handle the errors that may arise 
-    args: func (function): The function to execute
-    returns: 
-    None: If the function is executed successfully and no errors are raised
-    dict: If an error is raised, it returns a dictionary with the error message
-    """
-    try:
-        return func()
-    except ValueError as e:
-        app.logger.error('ValueError: %s', e, exc_info=True)
-        db.session.rollback()
-        return make_error_response(str(e), 400)
-    except TypeError as e:
-        app.logger.error('TypeError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except AttributeError as e:
-        app.logger.error('AttributeError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except KeyError as e:
-        app.logger.error('KeyError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except IOError as e:
-        app.logger.error('IOError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except RuntimeError as e:
-        app.logger.error('RuntimeError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except ZeroDivisionError as e:
-        app.logger.error('ZeroDivisionError: %s', e, exc_info=True)
-        return make_error_response(str(e), 400)
-    except Exception as e:
-        app.logger.error('An error occurred: %s', e, exc_info=True)
-        db.session.rollback()
-        return make_error_response(str(e), 500)
-
-
-def get_attribute(obj, attr) -> Any:
-    """ 
-    Safely get the attribute value from the object, if it does not exist log the error and raise an exception 
-    
-    args: 
-            obj (object): The object to get the attribute value from
-            attr (str): The attribute name to get the value from the object
-    returns:
-            value: The attribute value from the object
-    """
-
-    # Get the attribute value from the object
-    value = getattr(obj, attr, None)
-
-    # If the value is None, log the error and raise an exception
-    if not value:
-        app.logger.error(f'{attr} not found', exc_info=True)
-        raise ValueError(f'{attr} no encontrado')
-    
+import csv
+import io
+import json
+import os
+import pathlib
+import tempfile
+from flask import make_response, jsonify, request, Response, send_file, stream_with_context, current_app as app
+from datetime import datetime
+from app import db
+from typing import Any
+
+def create_response(data, status_code):
+    """
+    Create a JSON response with a given payload and status code.
+    """
+    response = make_response(jsonify({'data': data}), status_code)
+    return response
+
+def validate_fields(json_data, required_fields):
+    """
+    Check for missing fields in the provided JSON data.
+    """
+    missing_fields = [field for field in required_fields if field not in json_data]
+    return missing_fields
+
+def get_fecha_arg(nombre):
+    """
+    Read an optional YYYY-MM-DD date from the query string.
+    Returns None when the parameter is absent and raises ValueError when it is malformed.
+    """
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"El parámetro {nombre} debe tener el formato YYYY-MM-DD.")
+
+def get_bool_arg(nombre, default=False):
+    """Read an optional boolean flag (1/true/si) from the query string."""
+    valor = request.args.get(nombre)
+    if valor is None:
+        return default
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí')
+
+def create_stream_response(filas, formato, nombre_archivo, columnas):
+    """
+    Stream an iterable of dict rows as CSV or NDJSON without building the whole body in memory.
+    Rows are produced lazily inside the request context, so they can come from a server-side cursor.
+    """
+    if formato == 'ndjson':
+        mimetype = 'application/x-ndjson'
+
+        def generar():
+            for fila in filas:
+                yield json.dumps(fila, default=str) + '\n'
+    elif formato == 'csv':
+        mimetype = 'text/csv'
+
+        def generar():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=columnas)
+            writer.writeheader()
+            for fila in filas:
+                writer.writerow(fila)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+    else:
+        raise ValueError("El formato debe ser csv o ndjson.")
+
+    response = Response(stream_with_context(generar()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={nombre_archivo}.{formato}'
+    return response
+
+def create_xlsx_response(filas, nombre_archivo, columnas):
+    """
+    Write an iterable of dict rows to an XLSX file and send it.
+    openpyxl's write-only mode flushes rows to disk as they are appended, so memory stays flat.
+    openpyxl (in requirements.txt) is only imported when an XLSX file is requested, to keep it off the cold start.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("La exportación a XLSX requiere el paquete openpyxl.")
+
+    workbook = Workbook(write_only=True)
+    hoja = workbook.create_sheet()
+    hoja.append(columnas)
+    for fila in filas:
+        hoja.append([fila[columna] for columna in columnas])
+
+    archivo = tempfile.TemporaryFile()
+    workbook.save(archivo)
+    archivo.seek(0)
+    return send_file(
+        archivo,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=f'{nombre_archivo}.xlsx'
+    )
+
+def make_error_response(error_message, status_code=400):
+    """
+    Create an error JSON response with a given error message and status code.
+    """
+    response = make_response(jsonify({'error': {'message': error_message}}), status_code)
+    return response
+
+def handle_general_exception(e):
+    """ Handle exceptions raised during a request. """
+    app.logger.error(str(e), exc_info=True)
+    response = {
+        "error": str(e),
+        "message": "An error occurred."
+        }
+    
+    return jsonify(response), 500
+
+def handle_exceptions(func) -> dict:
+    """ Handle the errors that may arise 
+    args: func (function): The function to execute
+    returns: 
+    None: If the function is executed successfully and no errors are raised
+    dict: If an error is raised, it returns a dictionary with the error message
+    """
+    try:
+        return func()
+    except ValueError as e:
+        app.logger.error('ValueError: %s', e, exc_info=True)
+        db.session.rollback()
+        return make_error_response(str(e), 400)
+    except TypeError as e:
+        app.logger.error('TypeError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except AttributeError as e:
+        app.logger.error('AttributeError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except KeyError as e:
+        app.logger.error('KeyError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except IOError as e:
+        app.logger.error('IOError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except RuntimeError as e:
+        app.logger.error('RuntimeError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except ZeroDivisionError as e:
+        app.logger.error('ZeroDivisionError: %s', e, exc_info=True)
+        return make_error_response(str(e), 400)
+    except Exception as e:
+        app.logger.error('An error occurred: %s', e, exc_info=True)
+        db.session.rollback()
+        return make_error_response(str(e), 500)
+
+
+def get_attribute(obj, attr) -> Any:
+    """ 
+    Safely get the attribute value from the object, if it does not exist log the error and raise an exception 
+    
+    args: 
+            obj (object): The object to get the attribute value from
+            attr (str): The attribute name to get the value from the object
+    returns:
+            value: The attribute value from the object
+    """
+
+    # Get the attribute value from the object
+    value = getattr(obj, attr, None)
+
+    # If the value is None, log the error and raise an exception
+    if not value:
+        app.logger.error(f'{attr} not found', exc_info=True)
+        raise ValueError(f'{attr} no encontrado')
+    
     return value
\ No newline at end of file
@@ -1,16 +1,39 @@
 from flask import Blueprint, request
+from app.models import Pago
 from app.services.pago_service import PagoService
 from app.services.falta_service import FaltaService
-from app.blueprints.helpers import create_response, make_error_response, handle_exceptions, validate_fields
+from app.blueprints.helpers import create_response, create_stream_response, make_error_response, handle_exceptions, validate_fields, get_bool_arg, get_fecha_arg
 
 pagos_blueprint = Blueprint('pagos', __name__, url_prefix='/pagos')
 
+def get_filtros_pagos():
+    """Filtros opcionales del listado y la exportación de pagos."""
+    return {
+        'desde': get_fecha_arg('desde'),
+        'hasta': get_fecha_arg('hasta'),
+        'grupo_id': request.args.get('grupo_id', type=int),
+        'ruta_id': request.args.get('ruta_id', type=int),
+        'prestamo_id': request.args.get('prestamo_id', type=int)
+    }
+
 @pagos_blueprint.route('/', methods=['GET'])
 def list_pagos():
     def func():
+        per_page = min(request.args.get('per_page', default=100, type=int), 1000)
+        cursor = request.args.get('cursor')  # Último pago_id, o 'fecha_pago,pago_id' al ordenar por fecha
+        orden = request.args.get('orden')  # pago_id (por omisión) o fecha; con desde/hasta se ordena por fecha
+        compacto = get_bool_arg('compacto')  # Sólo el prestamo_id de cada pago, sin el préstamo serializado
         service = PagoService()
-        pagos = service.list_pagos()
-        return create_response({'pagos': pagos}, 200)
+        pagos = service.list_pagos(per_page=per_page, cursor=cursor, orden=orden, compacto=compacto, **get_filtros_pagos())
+        return create_response(pagos, 200)
+    return handle_exceptions(func)
+
+@pagos_blueprint.route('/exportar', methods=['GET'])
+def exportar_pagos():
+    def func():
+        formato = request.args.get('formato', default='csv')
+        pagos = PagoService.exportar_pagos(**get_filtros_pagos())
+        return create_stream_response(pagos, formato, 'pagos', ['pago_id', 'fecha_pago', 'monto_pagado', 'prestamo_id'])
     return handle_exceptions(func)
 
 @pagos_blueprint.route('/', methods=['POST'])
@@ -27,10 +50,17 @@ def create_pago():
     def func():
         service = PagoService()
         new_pago = service.create_pago(data)
-        # if new pago is a list of objects serialize each and add to response
-        if isinstance(new_pago, list):
-            pagos_data = [p.serialize() for p in new_pago]
-            return create_response({'pagos': pagos_data}, 201)
+        # if new pago is a batch result serialize each created pago or report the errors per item
+        if isinstance(new_pago, dict):
+            if new_pago['success']:
+                pagos_data = Pago.serialize_many(new_pago['created'])
+                return create_response({'pagos': pagos_data, 'message': new_pago['message']}, 201)
+            else:
+                return create_response({
+                    'message': new_pago['message'],
+                    'errors': new_pago['errors'],
+                    'failed': len(new_pago['errors'])
+                }, 400)
         else:
             pago_data = new_pago.serialize()
             return create_response({'pago': pago_data}, 201)
@@ -1,11 +1,22 @@
 from flask import Blueprint, request
 from app.services.reporte_service import ReporteService
-from app.blueprints.helpers import create_response, handle_exceptions
+from app.blueprints.helpers import create_response, create_stream_response, create_xlsx_response, handle_exceptions, get_fecha_arg, get_bool_arg
+from app.services.service_helpers import es_semana_cerrada
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
 
 reporte_blueprint = Blueprint('reporte', __name__, url_prefix='/reporte')
 
+def create_weekly_response(data, semana):
+    """
+    Respuesta de un reporte semanal: las semanas ya cerradas no cambian,
+    así que el cliente puede guardarlas en caché por un tiempo.
+    """
+    response = create_response(data, 200)
+    if semana is not None and es_semana_cerrada(semana):
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
 @reporte_blueprint.route('/general', methods=['GET'])
 @jwt_required()
 def obtener_reporte_general():
@@ -13,9 +24,12 @@ def obtener_reporte_general():
         # Obtener los parámetros de paginación de la solicitud
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        # Semana a consultar (cualquier fecha dentro de ella) y si se debe calcular en vivo en lugar de leer la foto semanal
+        semana = get_fecha_arg('semana')
+        en_vivo = get_bool_arg('en_vivo')
         
         # Llamar al método `obtener_reporte` con los argumentos de paginación
-        reporte = ReporteService.obtener_reporte(page=page, per_page=per_page)
+        reporte = ReporteService.obtener_reporte(page=page, per_page=per_page, semana=semana, en_vivo=en_vivo)
 
         # Preparar la respuesta para el reporte general sin totales
         response_data = {
@@ -23,20 +37,38 @@ def obtener_reporte_general():
             'page': reporte['page'],
             'per_page': reporte['per_page'],
             'total_items': reporte['total_items'],
+            'semana_inicio': reporte['semana_inicio'],
         }
 
-        return create_response(response_data, 200)
+        return create_weekly_response(response_data, semana)
 
     return handle_exceptions(func)
 
 
+@reporte_blueprint.route('/general/exportar', methods=['GET'])
+@jwt_required()
+def exportar_reporte_general():
+    def func():
+        formato = request.args.get('formato', default='csv')  # csv, ndjson o xlsx
+        semana = get_fecha_arg('semana')
+        en_vivo = get_bool_arg('en_vivo')
+
+        # Todas las filas de los grupos visibles y al final la fila de totales
+        filas = ReporteService.exportar_reporte(semana=semana, en_vivo=en_vivo)
+        columnas = ReporteService.COLUMNAS_EXPORTACION
+        if formato == 'xlsx':
+            return create_xlsx_response(filas, 'reporte_general', columnas)
+        return create_stream_response(filas, formato, 'reporte_general', columnas)
+    return handle_exceptions(func)
+
 @reporte_blueprint.route('/general/totales', methods=['GET'])
 @jwt_required()
 def obtener_totales():
     def func():
         # Llamar al método `obtener_totales` para calcular los valores totales
-        totales = ReporteService.obtener_totales()
-        return create_response({'totales': totales}, 200)
+        semana = get_fecha_arg('semana')
+        totales = ReporteService.obtener_totales(semana=semana, en_vivo=get_bool_arg('en_vivo'))
+        return create_weekly_response({'totales': totales}, semana)
 
     return handle_exceptions(func)
 
@@ -73,8 +105,9 @@ def obtener_sobrante_total_usuario():
 def obtener_bono_para_grupos_titular():
     def func():
         user_id = get_jwt_identity()  # Obtener el user_id del usuario autenticado
-        reporte_bonos = ReporteService.calcular_bono_para_grupos_de_titular(user_id)
-        return create_response({'reporte_bonos': reporte_bonos}, 200)
+        semana = get_fecha_arg('semana')  # Cualquier fecha de la semana a consultar; la actual por defecto
+        reporte_bonos = ReporteService.calcular_bono_para_grupos_de_titular(user_id, semana)
+        return create_weekly_response({'reporte_bonos': reporte_bonos}, semana)
     return handle_exceptions(func)
 
 # Bono total del titular dado
@@ -85,11 +118,13 @@ def obtener_bono_global_titular():
         # Obtener el user_id del usuario autenticado
         user_id = get_jwt_identity()
 
+        semana = get_fecha_arg('semana')  # Cualquier fecha de la semana a consultar; la actual por defecto
+
         # Llamar a la función que calcula el bono global para el titular
-        total_bono = ReporteService.calcular_bono_global_titular(user_id)
+        total_bono = ReporteService.calcular_bono_global_titular(user_id, semana)
 
         # Devolver la respuesta con los detalles del bono global
-        return create_response({'total_bono': total_bono}, 200)
+        return create_weekly_response({'total_bono': total_bono}, semana)
     
     return handle_exceptions(func)
 
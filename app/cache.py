@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """
+    Caché en memoria del proceso: LRU con expiración (TTL) por entrada.
+    Los contadores de versión se guardan aparte para que el desalojo LRU nunca los reinicie.
+    """
+    def __init__(self, max_entries=512, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, name):
+        return self._versions.get(name, 0)
+
+    def incr_version(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+
+class RedisCache:
+    """
+    Caché compartida entre procesos sobre Redis (o un servidor compatible).
+    Requiere el paquete `redis`, que sólo se importa cuando se elige este backend.
+    """
+    def __init__(self, url, ttl=60, prefix='prosmex:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + key, self.ttl, json.dumps(value, default=str))
+
+    def get_version(self, name):
+        value = self.client.get(self.prefix + 'version:' + name)
+        return int(value) if value is not None else 0
+
+    def incr_version(self, name):
+        return self.client.incr(self.prefix + 'version:' + name)
+
+
+class ReportCache:
+    """
+    Caché de reportes por alcance de usuario (todos, gerente:<id>, supervisor:<id>, titular:<id>).
+
+    Cada alcance tiene un contador de versión que forma parte de la llave: invalidar un grupo incrementa
+    las versiones de los alcances que lo ven, así las entradas anteriores dejan de consultarse y expiran solas.
+    Con el backend en memoria la invalidación es por proceso, por lo que sólo sirve con un único proceso;
+    con varios procesos o instancias usar Redis.
+    """
+    GLOBAL = 'global'
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('REPORT_CACHE_BACKEND', 'none')
+        ttl = app.config.get('REPORT_CACHE_TTL', 60)
+        if backend == 'memory' and os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+            # Cada contenedor de Lambda tendría su propia caché y serviría totales viejos hasta que expiraran
+            app.logger.warning("REPORT_CACHE_BACKEND='memory' no es válido en Lambda; los reportes no usarán caché.")
+            backend = 'none'
+        if backend == 'redis':
+            if not app.config.get('REPORT_CACHE_REDIS_URL'):
+                raise ValueError("REPORT_CACHE_BACKEND='redis' requiere REPORT_CACHE_REDIS_URL.")
+            self.backend = RedisCache(app.config['REPORT_CACHE_REDIS_URL'], ttl)
+        elif backend == 'memory':
+            self.backend = LRUTTLCache(app.config.get('REPORT_CACHE_MAX_ENTRIES', 512), ttl)
+        else:
+            self.backend = None
+        app.extensions['report_cache'] = self
+
+    def _key(self, scope, key_parts):
+        return ':'.join([
+            'reporte',
+            str(self.backend.get_version(self.GLOBAL)),
+            scope,
+            str(self.backend.get_version(scope)),
+            *[str(part) for part in key_parts]
+        ])
+
+    def get_or_set(self, scope, key_parts, compute):
+        """Retorna el valor guardado para (alcance, key_parts) o lo calcula con `compute` y lo guarda."""
+        if self.backend is None:
+            return compute()
+        key = self._key(scope, key_parts)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate_scopes(self, scopes):
+        if self.backend is None:
+            return
+        for scope in set(scopes):
+            self.backend.incr_version(scope)
+
+    def invalidate_all(self):
+        if self.backend is None:
+            return
+        self.backend.incr_version(self.GLOBAL)
+
+    def invalidate_grupos(self, grupo_ids):
+        """Invalida los reportes de todos los alcances que ven alguno de los grupos dados."""
+        if self.backend is None:
+            return
+        from app import db
+        from app.models import Grupo, Ruta
+
+        grupo_ids = [grupo_id for grupo_id in set(grupo_ids) if grupo_id is not None]
+        if not grupo_ids:
+            return
+        filas = (
+            db.session.query(Grupo.usuario_id_titular, Ruta.usuario_id_gerente, Ruta.usuario_id_supervisor)
+            .outerjoin(Ruta, Grupo.ruta_id == Ruta.ruta_id)
+            .filter(Grupo.grupo_id.in_(grupo_ids))
+            .all()
+        )
+        scopes = ['todos']
+        for titular_id, gerente_id, supervisor_id in filas:
+            scopes += [f'titular:{titular_id}', f'gerente:{gerente_id}', f'supervisor:{supervisor_id}']
+        self.invalidate_scopes(scopes)
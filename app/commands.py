@@ -0,0 +1,203 @@
+import click
+from flask.cli import with_appcontext
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from app import db
+from app.constants import TIMEZONE
+
+
+def register_commands(app):
+    """Registra los comandos de administración en la CLI de Flask."""
+    app.cli.add_command(preparar_base_command)
+    app.cli.add_command(reconciliar_pagos_command)
+    app.cli.add_command(verificar_pagos_semanal_command)
+    app.cli.add_command(verificar_planes_command)
+    app.cli.add_command(reconstruir_reporte_semanal_command)
+
+
+@click.command('preparar-base')
+@click.option('--marcador/--sin-marcador', default=True,
+              help='Escribir el marcador SCHEMA_READY_MARKER para que la app omita esta preparación al iniciar.')
+@with_appcontext
+def preparar_base_command(marcador):
+    """
+    Crea las tablas que falten, aplica las migraciones pendientes y carga los catálogos iniciales
+    (roles, permisos, tipos de préstamo, bonos).
+    """
+    import os
+    from flask import current_app
+    from flask_migrate import Migrate, upgrade
+    from app.populate_data import populate_data
+
+    db.create_all()
+    # Las migraciones agregan columnas e índices a tablas que ya existían antes de agregarlos al modelo
+    if 'migrate' not in current_app.extensions:
+        Migrate(current_app, db, directory=current_app.config['MIGRATIONS_DIR'])
+    upgrade()
+    click.echo("Esquema verificado.")
+    resultado = populate_data()
+    if resultado is None:
+        raise click.ClickException("No se pudieron cargar los catálogos iniciales.")
+    click.echo(resultado)
+
+    if marcador:
+        ruta_marcador = current_app.config['SCHEMA_READY_MARKER']
+        os.makedirs(os.path.dirname(ruta_marcador), exist_ok=True)
+        with open(ruta_marcador, 'w') as archivo:
+            archivo.write(f"{datetime.now(TIMEZONE).isoformat()}\n")
+        click.echo(f"Marcador de esquema listo escrito en {ruta_marcador}.")
+
+
+@click.command('reconciliar-pagos')
+@with_appcontext
+def reconciliar_pagos_command():
+    """
+    Reconstruye los totales de pagos desnormalizados de cada préstamo a partir de la tabla pagos.
+    La migración que agrega las columnas ya las llena (`flask db upgrade` o `flask preparar-base`); este
+    comando sirve para reconstruirlas si alguna vez se desvían de los pagos.
+    """
+    from app.services.pago_service import PagoService
+
+    con_pagos, sin_pagos = PagoService.reconciliar_totales_prestamos()
+    click.echo(f"Totales reconciliados: {con_pagos} préstamos con pagos, {sin_pagos} préstamos sin pagos.")
+
+
+@click.command('verificar-pagos-semanal')
+@click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Fecha de referencia (YYYY-MM-DD); se revisa la semana anterior a ella.')
+@with_appcontext
+def verificar_pagos_semanal_command(fecha):
+    """Registra las faltas de la semana anterior para los préstamos activos que no cubrieron la cobranza ideal."""
+    from app.services.tasks import verificar_pagos_semanal
+
+    verificar_pagos_semanal(fecha.date() if fecha else None)
+
+
+# Tablas que crecen con la cartera: un Seq Scan sobre ellas en una ruta crítica indica un índice faltante
+TABLAS_CRITICAS = ('pagos', 'prestamos', 'falta', 'clientes_avales')
+
+
+def _capturar_consultas(funcion):
+    """Ejecuta `funcion` y retorna las consultas SELECT (sentencia, parámetros) que emitió."""
+    from sqlalchemy import event
+
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            consultas.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        funcion()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    return consultas
+
+
+def _consultas_ruta_critica():
+    """Consultas del reporte general, la hoja de cobranza, el listado de pagos y los pagos de un préstamo."""
+    from app.models import ClienteAval, Grupo, Pago
+    from app.services.pago_service import PagoService
+    from app.services.prestamo_service import PrestamoService
+    from app.services.reporte_service import ReporteService
+    from app.services.service_helpers import ventana_semana
+
+    # El grupo con más clientes y el préstamo con más pagos, para que los planes sean los del peor caso
+    grupo_id = db.session.query(ClienteAval.grupo_id).filter(ClienteAval.grupo_id.isnot(None))\
+        .group_by(ClienteAval.grupo_id).order_by(func.count().desc()).limit(1).scalar()
+    prestamo_id = db.session.query(Pago.prestamo_id).group_by(Pago.prestamo_id)\
+        .order_by(func.count().desc()).limit(1).scalar()
+    if grupo_id is None or prestamo_id is None:
+        raise click.ClickException("La base no tiene grupos con clientes o préstamos con pagos que analizar.")
+    grupo_ids = [grupo_id for (grupo_id,) in db.session.query(Grupo.grupo_id).order_by(Grupo.grupo_id).limit(10)]
+    inicio_semana, fin_semana, semana_inicio = ventana_semana()
+
+    rutas = {
+        'reporte general': lambda: ReporteService.calcular_metricas_semanales(grupo_ids, inicio_semana, fin_semana),
+        'hoja de cobranza': lambda: PagoService.get_prestamos_by_grupo_tabla(grupo_id),
+        'préstamos activos del grupo': lambda: PrestamoService().count_prestamos_activos(grupo_id),
+        'pagos de la semana del grupo': lambda: PagoService().list_pagos(
+            desde=semana_inicio, hasta=fin_semana.date(), grupo_id=grupo_id, compacto=True),
+        'pagos de un préstamo': lambda: PagoService.get_pagos_by_prestamo(prestamo_id, compacto=True),
+    }
+    return {nombre: _capturar_consultas(funcion) for nombre, funcion in rutas.items()}
+
+
+def _seq_scans(plan, tablas):
+    """Nodos Seq Scan del plan (formato JSON de EXPLAIN) sobre alguna de las tablas dadas."""
+    encontrados = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in tablas:
+        encontrados.append(plan['Relation Name'])
+    for subplan in plan.get('Plans', []):
+        encontrados += _seq_scans(subplan, tablas)
+    return encontrados
+
+
+@click.command('verificar-planes')
+@click.option('--min-filas', default=50000, show_default=True,
+              help='Sólo se consideran las tablas críticas con al menos este número de filas (estimado); '
+                   'en tablas más chicas un Seq Scan suele ser el plan más barato.')
+@with_appcontext
+def verificar_planes_command(min_filas):
+    """
+    Falla si el plan de alguna consulta de las rutas críticas hace un Seq Scan sobre una tabla grande
+    (pagos, préstamos, faltas, clientes). Pensado para correr sobre los datos sintéticos del benchmark
+    después de `flask db upgrade`.
+    """
+    db.session.execute(text("ANALYZE"))
+    filas_por_tabla = dict(db.session.execute(
+        text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relname = ANY(:tablas)"),
+        {'tablas': list(TABLAS_CRITICAS)}
+    ).all())
+    tablas = {tabla for tabla, filas in filas_por_tabla.items() if filas >= min_filas}
+    if not tablas:
+        raise click.ClickException(f"Ninguna tabla crítica tiene {min_filas} filas; cargue datos de benchmark primero.")
+    click.echo(f"Tablas revisadas: {', '.join(sorted(tablas))}")
+
+    fallas = 0
+    conexion = db.session.connection()
+    for ruta, consultas in _consultas_ruta_critica().items():
+        for statement, parameters in consultas:
+            plan = conexion.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]['Plan']
+            seq_scans = _seq_scans(plan, tablas)
+            if seq_scans:
+                fallas += 1
+                click.echo(f"[{ruta}] Seq Scan sobre {', '.join(seq_scans)}:\n  {' '.join(statement.split())[:300]}")
+        click.echo(f"Ruta verificada: {ruta} ({len(consultas)} consultas)")
+    db.session.rollback()
+
+    if fallas:
+        raise click.ClickException(f"{fallas} consultas de rutas críticas hacen Seq Scan sobre tablas grandes.")
+    click.echo("Ninguna consulta de las rutas críticas hace Seq Scan sobre tablas grandes.")
+
+
+@click.command('reconstruir-reporte-semanal')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Primera semana a reconstruir (YYYY-MM-DD); por defecto la del primer pago registrado.')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Última semana a reconstruir (YYYY-MM-DD); por defecto la semana actual.')
+@with_appcontext
+def reconstruir_reporte_semanal_command(desde, hasta):
+    """
+    Reconstruye la foto semanal (reporte_semanal_grupo) de todos los grupos semana por semana.
+    Cobranza real, faltas y bono se recalculan para cada semana. Los montos de préstamos (cobranza ideal,
+    papel, real, sobrante y créditos) de una semana cerrada que ya tiene foto se conservan; las semanas sin
+    foto y la semana actual toman el estado actual de la cartera.
+    """
+    from app.models import Pago
+    from app.services.reporte_service import ReporteService
+    from app.services.service_helpers import ventana_semana
+
+    if desde is None:
+        desde = db.session.query(func.min(Pago.fecha_pago)).scalar()
+    _, _, semana = ventana_semana(desde.date() if desde is not None else None)
+    _, _, ultima_semana = ventana_semana(hasta.date() if hasta is not None else None)
+
+    semanas = 0
+    while semana <= ultima_semana:
+        grupos = ReporteService.actualizar_reporte_semanal(semana=semana)
+        click.echo(f"Semana {semana.isoformat()}: {grupos} grupos actualizados.")
+        semana += timedelta(days=7)
+        semanas += 1
+    click.echo(f"Reporte semanal reconstruido: {semanas} semanas.")
@@ -1,22 +1,95 @@
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
-
-db = SQLAlchemy()
-
-def init_engine(uri):
-    """Create database engine."""
-    engine = create_engine(uri, echo=False, pool_pre_ping=True)
-    return engine
-
-def init_session(engine):
-    """Initialize a new scoped session."""
-    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return scoped_session(session_factory)
-
-def init_db(app):
-    """Initialize the database with the app context."""
-    with app.app_context():
-        db.create_all()  # Optionally create tables here if needed
-
-
+import logging
+import threading
+import time
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.pool import NullPool, QueuePool
+
+db = SQLAlchemy()
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasPool:
+    """
+    Tiempo de espera para obtener una conexión del pool, incluyendo abrirla cuando el pool no tiene
+    una libre. Las esperas mayores a `umbral_lento_ms` se registran en el log.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.umbral_lento_ms = None
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+
+    def registrar(self, segundos):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+        if self.umbral_lento_ms is not None and segundos * 1000 > self.umbral_lento_ms:
+            logger.warning(f"Espera lenta por una conexión a la base de datos: {segundos * 1000:.1f} ms")
+
+    def resumen(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'espera_promedio_ms': round(self.espera_total * 1000 / self.checkouts, 3) if self.checkouts else 0,
+                'espera_maxima_ms': round(self.espera_maxima * 1000, 3)
+            }
+
+
+metricas_pool = MetricasPool()
+
+
+class _PoolMedido:
+    """Mide en metricas_pool el tiempo que tarda cada checkout de conexión."""
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metricas_pool.registrar(time.perf_counter() - inicio)
+
+
+# SQLAlchemy nombra el logger de cada pool con el módulo de su clase; se conserva el de sqlalchemy.pool
+# para que sus mensajes de depuración no terminen en el logger de la app (nivel DEBUG).
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    __module__ = QueuePool.__module__
+
+
+class NullPoolMedido(_PoolMedido, NullPool):
+    __module__ = NullPool.__module__
+
+
+def opciones_engine(config):
+    """
+    Opciones del único engine de la app (SQLALCHEMY_ENGINE_OPTIONS) según DB_POOL_MODE:
+
+    - 'queue': pool de DB_POOL_SIZE conexiones más DB_MAX_OVERFLOW temporales (servidores de larga duración).
+    - 'single': una sola conexión por proceso, reutilizada entre invocaciones (Lambda sin proxy).
+    - 'null': sin pool, una conexión por checkout (Lambda detrás de PgBouncer o RDS Proxy, que hacen el pooling).
+    """
+    modo = config.get('DB_POOL_MODE', 'queue')
+    if modo == 'null':
+        return {'poolclass': NullPoolMedido}
+    if modo not in ('queue', 'single'):
+        raise ValueError(f"DB_POOL_MODE no válido: {modo}")
+
+    return {
+        'poolclass': QueuePoolMedido,
+        'pool_size': 1 if modo == 'single' else config.get('DB_POOL_SIZE', 5),
+        'max_overflow': 0 if modo == 'single' else config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)
+    }
+
+
+def init_db(app):
+    """Initialize the database with the app context."""
+    with app.app_context():
+        db.create_all()  # Optionally create tables here if needed
@@ -1,6 +1,10 @@
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager
-
-
-bcrypt = Bcrypt()
-jwt = JWTManager()
\ No newline at end of file
+from flask_bcrypt import Bcrypt
+from flask_jwt_extended import JWTManager
+from app.cache import ReportCache
+from app.perfil_sql import PerfilSQL
+
+
+bcrypt = Bcrypt()
+jwt = JWTManager()
+report_cache = ReportCache()
+perfil_sql = PerfilSQL()
\ No newline at end of file
@@ -1,13 +1,14 @@
-from .accion import Accion
-from .permiso import Permiso
-from .rol import Rol
-from .usuario import Usuario
-from .prestamo import Prestamo
-from .pago import Pago
-from .cliente_aval import ClienteAval
-from .tipo_prestamo import TipoPrestamo
-from .grupo import Grupo
-from .ruta import Ruta
-from .bono import Bono
-from .corte import Corte
-from .falta import Falta
+from .accion import Accion
+from .permiso import Permiso
+from .rol import Rol
+from .usuario import Usuario
+from .prestamo import Prestamo
+from .pago import Pago
+from .cliente_aval import ClienteAval
+from .tipo_prestamo import TipoPrestamo
+from .grupo import Grupo
+from .ruta import Ruta
+from .bono import Bono
+from .corte import Corte
+from .falta import Falta
+from .reporte_semanal_grupo import ReporteSemanalGrupo
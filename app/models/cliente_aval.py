@@ -1,197 +1,220 @@
-from sqlalchemy import case, func, select
-from ..database import db
-from sqlalchemy.orm import validates
-from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
-class ClienteAval(db.Model):
-    __tablename__ = 'clientes_avales'
-    cliente_id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(100))
-    apellido_paterno = db.Column(db.String(100))
-    apellido_materno = db.Column(db.String(100))
-    colonia = db.Column(db.String(100))
-    cp = db.Column(db.String(5))
-    codigo_ine = db.Column(db.String(18))
-    estado_civil = db.Column(db.Enum('casado', 'divorciado', 'viudo', 'soltero', name='estado_civil_types'))
-    num_hijos = db.Column(db.Integer)
-    propiedad = db.Column(db.Enum('casa_propia', 'rentada', 'prestada', name='tipo_propiedad'))
-    es_aval = db.Column(db.Boolean, default=True)
-    grupo_id = db.Column(db.Integer, db.ForeignKey('grupos.grupo_id'))
-    
-    # Propiedades hibridas para calculos de prestamos
-    @hybrid_property
-    def prestamo_papel(self):
-        if self.prestamos_como_titular:
-            return self.prestamos_como_titular[-1].monto_prestamo
-        else:
-            return 0
-
-    @prestamo_papel.expression
-    def prestamo_papel(cls):
-        from app.models.prestamo import Prestamo
-
-        prestamo_papel_subquery = (
-            select(Prestamo.monto_prestamo)
-            .where(Prestamo.cliente_id == cls.cliente_id)
-            .order_by(Prestamo.prestamo_id.desc())
-            .limit(1)
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-        return func.coalesce(prestamo_papel_subquery, 0)
-
-    @hybrid_property
-    def prestamo_real(self):
-        return self.prestamo_papel - self.calcular_adeudo_cliente_sin_adeudo_prestamo_actual()
-
-    @prestamo_real.expression
-    def prestamo_real(cls):
-        from app.models.prestamo import Prestamo
-        from app.models.pago import Pago
-
-        # Subconsulta para obtener el ID del préstamo más reciente del cliente
-        latest_prestamo_subquery = (
-            select(Prestamo.prestamo_id)
-            .where(Prestamo.cliente_id == cls.cliente_id)
-            .order_by(Prestamo.prestamo_id.desc())
-            .limit(1)
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-        # Subconsulta para obtener el total pagado por préstamo
-        total_pagado_subquery = (
-            select(
-                Pago.prestamo_id.label('prestamo_id'),
-                func.sum(Pago.monto_pagado).label('total_pagado')
-            )
-            .group_by(Pago.prestamo_id)
-            .subquery()
-        )
-
-        # Subconsulta para calcular el adeudo sin considerar el préstamo actual
-        adeudo_prestamos_subquery = (
-            select(
-                func.coalesce(
-                    func.sum(
-                        Prestamo.monto_prestamo - func.coalesce(total_pagado_subquery.c.total_pagado, 0)
-                    ), 0
-                ).label('adeudo_sin_prestamo_actual')
-            )
-            .select_from(Prestamo)
-            .outerjoin(
-                total_pagado_subquery,
-                Prestamo.prestamo_id == total_pagado_subquery.c.prestamo_id
-            )
-            .where(Prestamo.cliente_id == cls.cliente_id)
-            .where(Prestamo.prestamo_id != latest_prestamo_subquery)
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-        # Subconsulta para obtener el monto_prestamo del préstamo más reciente (prestamo_papel)
-        prestamo_papel_subquery = (
-            select(Prestamo.monto_prestamo)
-            .where(Prestamo.cliente_id == cls.cliente_id)
-            .order_by(Prestamo.prestamo_id.desc())
-            .limit(1)
-            .correlate(cls)
-            .scalar_subquery()
-        )
-
-        # Calcular prestamo_real
-        return func.coalesce(prestamo_papel_subquery, 0) - func.coalesce(adeudo_prestamos_subquery, 0)
-
-
-
-    @validates('cp')
-    def validate_cp(self, key, cp):
-        if len(cp) != 5 or not cp.isdigit():
-            raise ValueError("Código postal no válido.")
-        return cp
-
-    @validates('num_hijos')
-    def validate_num_hijos(self, key, num_hijos):
-        if num_hijos < 0:
-            raise ValueError("El número de hijos no puede ser negativo.")
-        return num_hijos
-    def getNombreCompleto(self):
-        return f'{self.nombre} {self.apellido_paterno} {self.apellido_materno}'
-    def serialize(self):
-        return {
-            'id': self.cliente_id,
-            'nombre': self.nombre,
-            'apellido_paterno': self.apellido_paterno,
-            'apellido_materno': self.apellido_materno,
-            'colonia': self.colonia,
-            'cp': self.cp,
-            'codigo_ine': self.codigo_ine,
-            'estado_civil': self.estado_civil,
-            'num_hijos': self.num_hijos,
-            'propiedad': self.propiedad,
-            'es_aval': self.es_aval,
-            'grupo_id': self.grupo_id
-        }
-        
-        
-    # Calculos referentes a prestamos de cliente
-    def calcular_monto_prestado(self):
-        """Calcula el monto total prestado al cliente."""
-        monto_prestado = sum([prestamo.monto_prestamo for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
-        return monto_prestado
-    
-    def calcular_monto_pagado(self):
-        """Calcula el monto total pagado por el cliente."""
-        # Get all prestamos from cliente and sum all monto pagos for each prestamo
-        monto_pagado = sum([prestamo.calcular_monto_pagado() for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
-        return monto_pagado
-    def calcular_monto_restante(self):
-        """Calcula el monto restante por pagar del cliente."""
-        monto_restante = self.calcular_monto_prestado() - self.calcular_monto_pagado()
-        return monto_restante
-    def calcular_monto_prestado_utilidad(self):
-        """Calcula el monto total prestado al cliente."""
-        monto_prestado = sum([prestamo.monto_utilidad for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
-        return monto_prestado
-    def calcular_monto_restante_utilidad(self):
-        """Calcula el monto restante por pagar del cliente."""
-        monto_restante = self.calcular_monto_prestado_utilidad() - self.calcular_monto_pagado()
-        return monto_restante
-    def calcular_adeudo_cliente(self):
-        """Calcula el adeudo total del cliente."""
-        adeudo = sum([prestamo.calcular_monto_restante() for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
-        return adeudo
-    
-    def calcular_adeudo_cliente_sin_adeudo_prestamo_actual(self):
-        """Calcula el adeudo total del cliente sin considerar el adeudo del prestamo actual."""
-        adeudo = sum([prestamo.calcular_monto_restante() for prestamo in self.prestamos_como_titular[:-1]]) if self.prestamos_como_titular else 0
-        return adeudo
-    
-    def calcular_prestamo_papel(self):
-        """Calcula el monto papel prestado al cliente."""
-        prestamo_papel = self.prestamos_como_titular[-1].monto_prestamo if self.prestamos_como_titular else 0
-        return prestamo_papel
-    
-    def calcular_monto_restante_prestamo_actual(self):
-        """Calcula el adeudo del cliente usando el prestamo anterior al ultimo que hubo"""
-        prestamos_cliente = self.prestamos_como_titular
-        
-        num_prestamos = len(prestamos_cliente)
-        if num_prestamos == 1:
-            return 0
-        # print(f'Numero de prestamos: {num_prestamos}')
-        # monto_restante_ultimo_prestamo = prestamos_cliente[num_prestamos-2].calcular_monto_restante() if len(prestamos_cliente) > 1 else 0
-        # print(f'Monto restante ultimo prestamo: {monto_restante_ultimo_prestamo}')
-        monto_restante = self.prestamos_como_titular[num_prestamos-2].calcular_monto_restante() if self.prestamos_como_titular else 0
-        return monto_restante
-    
-    
-    def calcular_prestamo_real(self):
-        """Calcula el monto real prestado al cliente."""
-        prestamo_papel = self.calcular_prestamo_papel() 
-        #print(f'Prestamo papel: {prestamo_papel}')
-        adeudo = self.calcular_monto_restante_prestamo_actual()
-        #print(f'Adeudo: {adeudo}')
-        prestamo_real = prestamo_papel - adeudo
-        return prestamo_real
-    
+from sqlalchemy import case, func, select
+from ..database import db
+from sqlalchemy.orm import validates
+from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
+class ClienteAval(db.Model):
+    __tablename__ = 'clientes_avales'
+    cliente_id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100))
+    apellido_paterno = db.Column(db.String(100))
+    apellido_materno = db.Column(db.String(100))
+    colonia = db.Column(db.String(100))
+    cp = db.Column(db.String(5))
+    codigo_ine = db.Column(db.String(18))
+    estado_civil = db.Column(db.Enum('casado', 'divorciado', 'viudo', 'soltero', name='estado_civil_types'))
+    num_hijos = db.Column(db.Integer)
+    propiedad = db.Column(db.Enum('casa_propia', 'rentada', 'prestada', name='tipo_propiedad'))
+    es_aval = db.Column(db.Boolean, default=True)
+    grupo_id = db.Column(db.Integer, db.ForeignKey('grupos.grupo_id'), index=True)
+    
+    # Propiedades hibridas para calculos de prestamos
+    # (prestamos_como_titular está ordenado por prestamo_id, así que [-1] es el préstamo más reciente)
+    @hybrid_property
+    def prestamo_papel(self):
+        if self.prestamos_como_titular:
+            return self.prestamos_como_titular[-1].monto_prestamo
+        else:
+            return 0
+
+    @prestamo_papel.expression
+    def prestamo_papel(cls):
+        """
+        Expresión por fila (subconsulta correlacionada), igual que prestamo_real: para filtrar u ordenar unos
+        cuantos clientes. Los listados y sumas por grupo usan prestamos_actuales_query.
+        """
+        from app.models.prestamo import Prestamo
+
+        # Lectura de una sola entrada del índice (cliente_id, prestamo_id DESC)
+        prestamo_papel_subquery = (
+            select(Prestamo.monto_prestamo)
+            .where(Prestamo.cliente_id == cls.cliente_id)
+            .order_by(Prestamo.prestamo_id.desc())
+            .limit(1)
+            .correlate(cls)
+            .scalar_subquery()
+        )
+
+        return func.coalesce(prestamo_papel_subquery, 0)
+
+    @hybrid_property
+    def prestamo_real(self):
+        return self.calcular_prestamo_real()
+
+    @prestamo_real.expression
+    def prestamo_real(cls):
+        """
+        Expresión por fila (subconsulta correlacionada sobre el índice (cliente_id, prestamo_id DESC)),
+        para filtrar u ordenar unos cuantos clientes. Los listados y sumas por grupo deben hacer join
+        con prestamos_actuales_query, que calcula todos los clientes en una sola pasada.
+        """
+        from app.models.prestamo import Prestamo
+
+        # Los dos préstamos más recientes del cliente en una sola lectura del índice (cliente_id, prestamo_id DESC)
+        ultimos_prestamos = (
+            select(
+                Prestamo.monto_prestamo,
+                (Prestamo.monto_utilidad - Prestamo.total_pagado).label('adeudo'),
+                func.row_number().over(order_by=Prestamo.prestamo_id.desc()).label('orden')
+            )
+            .where(Prestamo.cliente_id == cls.cliente_id)
+            .order_by(Prestamo.prestamo_id.desc())
+            .limit(2)
+            .correlate(cls)
+            .subquery()
+        )
+
+        # Préstamo papel del más reciente menos el adeudo del anterior, mismo criterio que calcular_prestamo_real
+        prestamo_real_subquery = (
+            select(func.sum(case(
+                (ultimos_prestamos.c.orden == 1, ultimos_prestamos.c.monto_prestamo),
+                else_=-ultimos_prestamos.c.adeudo
+            )))
+            .scalar_subquery()
+        )
+
+        return func.coalesce(prestamo_real_subquery, 0)
+
+    @classmethod
+    def prestamos_actuales_query(cls, grupo_ids=None):
+        """
+        Tabla derivada (cliente_id, grupo_id, prestamo_papel, prestamo_real) con los montos del préstamo actual
+        de cada titular, calculada con ROW_NUMBER sobre sus préstamos en lugar de una subconsulta por fila.
+        Pensada para hacer join al listar muchos clientes; si se indican grupo_ids se limita a esos grupos.
+        """
+        from app.models.prestamo import Prestamo
+
+        prestamos_numerados = (
+            select(
+                Prestamo.cliente_id.label('cliente_id'),
+                cls.grupo_id.label('grupo_id'),
+                Prestamo.monto_prestamo.label('monto_prestamo'),
+                (Prestamo.monto_utilidad - Prestamo.total_pagado).label('adeudo'),
+                func.row_number().over(
+                    partition_by=Prestamo.cliente_id,
+                    order_by=Prestamo.prestamo_id.desc()
+                ).label('orden')
+            )
+            .join(cls, cls.cliente_id == Prestamo.cliente_id)
+        )
+        if grupo_ids is not None:
+            prestamos_numerados = prestamos_numerados.where(cls.grupo_id.in_(grupo_ids))
+        prestamos_numerados = prestamos_numerados.subquery()
+
+        prestamo_papel = func.sum(case((prestamos_numerados.c.orden == 1, prestamos_numerados.c.monto_prestamo), else_=0))
+        adeudo_anterior = func.sum(case((prestamos_numerados.c.orden == 2, prestamos_numerados.c.adeudo), else_=0))
+
+        return (
+            select(
+                prestamos_numerados.c.cliente_id,
+                prestamos_numerados.c.grupo_id,
+                prestamo_papel.label('prestamo_papel'),
+                (prestamo_papel - adeudo_anterior).label('prestamo_real')
+            )
+            .where(prestamos_numerados.c.orden <= 2)
+            .group_by(prestamos_numerados.c.cliente_id, prestamos_numerados.c.grupo_id)
+            .subquery()
+        )
+
+
+
+    @validates('cp')
+    def validate_cp(self, key, cp):
+        if len(cp) != 5 or not cp.isdigit():
+            raise ValueError("Código postal no válido.")
+        return cp
+
+    @validates('num_hijos')
+    def validate_num_hijos(self, key, num_hijos):
+        if num_hijos < 0:
+            raise ValueError("El número de hijos no puede ser negativo.")
+        return num_hijos
+    def getNombreCompleto(self):
+        return f'{self.nombre} {self.apellido_paterno} {self.apellido_materno}'
+    def serialize(self):
+        return {
+            'id': self.cliente_id,
+            'nombre': self.nombre,
+            'apellido_paterno': self.apellido_paterno,
+            'apellido_materno': self.apellido_materno,
+            'colonia': self.colonia,
+            'cp': self.cp,
+            'codigo_ine': self.codigo_ine,
+            'estado_civil': self.estado_civil,
+            'num_hijos': self.num_hijos,
+            'propiedad': self.propiedad,
+            'es_aval': self.es_aval,
+            'grupo_id': self.grupo_id
+        }
+        
+        
+    # Calculos referentes a prestamos de cliente
+    def calcular_monto_prestado(self):
+        """Calcula el monto total prestado al cliente."""
+        monto_prestado = sum([prestamo.monto_prestamo for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
+        return monto_prestado
+    
+    def calcular_monto_pagado(self):
+        """Calcula el monto total pagado por el cliente."""
+        # Get all prestamos from cliente and sum all monto pagos for each prestamo
+        monto_pagado = sum([prestamo.calcular_monto_pagado() for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
+        return monto_pagado
+    def calcular_monto_restante(self):
+        """Calcula el monto restante por pagar del cliente."""
+        monto_restante = self.calcular_monto_prestado() - self.calcular_monto_pagado()
+        return monto_restante
+    def calcular_monto_prestado_utilidad(self):
+        """Calcula el monto total prestado al cliente."""
+        monto_prestado = sum([prestamo.monto_utilidad for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
+        return monto_prestado
+    def calcular_monto_restante_utilidad(self):
+        """Calcula el monto restante por pagar del cliente."""
+        monto_restante = self.calcular_monto_prestado_utilidad() - self.calcular_monto_pagado()
+        return monto_restante
+    def calcular_adeudo_cliente(self):
+        """Calcula el adeudo total del cliente."""
+        adeudo = sum([prestamo.calcular_monto_restante() for prestamo in self.prestamos_como_titular]) if self.prestamos_como_titular else 0
+        return adeudo
+    
+    def calcular_adeudo_cliente_sin_adeudo_prestamo_actual(self):
+        """Calcula el adeudo total del cliente sin considerar el adeudo del prestamo actual."""
+        adeudo = sum([prestamo.calcular_monto_restante() for prestamo in self.prestamos_como_titular[:-1]]) if self.prestamos_como_titular else 0
+        return adeudo
+    
+    def calcular_prestamo_papel(self):
+        """Calcula el monto papel prestado al cliente."""
+        prestamo_papel = self.prestamos_como_titular[-1].monto_prestamo if self.prestamos_como_titular else 0
+        return prestamo_papel
+    
+    def calcular_monto_restante_prestamo_actual(self):
+        """Calcula el adeudo del cliente usando el prestamo anterior al ultimo que hubo"""
+        prestamos_cliente = self.prestamos_como_titular
+        
+        num_prestamos = len(prestamos_cliente)
+        if num_prestamos == 1:
+            return 0
+        # print(f'Numero de prestamos: {num_prestamos}')
+        # monto_restante_ultimo_prestamo = prestamos_cliente[num_prestamos-2].calcular_monto_restante() if len(prestamos_cliente) > 1 else 0
+        # print(f'Monto restante ultimo prestamo: {monto_restante_ultimo_prestamo}')
+        monto_restante = self.prestamos_como_titular[num_prestamos-2].calcular_monto_restante() if self.prestamos_como_titular else 0
+        return monto_restante
+    
+    
+    def calcular_prestamo_real(self):
+        """Calcula el monto real prestado al cliente."""
+        prestamo_papel = self.calcular_prestamo_papel() 
+        #print(f'Prestamo papel: {prestamo_papel}')
+        adeudo = self.calcular_monto_restante_prestamo_actual()
+        #print(f'Adeudo: {adeudo}')
+        prestamo_real = prestamo_papel - adeudo
+        return prestamo_real
+    
@@ -9,6 +9,13 @@ class Falta(db.Model):
     fecha = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False)
     prestamo_id = db.Column(db.Integer, db.ForeignKey('prestamos.prestamo_id'), nullable=False)
     monto_abonado= db.Column(db.Numeric, nullable=False)
+
+    # Índice para contar faltas por préstamo dentro de una ventana de fechas
+    __table_args__ = (
+        db.Index('ix_falta_prestamo_id_fecha', 'prestamo_id', 'fecha'),
+        # Faltas de una semana de todos los préstamos (reporte y bonos por grupo)
+        db.Index('ix_falta_fecha', 'fecha'),
+    )
     
     
     def serialize(self):
@@ -1,49 +1,71 @@
-from app.models.cliente_aval import ClienteAval
-from ..database import db
-from .usuario import Usuario
-
-class Grupo(db.Model):
-    __tablename__ = 'grupos'
-    grupo_id = db.Column(db.Integer, primary_key=True)
-    nombre_grupo = db.Column(db.String(100))
-    ruta_id = db.Column(db.Integer, db.ForeignKey('rutas.ruta_id'))
-    usuario_id_titular = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
-
-    # Relaciones
-    ruta = db.relationship('Ruta', backref=db.backref('grupos', lazy=True))
-    usuarioTitular = db.relationship('Usuario', backref=db.backref('grupos', lazy=True))
-    clientes_avales = db.relationship('ClienteAval', backref='grupo', lazy=True)
-
-    # # Relación uno a muchos con Corte
-    # cortes = db.relationship('Corte', backref='grupo', lazy=True)
-
-    def validar_titular(self):
-        if self.usuario_id_titular:
-            titular = Usuario.query.get(self.usuario_id_titular)
-            if titular.rol_id != 2:
-                raise ValueError("El usuario asignado como titular al grupo no tiene el rol correcto.")
-
-    def serialize(self):
-        return {
-            'grupo_id': self.grupo_id,
-            'nombre_grupo': self.nombre_grupo,
-            'ruta_id': self.ruta_id,
-            'usuario_id_titular': self.usuario_id_titular
-        }
-
-    def calcular_morosidad_de_prestamos_en_grupo(self):
-        """Calcula la morosidad de los préstamos en el grupo."""
-        # Se obtienen los clientes del grupo, se sacan los montos restantes de cada cliente y se suman
-        morosidad_total = 0
-        for cliente in self.clientes_avales:
-            morosidad_total += cliente.calcular_monto_restante()
-        return morosidad_total
-    
-    @staticmethod
-    def calcular_sobrante_grupo(grupo_id):
-        clientes_grupo = ClienteAval.query.filter_by(grupo_id=grupo_id).all()
-        total_sobrante = 0
-        for cliente in clientes_grupo:
-            total_sobrante -= cliente.calcular_monto_restante_utilidad()
-        return float(total_sobrante)
-        
\ No newline at end of file
+from sqlalchemy import func
+from app.models.cliente_aval import ClienteAval
+from ..database import db
+from .usuario import Usuario
+from .prestamo import Prestamo
+
+class Grupo(db.Model):
+    __tablename__ = 'grupos'
+    grupo_id = db.Column(db.Integer, primary_key=True)
+    nombre_grupo = db.Column(db.String(100))
+    ruta_id = db.Column(db.Integer, db.ForeignKey('rutas.ruta_id'), index=True)
+    usuario_id_titular = db.Column(db.Integer, db.ForeignKey('usuarios.id'), index=True)
+
+    # Relaciones
+    ruta = db.relationship('Ruta', backref=db.backref('grupos', lazy=True))
+    usuarioTitular = db.relationship('Usuario', backref=db.backref('grupos', lazy=True))
+    clientes_avales = db.relationship('ClienteAval', backref='grupo', lazy=True)
+
+    # # Relación uno a muchos con Corte
+    # cortes = db.relationship('Corte', backref='grupo', lazy=True)
+
+    def validar_titular(self):
+        if self.usuario_id_titular:
+            titular = Usuario.query.get(self.usuario_id_titular)
+            if titular.rol_id != 2:
+                raise ValueError("El usuario asignado como titular al grupo no tiene el rol correcto.")
+
+    def serialize(self):
+        return {
+            'grupo_id': self.grupo_id,
+            'nombre_grupo': self.nombre_grupo,
+            'ruta_id': self.ruta_id,
+            'usuario_id_titular': self.usuario_id_titular
+        }
+
+    def calcular_morosidad_de_prestamos_en_grupo(self):
+        """Calcula la morosidad de los préstamos en el grupo."""
+        # Se obtienen los clientes del grupo, se sacan los montos restantes de cada cliente y se suman
+        morosidad_total = 0
+        for cliente in self.clientes_avales:
+            morosidad_total += cliente.calcular_monto_restante()
+        return morosidad_total
+    
+    @staticmethod
+    def sobrante_por_grupo_query(grupo_ids=None):
+        """
+        Subconsulta (grupo_id, sobrante_grupo) con el sobrante de cada grupo calculado en la base de datos:
+        total pagado menos monto de utilidad de todos los préstamos de los titulares del grupo.
+        Pensada para hacer join desde los reportes; si se indican grupo_ids se limita a esos grupos.
+        """
+        query = db.session.query(
+            ClienteAval.grupo_id.label('grupo_id'),
+            func.sum(Prestamo.total_pagado - Prestamo.monto_utilidad).label('sobrante_grupo')
+        ).join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
+        if grupo_ids is not None:
+            query = query.filter(ClienteAval.grupo_id.in_(grupo_ids))
+        return query.group_by(ClienteAval.grupo_id).subquery()
+
+    @staticmethod
+    def calcular_sobrantes_grupos(grupo_ids):
+        """Calcula el sobrante de varios grupos en una sola consulta. Retorna {grupo_id: sobrante}."""
+        grupo_ids = list(grupo_ids)
+        if not grupo_ids:
+            return {}
+        sobrante_por_grupo = Grupo.sobrante_por_grupo_query(grupo_ids)
+        sobrantes = dict(db.session.query(sobrante_por_grupo.c.grupo_id, sobrante_por_grupo.c.sobrante_grupo).all())
+        return {grupo_id: float(sobrantes.get(grupo_id) or 0) for grupo_id in grupo_ids}
+
+    @staticmethod
+    def calcular_sobrante_grupo(grupo_id):
+        return Grupo.calcular_sobrantes_grupos([grupo_id])[grupo_id]
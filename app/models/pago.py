@@ -1,24 +1,70 @@
-from datetime import datetime
-import pytz
-from ..database import db
-from app.constants import TIMEZONE
-class Pago(db.Model):
-    __tablename__ = 'pagos'
-    pago_id = db.Column(db.Integer, primary_key=True)
-    fecha_pago = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False)
-    monto_pagado = db.Column(db.Numeric, nullable=False)
-    prestamo_id = db.Column(db.Integer, db.ForeignKey('prestamos.prestamo_id'), nullable=False)
-
-    
-    
-    def serialize(self):
-        from app.models.prestamo import Prestamo
-        prestamo = Prestamo.query.get(self.prestamo_id)
-        if not prestamo:
-            raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
-        return {
-            'id': self.pago_id,
-            'fecha_pago': self.fecha_pago,
-            'monto_pagado': str(self.monto_pagado),
-            'prestamo': prestamo.serialize()
-        }
+from datetime import datetime
+import pytz
+from sqlalchemy.orm import joinedload
+from ..database import db
+from app.constants import TIMEZONE
+class Pago(db.Model):
+    __tablename__ = 'pagos'
+    pago_id = db.Column(db.Integer, primary_key=True)
+    fecha_pago = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False)
+    monto_pagado = db.Column(db.Numeric, nullable=False)
+    prestamo_id = db.Column(db.Integer, db.ForeignKey('prestamos.prestamo_id'), nullable=False)
+
+    # Índice para las consultas por rango de fechas (semana del reporte, bonos, verificación semanal)
+    __table_args__ = (
+        db.Index('ix_pagos_fecha_pago', 'fecha_pago'),
+        # Pagos de un préstamo (llave foránea) y sus pagos dentro de una semana
+        db.Index('ix_pagos_prestamo_id_fecha_pago', 'prestamo_id', 'fecha_pago'),
+    )
+
+    
+    
+    def serialize(self, compacto=False, prestamo_serializado=None):
+        """
+        Serializa el pago. En modo compacto sólo incluye el prestamo_id; si no, incluye el préstamo
+        serializado (se puede pasar ya calculado, como hace serialize_many).
+        """
+        data = {
+            'id': self.pago_id,
+            'fecha_pago': self.fecha_pago,
+            'monto_pagado': str(self.monto_pagado)
+        }
+        if compacto:
+            data['prestamo_id'] = self.prestamo_id
+            return data
+
+        if prestamo_serializado is None:
+            prestamo = self.prestamo
+            if not prestamo:
+                raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
+            prestamo_serializado = prestamo.serialize()
+        data['prestamo'] = prestamo_serializado
+        return data
+
+    @staticmethod
+    def serialize_many(pagos, compacto=False):
+        """
+        Serializa una lista de pagos. Los préstamos (con su tipo) se cargan en una sola consulta
+        y cada préstamo se serializa una sola vez, aunque tenga muchos pagos en la lista.
+        """
+        if compacto:
+            return [pago.serialize(compacto=True) for pago in pagos]
+
+        from app.models.prestamo import Prestamo
+        prestamo_ids = {pago.prestamo_id for pago in pagos}
+        prestamos = {}
+        if prestamo_ids:
+            prestamos = {
+                prestamo.prestamo_id: prestamo.serialize()
+                for prestamo in Prestamo.query
+                .options(joinedload(Prestamo.tipo_prestamo))
+                .filter(Prestamo.prestamo_id.in_(prestamo_ids))
+                .all()
+            }
+
+        serializados = []
+        for pago in pagos:
+            if pago.prestamo_id not in prestamos:
+                raise ValueError(f"No se encontró el préstamo con ID: {pago.prestamo_id}")
+            serializados.append(pago.serialize(prestamo_serializado=prestamos[pago.prestamo_id]))
+        return serializados
@@ -1,283 +1,362 @@
-from sqlalchemy.orm import validates
-from sqlalchemy import CheckConstraint, UniqueConstraint
-from .falta import Falta
-from ..database import db
-from datetime import datetime, timedelta
-from app.constants import TIMEZONE
-import pytz
-
-class Prestamo(db.Model):
-    __tablename__ = 'prestamos'
-    prestamo_id = db.Column(db.Integer, primary_key=True)
-    monto_prestamo = db.Column(db.Numeric, nullable=False)
-    monto_prestamo_real = db.Column(db.Numeric, nullable=True)
-    monto_utilidad = db.Column(db.Numeric, nullable=False)
-    fecha_inicio = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False) #Fecha para contar semanas de prestamos es a partir del lunes de la semana de que se pidio el prestamo
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes_avales.cliente_id'), nullable=False)
-    aval_id = db.Column(db.Integer, db.ForeignKey('clientes_avales.cliente_id'), nullable=True)
-    tipo_prestamo_id = db.Column(db.Integer, db.ForeignKey('tipos_prestamo.tipo_prestamo_id'), nullable=False)
-    completado = db.Column(db.Boolean, default=False, nullable=False)
-    status = db.Column(db.Enum('activo', 'renovado', 'liquidado', 'vencido', name='status_prestamo'), default='activo', nullable=False)
-    renovacion = db.Column(db.Boolean, default=False, nullable=False)
-    semana_activa = db.Column(db.Integer, default=0, nullable=False)
-    
-    
-    # Relaciones
-    titular = db.relationship(
-        'ClienteAval',
-        foreign_keys=[cliente_id],
-        backref=db.backref('prestamos_como_titular', lazy=True),
-        overlaps="prestamos_como_aval"
-    )
-    aval = db.relationship(
-        'ClienteAval',
-        foreign_keys=[aval_id],
-        backref=db.backref('prestamos_como_aval', lazy=True),
-        overlaps="prestamos_como_titular"
-    )
-    tipo_prestamo = db.relationship(
-        'TipoPrestamo',
-        backref=db.backref('prestamos', lazy=True)
-    )
-    pagos = db.relationship(
-        'Pago',
-        backref=db.backref('prestamo', lazy=True)
-    )
-    # Relacion uno a muchos con la tabla de faltas
-    faltas = db.relationship(
-        'Falta',
-        backref=db.backref('prestamo', lazy=True)
-    )
-
-    
-    # Ensure that monto_prestado is greater than 0
-    __table_args__ = (
-        CheckConstraint('monto_prestamo > 0', name='check_monto_prestamo_positive'),
-        # UniqueConstraint('aval_id', name='uq_aval_id')  # Enforce unique aval_id
-    )
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.verificar_si_es_renovacion()
-        
-    def verificar_si_es_renovacion(self):
-        """
-        Verifica si el préstamo es una renovación.
-        """
-        # Build query to find previous active loans for this client
-        query = Prestamo.query.filter_by(cliente_id=self.cliente_id, status='activo')
-
-        # Exclude the current prestamo if it already has an ID (to avoid matching itself)
-        if self.prestamo_id is not None:
-            query = query.filter(Prestamo.prestamo_id != self.prestamo_id)
-
-        prestamo_anterior = query.first()
-
-        print(f"DEBUG - Cliente ID: {self.cliente_id}")
-        print(f"DEBUG - Prestamo ID actual: {self.prestamo_id}")
-        print(f"DEBUG - Prestamo anterior encontrado: {prestamo_anterior}")
-        if prestamo_anterior:
-            print(f"DEBUG - Prestamo anterior ID: {prestamo_anterior.prestamo_id}")
-            print(f"DEBUG - Prestamo anterior cliente_id: {prestamo_anterior.cliente_id}")
-            print(f"DEBUG - Semana activa del anterior: {prestamo_anterior.semana_activa}")
-
-        if prestamo_anterior:
-            if prestamo_anterior.semana_activa >= 9:
-                self.renovacion = True
-                self.completar_prestamo_anterior_restar_monto_faltante_monto_prestamo_actual(prestamo_anterior)
-            else:
-                raise ValueError("El cliente no puede renovar.")
-    
-    def prestamo_anterior_al_corriente(self, prestamo_anterior):
-        def obtener_ultimo_pago(prestamo):
-            if not prestamo or not prestamo.pagos:
-                return None  # No hay préstamo o no tiene pagos
-        
-            # Ordenamos en orden descendente por fecha_pago
-            pagos_ordenados = sorted(prestamo.pagos, key=lambda p: p.fecha_pago, reverse=True)
-            print(pagos_ordenados[0].serialize())
-            return pagos_ordenados[0]  # El más reciente
-        current_date = datetime.now(TIMEZONE).date()
-        start_of_week = current_date - timedelta(days=current_date.weekday())
-        from app.models import Pago
-        pago_semana = obtener_ultimo_pago(prestamo_anterior)
-        if pago_semana:
-            if pago_semana.monto_pagado >= prestamo_anterior.calcular_cobranza_ideal() and pago_semana.fecha_pago.date() >= start_of_week:
-                return True
-        return False
-
-    def completar_prestamo_anterior_restar_monto_faltante_monto_prestamo_actual(self, prestamo_anterior):
-        """
-        Completa el préstamo anterior y resta el monto faltante al monto del préstamo actual.
-        """
-        if not prestamo_anterior:
-            raise ValueError("No se encontró un préstamo anterior.")
-        if prestamo_anterior.completado:
-            raise ValueError("El préstamo anterior ya está completado.")
-        
-        monto_faltante = prestamo_anterior.monto_utilidad - prestamo_anterior.calcular_monto_pagado()
-        prestamo_anterior.completado = True
-        self.monto_prestamo_real = float(self.monto_prestamo) - float(monto_faltante)
-        db.session.commit()
-    
-    def actualizar_semana_activa(self, cubre_cobranza):
-        """
-        Actualiza la semana activa del préstamo.
-        Avanza SOLO UNA SEMANA por pago registrado, incluso si hay adelanto acumulado.
-        El usuario debe registrar pagos (incluso de $0) para avanzar cada semana.
-        """
-        if cubre_cobranza:
-            self.semana_activa += 1
-            db.session.commit()
-    
-    def verificar_completado(self):
-        """Calcula si el préstamo está completo sumando los pagos."""
-        monto_pagado_total = sum([float(pago.monto_pagado) for pago in self.pagos])
-        if monto_pagado_total >= self.monto_utilidad or self.semana_activa == self.tipo_prestamo.numero_semanas:
-            self.completado = True
-        else:
-            self.completado = False
-        db.session.commit()
-    
-    
-    # Validation for monto_prestamo > 0
-    @validates('monto_prestamo')
-    def validate_monto_prestamo(self, key, value):
-        if value <= 0:
-            raise ValueError("El monto del préstamo debe ser mayor que 0.")
-        return value
-
-    """
-    @validates('aval_id')
-    def validate_aval_id(self, key, aval_id):
-        from app.models.cliente_aval import ClienteAval
-        # Get the group of the cliente
-        cliente = ClienteAval.query.get(self.cliente_id)
-        if not cliente:
-            raise ValueError(f"Cliente con ID {self.cliente_id} no encontrado.")
-
-        # Check if the aval has a loan in the same group for a different client
-        existing_prestamo = (
-            Prestamo.query
-            .join(ClienteAval, Prestamo.aval_id == ClienteAval.cliente_id)
-            .filter(ClienteAval.grupo_id == cliente.grupo_id)
-            .filter(Prestamo.aval_id == aval_id)
-            .filter(Prestamo.prestamo_id != self.prestamo_id)
-            .first()
-        )
-
-        if existing_prestamo:
-            # Verifica si el préstamo existente es de otro cliente (diferente a self.cliente_id)
-            # o si es el mismo cliente pero el préstamo no está completado, entonces error.
-            if existing_prestamo.cliente_id != self.cliente_id:
-                raise ValueError(f"El aval con ID {aval_id} ya está asignado a otro préstamo activo en el grupo.")
-
-        
-        return aval_id
-    """
-    
-    def serialize(self):
-        return {
-            'prestamo_id': self.prestamo_id,
-            'cliente_id': self.cliente_id,
-            'fecha_inicio': self.fecha_inicio,
-            'monto_prestamo': self.monto_prestamo,
-            'monto_utilidad': self.monto_utilidad,
-            'tipo_prestamo_id': self.tipo_prestamo_id,
-            'aval_id': self.aval_id,
-            'completado': self.completado,
-            'status': self.status,
-            'renovacion': self.renovacion,
-            'semana_activa': self.semana_activa,
-            'monto_pagado': self.calcular_monto_pagado(),
-            'monto_restante': self.calcular_monto_restante(),
-            'adelanto_acumulado': float(self.calcular_adelanto_acumulado())
-        }
-        
-    # Funciones de operacion
-    def calcular_cobranza_ideal(self):
-        """
-        Calcula la cobranza ideal semanal basada en el monto del préstamo y el porcentaje semanal del tipo de préstamo.
-        """
-        return float(self.monto_prestamo) * self.tipo_prestamo.porcentaje_semanal
-    
-    
-    def verificar_pagos_semana(self, fecha_inicio_semana):
-        """
-        Verifica los pagos realizados en una semana específica y compara con la cobranza ideal.
-        Registra una falta si los pagos no cubren la cobranza ideal.
-        """
-        cobranza_ideal = self.calcular_cobranza_ideal()
-
-        # Calcular la fecha final de la semana
-        fecha_final_semana = fecha_inicio_semana + timedelta(days=6)
-
-        # Sumar los pagos realizados durante esa semana en la zona horaria de Ciudad de México
-        pagos_semanales = sum(
-            float(pago.monto_pagado)
-            for pago in self.pagos
-            if fecha_inicio_semana <= pago.fecha_pago.astimezone(TIMEZONE).date() <= fecha_final_semana
-        )
-
-        # Si los pagos no cubren la cobranza ideal, registrar una falta
-        if pagos_semanales < cobranza_ideal:
-            falta = Falta(fecha=datetime.now(TIMEZONE).date(), prestamo_id=self.prestamo_id)
-            db.session.add(falta)
-            db.session.commit()
-            return False  # No se cubrió la cobranza ideal
-        return True  # Se cumplió la cobranza ideal
-    
-    
-    def verificar_pago_cubre_cobranza_ideal(self, pago):
-        """
-        Verifica si el pago (junto con el adelanto acumulado) cubre la cobranza ideal.
-        Permite pagos de $0 si el adelanto acumulado cubre la semana completa.
-        """
-        cobranza_ideal = self.calcular_cobranza_ideal()
-        adelanto_acumulado = self.calcular_adelanto_acumulado()
-        monto_pago = float(pago.monto_pagado)
-
-        try:
-            # Calcular monto total disponible: pago actual + adelanto acumulado
-            monto_total_disponible = monto_pago + adelanto_acumulado
-
-            # Si el monto total disponible cubre la cobranza ideal, no hay falta
-            if monto_total_disponible >= float(cobranza_ideal):
-                return True
-            else:
-                # No cubre la cobranza ideal, registrar falta
-                falta = Falta(
-                    fecha=datetime.now(TIMEZONE).date(),
-                    prestamo_id=self.prestamo_id,
-                    monto_abonado=monto_pago
-                )
-                db.session.add(falta)
-                db.session.commit()
-                return False
-        except Exception as e:
-            db.session.rollback()
-            raise ValueError(f"No se pudo verificar el pago: {str(e)}")
-        
-    def calcular_monto_pagado(self):
-        """Calcula el monto total pagado por el cliente."""
-        monto_pagado = sum([pago.monto_pagado for pago in self.pagos]) if self.pagos else 0
-        return monto_pagado
-    
-    def calcular_monto_restante(self):
-        """Calcula el monto restante por pagar del cliente."""
-        monto_restante = self.monto_utilidad- self.calcular_monto_pagado()
-        return monto_restante
-
-    def calcular_adelanto_acumulado(self):
-        """
-        Calcula el monto de adelanto acumulado basándose en los pagos ya realizados.
-        Adelanto = Total pagado - (semana_activa * cobranza_ideal)
-        Si el resultado es positivo, hay adelanto acumulado.
-        """
-        cobranza_ideal = self.calcular_cobranza_ideal()
-        monto_pagado_total = float(self.calcular_monto_pagado())
-        monto_esperado_hasta_ahora = float(self.semana_activa) * float(cobranza_ideal)
-
-        adelanto = monto_pagado_total - monto_esperado_hasta_ahora
-        return max(0, adelanto)  # Si es negativo, no hay adelanto
-
+from sqlalchemy.orm import validates
+from sqlalchemy import CheckConstraint, UniqueConstraint, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from .falta import Falta
+from ..database import db
+from datetime import datetime, timedelta
+from app.constants import TIMEZONE
+import pytz
+
+class Prestamo(db.Model):
+    __tablename__ = 'prestamos'
+    prestamo_id = db.Column(db.Integer, primary_key=True)
+    monto_prestamo = db.Column(db.Numeric, nullable=False)
+    monto_prestamo_real = db.Column(db.Numeric, nullable=True)
+    monto_utilidad = db.Column(db.Numeric, nullable=False)
+    fecha_inicio = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False) #Fecha para contar semanas de prestamos es a partir del lunes de la semana de que se pidio el prestamo
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes_avales.cliente_id'), nullable=False)
+    aval_id = db.Column(db.Integer, db.ForeignKey('clientes_avales.cliente_id'), nullable=True)
+    tipo_prestamo_id = db.Column(db.Integer, db.ForeignKey('tipos_prestamo.tipo_prestamo_id'), nullable=False)
+    completado = db.Column(db.Boolean, default=False, nullable=False)
+    status = db.Column(db.Enum('activo', 'renovado', 'liquidado', 'vencido', name='status_prestamo'), default='activo', nullable=False)
+    renovacion = db.Column(db.Boolean, default=False, nullable=False)
+    semana_activa = db.Column(db.Integer, default=0, nullable=False)
+    # Totales de pagos desnormalizados, mantenidos por PagoService; la migración los llena y `flask reconciliar-pagos` los reconstruye
+    total_pagado = db.Column(db.Numeric, default=0, server_default='0', nullable=False)
+    numero_pagos = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    fecha_ultimo_pago = db.Column(db.DateTime, nullable=True)
+    
+    
+    # Relaciones
+    titular = db.relationship(
+        'ClienteAval',
+        foreign_keys=[cliente_id],
+        backref=db.backref('prestamos_como_titular', lazy=True, order_by=prestamo_id),
+        overlaps="prestamos_como_aval"
+    )
+    aval = db.relationship(
+        'ClienteAval',
+        foreign_keys=[aval_id],
+        backref=db.backref('prestamos_como_aval', lazy=True, order_by=prestamo_id),
+        overlaps="prestamos_como_titular"
+    )
+    tipo_prestamo = db.relationship(
+        'TipoPrestamo',
+        backref=db.backref('prestamos', lazy=True)
+    )
+    pagos = db.relationship(
+        'Pago',
+        backref=db.backref('prestamo', lazy=True)
+    )
+    # Relacion uno a muchos con la tabla de faltas
+    faltas = db.relationship(
+        'Falta',
+        backref=db.backref('prestamo', lazy=True)
+    )
+
+    
+    # Ensure that monto_prestado is greater than 0
+    __table_args__ = (
+        CheckConstraint('monto_prestamo > 0', name='check_monto_prestamo_positive'),
+        # Préstamo más reciente por cliente (ORDER BY prestamo_id DESC) sin ordenar toda la tabla
+        db.Index('ix_prestamos_cliente_id_prestamo_id', cliente_id, prestamo_id.desc()),
+        db.Index('ix_prestamos_aval_id', aval_id),
+        # Índices parciales: sólo los préstamos vigentes (reporte, hoja de cobranza y verificación semanal)
+        db.Index('ix_prestamos_cliente_id_no_completado', cliente_id, postgresql_where=(completado == False)),
+        db.Index('ix_prestamos_activos', prestamo_id, postgresql_where=(status == 'activo')),
+        # UniqueConstraint('aval_id', name='uq_aval_id')  # Enforce unique aval_id
+    )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verificar_si_es_renovacion()
+        
+    def verificar_si_es_renovacion(self):
+        """
+        Verifica si el préstamo es una renovación.
+        """
+        # Build query to find previous active loans for this client
+        query = Prestamo.query.filter_by(cliente_id=self.cliente_id, status='activo')
+
+        # Exclude the current prestamo if it already has an ID (to avoid matching itself)
+        if self.prestamo_id is not None:
+            query = query.filter(Prestamo.prestamo_id != self.prestamo_id)
+
+        prestamo_anterior = query.first()
+
+        print(f"DEBUG - Cliente ID: {self.cliente_id}")
+        print(f"DEBUG - Prestamo ID actual: {self.prestamo_id}")
+        print(f"DEBUG - Prestamo anterior encontrado: {prestamo_anterior}")
+        if prestamo_anterior:
+            print(f"DEBUG - Prestamo anterior ID: {prestamo_anterior.prestamo_id}")
+            print(f"DEBUG - Prestamo anterior cliente_id: {prestamo_anterior.cliente_id}")
+            print(f"DEBUG - Semana activa del anterior: {prestamo_anterior.semana_activa}")
+
+        if prestamo_anterior:
+            if prestamo_anterior.semana_activa >= 9:
+                self.renovacion = True
+                self.completar_prestamo_anterior_restar_monto_faltante_monto_prestamo_actual(prestamo_anterior)
+            else:
+                raise ValueError("El cliente no puede renovar.")
+    
+    def prestamo_anterior_al_corriente(self, prestamo_anterior):
+        if not prestamo_anterior or prestamo_anterior.fecha_ultimo_pago is None:
+            return False  # No hay préstamo o no tiene pagos
+        current_date = datetime.now(TIMEZONE).date()
+        start_of_week = current_date - timedelta(days=current_date.weekday())
+        # La fecha del último pago está en los totales desnormalizados: si es anterior a esta semana
+        # no hace falta leer el pago
+        if prestamo_anterior.fecha_ultimo_pago.date() < start_of_week:
+            return False
+        from app.models import Pago
+        # Sólo el pago más reciente (índice prestamo_id, fecha_pago), sin cargar todos los pagos del préstamo
+        pago_semana = (
+            Pago.query
+            .filter(Pago.prestamo_id == prestamo_anterior.prestamo_id)
+            .order_by(Pago.fecha_pago.desc(), Pago.pago_id.desc())
+            .first()
+        )
+        if pago_semana:
+            if pago_semana.monto_pagado >= prestamo_anterior.calcular_cobranza_ideal() and pago_semana.fecha_pago.date() >= start_of_week:
+                return True
+        return False
+
+    def completar_prestamo_anterior_restar_monto_faltante_monto_prestamo_actual(self, prestamo_anterior):
+        """
+        Completa el préstamo anterior y resta el monto faltante al monto del préstamo actual.
+        """
+        if not prestamo_anterior:
+            raise ValueError("No se encontró un préstamo anterior.")
+        if prestamo_anterior.completado:
+            raise ValueError("El préstamo anterior ya está completado.")
+        
+        monto_faltante = prestamo_anterior.monto_utilidad - prestamo_anterior.calcular_monto_pagado()
+        prestamo_anterior.completado = True
+        self.monto_prestamo_real = float(self.monto_prestamo) - float(monto_faltante)
+        db.session.commit()
+    
+    def actualizar_semana_activa(self, cubre_cobranza):
+        """
+        Actualiza la semana activa del préstamo.
+        Avanza SOLO UNA SEMANA por pago registrado, incluso si hay adelanto acumulado.
+        El usuario debe registrar pagos (incluso de $0) para avanzar cada semana.
+        """
+        if cubre_cobranza:
+            self.semana_activa += 1
+            db.session.commit()
+    
+    def calcular_completado(self):
+        """Indica si el préstamo está completo según el total pagado y la semana activa, sin guardar cambios."""
+        monto_pagado_total = float(self.calcular_monto_pagado())
+        return monto_pagado_total >= self.monto_utilidad or self.semana_activa == self.tipo_prestamo.numero_semanas
+
+    def verificar_completado(self):
+        """Calcula si el préstamo está completo usando el total pagado."""
+        self.completado = self.calcular_completado()
+        db.session.commit()
+    
+    
+    # Validation for monto_prestamo > 0
+    @validates('monto_prestamo')
+    def validate_monto_prestamo(self, key, value):
+        if value <= 0:
+            raise ValueError("El monto del préstamo debe ser mayor que 0.")
+        return value
+
+    """
+    @validates('aval_id')
+    def validate_aval_id(self, key, aval_id):
+        from app.models.cliente_aval import ClienteAval
+        # Get the group of the cliente
+        cliente = ClienteAval.query.get(self.cliente_id)
+        if not cliente:
+            raise ValueError(f"Cliente con ID {self.cliente_id} no encontrado.")
+
+        # Check if the aval has a loan in the same group for a different client
+        existing_prestamo = (
+            Prestamo.query
+            .join(ClienteAval, Prestamo.aval_id == ClienteAval.cliente_id)
+            .filter(ClienteAval.grupo_id == cliente.grupo_id)
+            .filter(Prestamo.aval_id == aval_id)
+            .filter(Prestamo.prestamo_id != self.prestamo_id)
+            .first()
+        )
+
+        if existing_prestamo:
+            # Verifica si el préstamo existente es de otro cliente (diferente a self.cliente_id)
+            # o si es el mismo cliente pero el préstamo no está completado, entonces error.
+            if existing_prestamo.cliente_id != self.cliente_id:
+                raise ValueError(f"El aval con ID {aval_id} ya está asignado a otro préstamo activo en el grupo.")
+
+        
+        return aval_id
+    """
+    
+    def serialize(self):
+        return {
+            'prestamo_id': self.prestamo_id,
+            'cliente_id': self.cliente_id,
+            'fecha_inicio': self.fecha_inicio,
+            'monto_prestamo': self.monto_prestamo,
+            'monto_utilidad': self.monto_utilidad,
+            'tipo_prestamo_id': self.tipo_prestamo_id,
+            'aval_id': self.aval_id,
+            'completado': self.completado,
+            'status': self.status,
+            'renovacion': self.renovacion,
+            'semana_activa': self.semana_activa,
+            'monto_pagado': self.calcular_monto_pagado(),
+            'monto_restante': self.calcular_monto_restante(),
+            'adelanto_acumulado': float(self.calcular_adelanto_acumulado())
+        }
+        
+    # Funciones de operacion
+    def calcular_cobranza_ideal(self):
+        """
+        Calcula la cobranza ideal semanal basada en el monto del préstamo y el porcentaje semanal del tipo de préstamo.
+        """
+        return float(self.monto_prestamo) * self.tipo_prestamo.porcentaje_semanal
+    
+    
+    def verificar_pagos_semana(self, fecha_inicio_semana):
+        """
+        Verifica los pagos realizados en una semana específica y compara con la cobranza ideal.
+        Registra una falta si los pagos no cubren la cobranza ideal.
+        """
+        cobranza_ideal = self.calcular_cobranza_ideal()
+
+        # Calcular la fecha final de la semana
+        fecha_final_semana = fecha_inicio_semana + timedelta(days=6)
+
+        # Sumar en la base los pagos realizados durante esa semana en la zona horaria de Ciudad de México,
+        # sin cargar todos los pagos del préstamo
+        from app.models.pago import Pago
+        inicio = TIMEZONE.localize(datetime.combine(fecha_inicio_semana, datetime.min.time()))
+        fin = TIMEZONE.localize(datetime.combine(fecha_final_semana, datetime.max.time()))
+        pagos_semanales = float(
+            db.session.query(func.coalesce(func.sum(Pago.monto_pagado), 0))
+            .filter(Pago.prestamo_id == self.prestamo_id, Pago.fecha_pago >= inicio, Pago.fecha_pago <= fin)
+            .scalar()
+        )
+
+        # Si los pagos no cubren la cobranza ideal, registrar una falta
+        if pagos_semanales < cobranza_ideal:
+            falta = Falta(fecha=datetime.now(TIMEZONE).date(), prestamo_id=self.prestamo_id)
+            db.session.add(falta)
+            db.session.commit()
+            return False  # No se cubrió la cobranza ideal
+        return True  # Se cumplió la cobranza ideal
+    
+    
+    def pago_cubre_cobranza_ideal(self, monto_pago):
+        """
+        Indica si el monto pagado junto con el adelanto acumulado cubre la cobranza ideal, sin registrar faltas.
+        """
+        cobranza_ideal = self.calcular_cobranza_ideal()
+        adelanto_acumulado = self.calcular_adelanto_acumulado()
+
+        # Calcular monto total disponible: pago actual + adelanto acumulado
+        monto_total_disponible = float(monto_pago) + adelanto_acumulado
+        return monto_total_disponible >= float(cobranza_ideal)
+
+    def verificar_pago_cubre_cobranza_ideal(self, pago):
+        """
+        Verifica si el pago (junto con el adelanto acumulado) cubre la cobranza ideal.
+        Permite pagos de $0 si el adelanto acumulado cubre la semana completa.
+        """
+        monto_pago = float(pago.monto_pagado)
+
+        try:
+            # Si el monto total disponible cubre la cobranza ideal, no hay falta
+            if self.pago_cubre_cobranza_ideal(monto_pago):
+                return True
+            else:
+                # No cubre la cobranza ideal, registrar falta
+                falta = Falta(
+                    fecha=datetime.now(TIMEZONE).date(),
+                    prestamo_id=self.prestamo_id,
+                    monto_abonado=monto_pago
+                )
+                db.session.add(falta)
+                db.session.commit()
+                return False
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"No se pudo verificar el pago: {str(e)}")
+        
+    def calcular_monto_pagado(self):
+        """Obtiene el monto total pagado del préstamo desde el total desnormalizado."""
+        return self.total_pagado or 0
+
+    def registrar_pago_en_totales(self, monto_pagado, fecha_pago, numero_pagos=1):
+        """
+        Suma uno o varios pagos a los totales desnormalizados del préstamo.
+        La actualización se hace con expresiones SQL para que sea atómica dentro de la transacción del pago.
+        """
+        self.total_pagado = Prestamo.total_pagado + monto_pagado
+        self.numero_pagos = Prestamo.numero_pagos + numero_pagos
+        self.fecha_ultimo_pago = func.greatest(Prestamo.fecha_ultimo_pago, fecha_pago)
+
+    def recalcular_totales_pagos(self):
+        """Recalcula los totales desnormalizados del préstamo a partir de la tabla de pagos."""
+        from app.models.pago import Pago
+        total_pagado, numero_pagos, fecha_ultimo_pago = (
+            db.session.query(
+                func.coalesce(func.sum(Pago.monto_pagado), 0),
+                func.count(Pago.pago_id),
+                func.max(Pago.fecha_pago)
+            )
+            .filter(Pago.prestamo_id == self.prestamo_id)
+            .one()
+        )
+        self.total_pagado = total_pagado
+        self.numero_pagos = numero_pagos
+        self.fecha_ultimo_pago = fecha_ultimo_pago
+    
+    def calcular_monto_restante(self):
+        """Calcula el monto restante por pagar del cliente."""
+        monto_restante = self.monto_utilidad- self.calcular_monto_pagado()
+        return monto_restante
+
+    def calcular_adelanto_acumulado(self):
+        """
+        Calcula el monto de adelanto acumulado basándose en los pagos ya realizados.
+        Adelanto = Total pagado - (semana_activa * cobranza_ideal)
+        Si el resultado es positivo, hay adelanto acumulado.
+        """
+        cobranza_ideal = self.calcular_cobranza_ideal()
+        monto_pagado_total = float(self.calcular_monto_pagado())
+        monto_esperado_hasta_ahora = float(self.semana_activa) * float(cobranza_ideal)
+
+        adelanto = monto_pagado_total - monto_esperado_hasta_ahora
+        return max(0, adelanto)  # Si es negativo, no hay adelanto
+
+    # Propiedades hibridas: en un préstamo cargado usan los métodos de arriba y como expresión SQL dan el mismo
+    # cálculo por fila para los listados (hoja de cobranza), así la pantalla y el modelo no se separan
+    @hybrid_property
+    def cobranza_ideal(self):
+        return self.calcular_cobranza_ideal()
+
+    @cobranza_ideal.expression
+    def cobranza_ideal(cls):
+        from app.models.tipo_prestamo import TipoPrestamo
+
+        # Subconsulta por llave primaria, válida aunque la consulta ya haga join con tipos_prestamo
+        porcentaje_semanal = (
+            select(TipoPrestamo.porcentaje_semanal)
+            .where(TipoPrestamo.tipo_prestamo_id == cls.tipo_prestamo_id)
+            .correlate_except(TipoPrestamo)
+            .scalar_subquery()
+        )
+        return cls.monto_prestamo * porcentaje_semanal
+
+    @hybrid_property
+    def adelanto_acumulado(self):
+        return self.calcular_adelanto_acumulado()
+
+    @adelanto_acumulado.expression
+    def adelanto_acumulado(cls):
+        # Mismo criterio que calcular_adelanto_acumulado: total pagado - (semana_activa * cobranza_ideal), mínimo 0.
+        # La cobranza ideal va primero para que se multiplique completa por la semana, como en Python
+        return func.greatest(0, cls.total_pagado - cls.cobranza_ideal * cls.semana_activa)
+
@@ -0,0 +1,52 @@
+from ..database import db
+from datetime import datetime
+from app.constants import TIMEZONE
+
+class ReporteSemanalGrupo(db.Model):
+    """Foto de las métricas del reporte general de un grupo en una semana (lunes a domingo)."""
+    __tablename__ = 'reporte_semanal_grupo'
+
+    id = db.Column(db.Integer, primary_key=True)
+    grupo_id = db.Column(db.Integer, db.ForeignKey('grupos.grupo_id'), nullable=False)
+    semana_inicio = db.Column(db.Date, nullable=False)  # Lunes de la semana
+    cobranza_ideal = db.Column(db.Numeric, nullable=False, default=0)
+    cobranza_real = db.Column(db.Numeric, nullable=False, default=0)  # Pagos de la semana de préstamos no completados
+    cobranza_real_semanal = db.Column(db.Numeric, nullable=False, default=0)  # Pagos de la semana de todos los préstamos
+    prestamo_papel = db.Column(db.Numeric, nullable=False, default=0)
+    prestamo_real = db.Column(db.Numeric, nullable=False, default=0)
+    sobrante_grupo = db.Column(db.Numeric, nullable=False, default=0)
+    faltas = db.Column(db.Integer, nullable=False, default=0)
+    bono = db.Column(db.Numeric, nullable=False, default=0)
+    numero_de_creditos = db.Column(db.Integer, nullable=False, default=0)
+    prestamos_activos = db.Column(db.Integer, nullable=False, default=0)
+    fecha_actualizacion = db.Column(db.DateTime, default=lambda: datetime.now(TIMEZONE), nullable=False)
+
+    grupo = db.relationship('Grupo', backref=db.backref('reportes_semanales', lazy=True))
+
+    __table_args__ = (
+        db.UniqueConstraint('grupo_id', 'semana_inicio', name='uq_reporte_semanal_grupo_semana'),
+    )
+
+    def metricas(self):
+        """Métricas del grupo con el mismo formato que ReporteService.calcular_metricas_semanales."""
+        return {
+            'cobranza_ideal': float(self.cobranza_ideal),
+            'cobranza_real': float(self.cobranza_real),
+            'cobranza_real_semanal': float(self.cobranza_real_semanal),
+            'prestamo_papel': float(self.prestamo_papel),
+            'prestamo_real': float(self.prestamo_real),
+            'sobrante_grupo': float(self.sobrante_grupo),
+            'faltas': self.faltas,
+            'bono': float(self.bono),
+            'numero_de_creditos': self.numero_de_creditos,
+            'prestamos_activos': self.prestamos_activos
+        }
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'grupo_id': self.grupo_id,
+            'semana_inicio': self.semana_inicio.isoformat(),
+            **self.metricas(),
+            'fecha_actualizacion': self.fecha_actualizacion
+        }
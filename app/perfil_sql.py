@@ -0,0 +1,155 @@
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Listas de parámetros (IN expandidos, VALUES de inserts en bloque) se reducen a un solo marcador,
+# así una misma consulta con distinto número de valores conserva su huella
+_LISTA_PARAMETROS = re.compile(r'\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)')
+_LISTAS_REPETIDAS = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar_sentencia(statement):
+    sentencia = _LISTA_PARAMETROS.sub('(?)', statement)
+    sentencia = _LISTAS_REPETIDAS.sub('(?)', sentencia)
+    return _ESPACIOS.sub(' ', sentencia).strip()
+
+
+def huella_sentencia(statement):
+    """Huella corta de una sentencia: las que sólo difieren en sus valores comparten huella."""
+    return hashlib.sha1(normalizar_sentencia(statement).encode('utf-8')).hexdigest()[:10]
+
+
+class PerfilPeticion:
+    """Sentencias SQL ejecutadas durante una petición: número, tiempo total, la más lenta y las repetidas."""
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_total = 0.0
+        self.tiempo_mas_lenta = 0.0
+        self.mas_lenta = None
+        self.huellas = Counter()
+        self.ejemplos = {}
+
+    def registrar(self, statement, segundos):
+        self.consultas += 1
+        self.tiempo_total += segundos
+        if segundos >= self.tiempo_mas_lenta:
+            self.tiempo_mas_lenta = segundos
+            self.mas_lenta = statement
+        huella = huella_sentencia(statement)
+        self.huellas[huella] += 1
+        self.ejemplos.setdefault(huella, statement)
+
+    def repetidas(self):
+        """{huella: veces} de las sentencias que se ejecutaron más de una vez."""
+        return {huella: veces for huella, veces in self.huellas.most_common() if veces > 1}
+
+
+# El inicio se guarda en el contexto de ejecución de cada sentencia y no en la conexión: una sentencia que
+# falla no dispara after_cursor_execute, y su inicio no debe quedar en la conexión del pool
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._perfil_sql_inicio = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_perfil_sql_inicio', None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    perfil = g.get('perfil_sql') if has_app_context() else None
+    if perfil is not None:
+        perfil.registrar(statement, segundos)
+
+
+class PerfilSQL:
+    """
+    Perfil de las consultas SQL de cada petición, para encontrar endpoints N+1 y consultas lentas.
+
+    Escucha los eventos de ejecución de todos los engines y acumula, en flask.g, las sentencias de la
+    petición en curso. Al responder escribe una línea de log JSON con el resumen; fuera de producción
+    también agrega los encabezados X-DB-*. Se registra una advertencia cuando la petición excede el
+    presupuesto de consultas de su ruta, repite una misma sentencia o ejecuta una sentencia lenta.
+    """
+    _eventos_registrados = False
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['perfil_sql'] = self
+        if not app.config.get('SQL_PROFILING', True):
+            return
+        if not PerfilSQL._eventos_registrados:
+            event.listen(Engine, 'before_cursor_execute', _antes_de_ejecutar)
+            event.listen(Engine, 'after_cursor_execute', _despues_de_ejecutar)
+            PerfilSQL._eventos_registrados = True
+        app.before_request(self._iniciar)
+        app.after_request(self._terminar)
+
+    @staticmethod
+    def _iniciar():
+        g.perfil_sql = PerfilPeticion()
+
+    @staticmethod
+    def presupuesto(config, metodo, ruta):
+        """
+        Consultas permitidas para la ruta: SQL_QUERY_BUDGETS['<MÉTODO> <ruta>'], SQL_QUERY_BUDGETS['<ruta>']
+        o, si la ruta no tiene presupuesto propio, SQL_QUERY_BUDGET.
+        """
+        presupuestos = config.get('SQL_QUERY_BUDGETS', {})
+        return presupuestos.get(f'{metodo} {ruta}', presupuestos.get(ruta, config.get('SQL_QUERY_BUDGET')))
+
+    def _terminar(self, response):
+        perfil = g.pop('perfil_sql', None)
+        if perfil is None:
+            return response
+        config = current_app.config
+
+        # Las respuestas en streaming (exportaciones) consultan al generar el cuerpo: aquí sólo se ve lo previo
+        ruta = request.url_rule.rule if request.url_rule is not None else request.path
+        repetidas = perfil.repetidas()
+        registro = {
+            'evento': 'perfil_sql',
+            'metodo': request.method,
+            'ruta': ruta,
+            'status': response.status_code,
+            'consultas': perfil.consultas,
+            'tiempo_db_ms': round(perfil.tiempo_total * 1000, 2),
+            'mas_lenta_ms': round(perfil.tiempo_mas_lenta * 1000, 2),
+            'mas_lenta': normalizar_sentencia(perfil.mas_lenta)[:300] if perfil.mas_lenta else None,
+            'repetidas': repetidas
+        }
+
+        if config.get('SQL_PROFILING_HEADERS'):
+            response.headers['X-DB-Queries'] = str(perfil.consultas)
+            response.headers['X-DB-Time-Ms'] = str(registro['tiempo_db_ms'])
+            response.headers['X-DB-Slowest-Ms'] = str(registro['mas_lenta_ms'])
+            response.headers['X-DB-Duplicates'] = str(sum(veces - 1 for veces in repetidas.values()))
+
+        advertencias = []
+        presupuesto = self.presupuesto(config, request.method, ruta)
+        if presupuesto is not None and perfil.consultas > presupuesto:
+            advertencias.append(f"{perfil.consultas} consultas exceden el presupuesto de {presupuesto}")
+        limite_repeticiones = config.get('SQL_DUPLICATE_WARNING')
+        for huella, veces in repetidas.items():
+            if limite_repeticiones is not None and veces >= limite_repeticiones:
+                sentencia = normalizar_sentencia(perfil.ejemplos[huella])[:300]
+                advertencias.append(f"sentencia repetida {veces} veces (posible N+1): {sentencia}")
+        limite_lenta_ms = config.get('SQL_SLOW_QUERY_MS')
+        if limite_lenta_ms is not None and registro['mas_lenta_ms'] > limite_lenta_ms:
+            advertencias.append(f"sentencia de {registro['mas_lenta_ms']} ms")
+
+        if advertencias:
+            registro['advertencias'] = advertencias
+            current_app.logger.warning(json.dumps(registro, ensure_ascii=False))
+        else:
+            current_app.logger.info(json.dumps(registro, ensure_ascii=False))
+        return response
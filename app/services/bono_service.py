@@ -7,6 +7,20 @@ class BonoService:
     def __init__(self, bono_id=None):
         self.bono_id = bono_id
 
+    @staticmethod
+    def _refrescar_reportes():
+        """
+        Los rangos de bono aplican a todos los grupos: recalcula el bono de la foto semanal de la semana
+        actual e invalida la caché de reportes, sin recalcular el resto de las métricas.
+        """
+        # Importación local para no depender del orden de carga de app.services
+        from app.services.reporte_service import ReporteService
+        try:
+            ReporteService.recalcular_bonos_reporte_semanal()
+        except ValueError as e:
+            # El bono ya quedó guardado; la foto se corrige en el siguiente refresco de los grupos
+            app.logger.warning(f"No se pudieron recalcular los bonos del reporte semanal: {str(e)}")
+
     def create_bono(self, data):
         try:
             new_bono = Bono(
@@ -17,6 +31,7 @@ class BonoService:
             )
             db.session.add(new_bono)
             db.session.commit()
+            self._refrescar_reportes()
             return new_bono
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -48,6 +63,7 @@ class BonoService:
             bono.fallas = data.get('fallas', bono.fallas)
 
             db.session.commit()
+            self._refrescar_reportes()
             return bono
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -62,6 +78,7 @@ class BonoService:
         try:
             db.session.delete(bono)
             db.session.commit()
+            self._refrescar_reportes()
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -1,6 +1,7 @@
-from app.models import Falta, Prestamo
+from app.models import Falta, Prestamo, ClienteAval
 from app import db
 from flask import current_app as app
+from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 
 class FaltaService:
@@ -81,4 +82,83 @@ class FaltaService:
             return [falta.serialize() for falta in faltas]
         except SQLAlchemyError as e:
             app.logger.error(f"Error obteniendo faltas: {str(e)}")
-            raise ValueError("No se pudo obtener las faltas del préstamo.")
\ No newline at end of file
+            raise ValueError("No se pudo obtener las faltas del préstamo.")
+
+    @staticmethod
+    def _filtrar_por_fecha(query, fecha_inicio=None, fecha_fin=None):
+        """Aplica a la consulta la ventana de fechas (inclusiva) sobre Falta.fecha, si se indica."""
+        if fecha_inicio is not None:
+            query = query.filter(Falta.fecha >= fecha_inicio)
+        if fecha_fin is not None:
+            query = query.filter(Falta.fecha <= fecha_fin)
+        return query
+
+    @staticmethod
+    def subconsulta_faltas_por_prestamo(fecha_inicio=None, fecha_fin=None, prestamo_ids=None):
+        """
+        Subconsulta agrupada (prestamo_id, faltas) para hacer join en consultas de préstamos
+        sin cargar las faltas como objetos. Con `prestamo_ids` (lista o SELECT de prestamo_id)
+        sólo agrupa las faltas de esos préstamos en lugar de toda la tabla.
+        """
+        query = db.session.query(
+            Falta.prestamo_id.label('prestamo_id'),
+            func.count(Falta.id).label('faltas')
+        )
+        if prestamo_ids is not None:
+            query = query.filter(Falta.prestamo_id.in_(prestamo_ids))
+        query = FaltaService._filtrar_por_fecha(query, fecha_inicio, fecha_fin)
+        return query.group_by(Falta.prestamo_id).subquery()
+
+    @staticmethod
+    def conteo_faltas_de_prestamo():
+        """
+        Subconsulta escalar correlacionada con el número de faltas de cada préstamo de la consulta externa.
+        A diferencia de subconsulta_faltas_por_prestamo no agrupa toda la tabla: sólo lee las entradas
+        del índice (prestamo_id, fecha) de los préstamos que se devuelven.
+        """
+        return (
+            select(func.count(Falta.id))
+            .where(Falta.prestamo_id == Prestamo.prestamo_id)
+            .correlate(Prestamo)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def contar_faltas_por_prestamos(prestamo_ids, fecha_inicio=None, fecha_fin=None):
+        """
+        Cuenta las faltas de varios préstamos con un solo GROUP BY, opcionalmente dentro de una ventana de fechas.
+        Retorna {prestamo_id: numero_de_faltas}, con 0 para los préstamos sin faltas.
+        """
+        prestamo_ids = list(prestamo_ids)
+        if not prestamo_ids:
+            return {}
+        try:
+            query = db.session.query(Falta.prestamo_id, func.count(Falta.id))\
+                .filter(Falta.prestamo_id.in_(prestamo_ids))
+            query = FaltaService._filtrar_por_fecha(query, fecha_inicio, fecha_fin)
+            conteos = dict(query.group_by(Falta.prestamo_id).all())
+            return {prestamo_id: conteos.get(prestamo_id, 0) for prestamo_id in prestamo_ids}
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error contando faltas: {str(e)}")
+            raise ValueError("No se pudo obtener el conteo de faltas.")
+
+    @staticmethod
+    def contar_faltas_por_grupos(grupo_ids, fecha_inicio=None, fecha_fin=None):
+        """
+        Cuenta las faltas de los préstamos de los titulares de cada grupo con un solo GROUP BY,
+        opcionalmente dentro de una ventana de fechas. Retorna {grupo_id: numero_de_faltas}, con 0 para los grupos sin faltas.
+        """
+        grupo_ids = list(grupo_ids)
+        if not grupo_ids:
+            return {}
+        try:
+            query = db.session.query(ClienteAval.grupo_id, func.count(Falta.id))\
+                .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)\
+                .join(Falta, Falta.prestamo_id == Prestamo.prestamo_id)\
+                .filter(ClienteAval.grupo_id.in_(grupo_ids))
+            query = FaltaService._filtrar_por_fecha(query, fecha_inicio, fecha_fin)
+            conteos = dict(query.group_by(ClienteAval.grupo_id).all())
+            return {grupo_id: conteos.get(grupo_id, 0) for grupo_id in grupo_ids}
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error contando faltas por grupo: {str(e)}")
+            raise ValueError("No se pudo obtener el conteo de faltas por grupo.")
@@ -1,5 +1,7 @@
 from app.models import Grupo, Ruta, Usuario
 from app import db
+from app.extensions import report_cache
+from app.services.usuario_service import UsuarioService
 from flask import current_app as app
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -25,6 +27,8 @@ class GrupoService:
             new_grupo.validar_titular()
             db.session.add(new_grupo)
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return new_grupo
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -56,6 +60,8 @@ class GrupoService:
             grupo.ruta_id = data.get('ruta_id', grupo.ruta_id)
             grupo.validar_titular()
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return grupo
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -70,6 +76,8 @@ class GrupoService:
         try:
             db.session.delete(grupo)
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -1,13 +1,17 @@
 import datetime
 import pytz
-from app.models import Pago, Prestamo, Grupo, ClienteAval, TipoPrestamo
+from decimal import Decimal
+from app.models import Pago, Prestamo, Grupo, ClienteAval, TipoPrestamo, Falta
 from app import db
-from sqlalchemy.orm import joinedload
+from app.constants import TIMEZONE
+from sqlalchemy import func, insert, update, tuple_
+from sqlalchemy.orm import joinedload, aliased
 from flask import current_app as app
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
 from app.services.falta_service import FaltaService  # Importar el servicio de faltas
 from app.services.prestamo_service import PrestamoService  # Importar el servicio de préstamos
+from app.services.reporte_service import ReporteService
 class PagoService:
     def __init__(self, pago_id=None):
         self.pago_id = pago_id
@@ -23,32 +27,7 @@ class PagoService:
             #print(f'Length data: {len(data)}')
 
             if len(data) > 1:
-                lista_pagos_hechos=[]
-                for pago in data:
-                    # Validar prestamo al que se va a hacer el pago
-                    # Asegurarse de que el préstamo exista
-                    prestamo = Prestamo.query.get(pago['prestamo_id'])
-                    if not prestamo:
-                        raise ValueError("El préstamo especificado no existe.")
-                    # Crear el pago
-                    new_pago = Pago(
-                        fecha_pago=pago.get('fecha_pago', datetime.datetime.now(pytz.timezone('America/Mexico_City'))),
-                        monto_pagado=pago['monto_pagado'],
-                        prestamo_id=pago['prestamo_id']
-                    )
-                    db.session.add(new_pago)
-                    db.session.commit()
-
-                    # Verificar si el préstamo se ha completado
-                    prestamo.verificar_completado()
-                    
-                    if prestamo.verificar_pago_cubre_cobranza_ideal(new_pago):
-                        print("Pago cubre cobranza ideal")
-                        prestamo.actualizar_semana_activa(True)
-                    else:
-                        print(f'Falta registrada para el préstamo {prestamo.prestamo_id}')
-                    lista_pagos_hechos.append(new_pago)
-                return lista_pagos_hechos
+                return self.create_pagos_batch(data)
             # Asegurarse de que el préstamo exista
             else:
                 data = data[0]
@@ -63,6 +42,7 @@ class PagoService:
                     prestamo_id=data['prestamo_id']
                 )
                 db.session.add(new_pago)
+                prestamo.registrar_pago_en_totales(new_pago.monto_pagado, new_pago.fecha_pago)
                 db.session.commit()
 
                 # Verificar si el préstamo se ha completado
@@ -73,6 +53,9 @@ class PagoService:
                     prestamo.actualizar_semana_activa(True)
                 else:
                     print(f'Falta registrada para el préstamo {prestamo.prestamo_id}')
+
+                # Refrescar la foto semanal del grupo del préstamo
+                ReporteService.actualizar_reporte_semanal_por_prestamos([prestamo.prestamo_id], [new_pago.fecha_pago])
                 
                 return new_pago
         except (ValueError, SQLAlchemyError) as e:
@@ -80,6 +63,130 @@ class PagoService:
             app.logger.error(f"Error creando pago: {str(e)}")
             raise
 
+    # Método para registrar múltiples pagos en batch
+    def create_pagos_batch(self, pagos_data):
+        """
+        Registra múltiples pagos en una sola transacción.
+
+        Los préstamos referenciados se cargan (y bloquean) con su tipo de préstamo en una sola consulta,
+        la semana activa, el estado completado y los totales se avanzan en memoria, y los pagos y faltas
+        se insertan en bloque antes de un único commit.
+
+        Args:
+            pagos_data: Lista de diccionarios con datos de pagos
+
+        Returns:
+            dict: Resultado con pagos creados exitosamente y errores
+        """
+        created_pagos = []
+        errors = []
+
+        try:
+            # Cargar todos los préstamos referenciados en una sola consulta
+            prestamo_ids = {data.get('prestamo_id') for data in pagos_data if isinstance(data, dict)}
+            prestamos = {
+                prestamo.prestamo_id: prestamo
+                for prestamo in Prestamo.query.options(joinedload(Prestamo.tipo_prestamo, innerjoin=True))
+                .filter(Prestamo.prestamo_id.in_(prestamo_ids))
+                .with_for_update(of=Prestamo)
+                .all()
+            }
+
+            fecha_actual = datetime.datetime.now(pytz.timezone('America/Mexico_City'))
+            nuevos_pagos = []
+            nuevas_faltas = []
+            for index, data in enumerate(pagos_data):
+                try:
+                    # Validar campos requeridos
+                    required_fields = ['monto_pagado', 'prestamo_id']
+                    missing_fields = [field for field in required_fields if field not in data]
+                    if missing_fields:
+                        raise ValueError(f"Campos requeridos faltantes: {', '.join(missing_fields)}")
+
+                    # Asegurarse de que el préstamo exista
+                    prestamo = prestamos.get(data['prestamo_id'])
+                    if not prestamo:
+                        raise ValueError("El préstamo especificado no existe.")
+
+                    monto_pagado = Decimal(str(data['monto_pagado']))
+
+                    # Avanzar el préstamo en memoria en el mismo orden que un pago individual
+                    prestamo.total_pagado = prestamo.calcular_monto_pagado() + monto_pagado
+                    prestamo.numero_pagos += 1
+                    prestamo.completado = prestamo.calcular_completado()
+                    if prestamo.pago_cubre_cobranza_ideal(monto_pagado):
+                        prestamo.semana_activa += 1
+                    else:
+                        nuevas_faltas.append({
+                            'fecha': fecha_actual.date(),
+                            'prestamo_id': prestamo.prestamo_id,
+                            'monto_abonado': monto_pagado
+                        })
+
+                    nuevos_pagos.append({
+                        'fecha_pago': data.get('fecha_pago', fecha_actual),
+                        'monto_pagado': data['monto_pagado'],
+                        'prestamo_id': prestamo.prestamo_id
+                    })
+
+                except Exception as e:
+                    errors.append({
+                        'index': index,
+                        'data': data,
+                        'error': str(e)
+                    })
+                    app.logger.error(f"Error registrando pago en índice {index}: {str(e)}")
+
+            # Si hay errores, hacer rollback de toda la transacción
+            if errors:
+                db.session.rollback()
+                app.logger.warning(f"Batch payment creation rolled back. Errors: {len(errors)}/{len(pagos_data)}")
+                return {
+                    'success': False,
+                    'created': [],
+                    'errors': errors,
+                    'message': f'Batch payment creation failed. {len(errors)} error(s) out of {len(pagos_data)} pagos.'
+                }
+
+            # Insertar pagos y faltas en bloque; los préstamos se actualizan todos juntos en el commit
+            with db.session.no_autoflush:
+                created_pagos = db.session.scalars(
+                    insert(Pago).returning(Pago, sort_by_parameter_order=True),
+                    nuevos_pagos
+                ).all()
+                if nuevas_faltas:
+                    db.session.execute(insert(Falta), nuevas_faltas)
+
+                # Actualizar la fecha del último pago con las fechas ya normalizadas por la base de datos
+                for pago in created_pagos:
+                    prestamo = prestamos[pago.prestamo_id]
+                    if prestamo.fecha_ultimo_pago is None or pago.fecha_pago > prestamo.fecha_ultimo_pago:
+                        prestamo.fecha_ultimo_pago = pago.fecha_pago
+
+            # El commit expira los pagos: tomar sus IDs y fechas antes, para no leerlos de uno en uno después
+            pago_ids = [pago.pago_id for pago in created_pagos]
+            fechas_pagos = {pago.fecha_pago for pago in created_pagos}
+            db.session.commit()
+            app.logger.info(f"Successfully created {len(created_pagos)} pagos in batch")
+
+            # Refrescar una sola vez la foto semanal de los grupos afectados
+            ReporteService.actualizar_reporte_semanal_por_prestamos(prestamos.keys(), fechas_pagos)
+
+            # Recargar en una sola consulta los pagos creados, que quien los serialice encuentra expirados
+            created_pagos = Pago.query.filter(Pago.pago_id.in_(pago_ids)).order_by(Pago.pago_id).all()
+
+            return {
+                'success': True,
+                'created': created_pagos,
+                'errors': [],
+                'message': f'Successfully created {len(created_pagos)} pagos.'
+            }
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Database error in batch payment creation: {str(e)}")
+            raise ValueError("Error en la base de datos durante el registro batch de pagos.")
+
     def get_pago(self):
         if not self.pago_id:
             raise ValueError("Pago ID no proporcionado.")
@@ -99,11 +206,27 @@ class PagoService:
             return None
 
         try:
+            prestamo_id_anterior = pago.prestamo_id
+            fecha_pago_anterior = pago.fecha_pago
+
             # Only update monto_pagado and prestamo_id, fecha_pago remains the same or updated with current time
             pago.monto_pagado = data.get('monto_pagado', pago.monto_pagado)
             pago.prestamo_id = data.get('prestamo_id', pago.prestamo_id)
             pago.fecha_pago = datetime.datetime.now(pytz.timezone('America/Mexico_City'))  # Update to current date/time
+            db.session.flush()
+
+            # Recalcular los totales de los préstamos afectados en la misma transacción
+            for prestamo_id in {prestamo_id_anterior, pago.prestamo_id}:
+                prestamo = Prestamo.query.get(prestamo_id)
+                if not prestamo:
+                    raise ValueError(f"No se encontró el préstamo con ID: {prestamo_id}")
+                prestamo.recalcular_totales_pagos()
             db.session.commit()
+
+            # Refrescar la foto semanal de la semana original del pago y de la nueva fecha
+            ReporteService.actualizar_reporte_semanal_por_prestamos(
+                {prestamo_id_anterior, pago.prestamo_id}, [fecha_pago_anterior, pago.fecha_pago]
+            )
             return pago
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -116,23 +239,174 @@ class PagoService:
             raise ValueError(f"No se encontró el pago con ID: {self.pago_id}")
 
         try:
+            prestamo = Prestamo.query.get(pago.prestamo_id)
+            fecha_pago = pago.fecha_pago
             db.session.delete(pago)
+            db.session.flush()
+
+            # Recalcular los totales del préstamo en la misma transacción
+            prestamo.recalcular_totales_pagos()
             db.session.commit()
+
+            # Refrescar la foto semanal de la semana del pago eliminado
+            ReporteService.actualizar_reporte_semanal_por_prestamos([prestamo.prestamo_id], [fecha_pago])
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
             app.logger.error(f"Error eliminando pago: {str(e)}")
             raise ValueError("No se pudo eliminar el pago.")
 
-    def list_pagos(self):
+    @staticmethod
+    def _filtrar_pagos(query, desde=None, hasta=None, grupo_id=None, ruta_id=None, prestamo_id=None):
+        """
+        Aplica los filtros de listado y exportación a una consulta sobre Pago.
+        `desde` y `hasta` son fechas inclusivas en hora de Ciudad de México.
+        """
+        if desde is not None:
+            query = query.filter(Pago.fecha_pago >= TIMEZONE.localize(datetime.datetime.combine(desde, datetime.time.min)))
+        if hasta is not None:
+            query = query.filter(Pago.fecha_pago <= TIMEZONE.localize(datetime.datetime.combine(hasta, datetime.time.max)))
+        if prestamo_id is not None:
+            query = query.filter(Pago.prestamo_id == prestamo_id)
+        if grupo_id is not None or ruta_id is not None:
+            query = query.join(Prestamo, Prestamo.prestamo_id == Pago.prestamo_id)\
+                         .join(ClienteAval, ClienteAval.cliente_id == Prestamo.cliente_id)
+            if grupo_id is not None:
+                query = query.filter(ClienteAval.grupo_id == grupo_id)
+            if ruta_id is not None:
+                query = query.join(Grupo, Grupo.grupo_id == ClienteAval.grupo_id).filter(Grupo.ruta_id == ruta_id)
+        return query
+
+    @staticmethod
+    def _leer_cursor_pagos(cursor, por_fecha):
+        """
+        Interpreta el cursor de list_pagos: el último pago_id de la página anterior, o 'fecha_pago,pago_id'
+        (fecha ISO) cuando el listado va por fecha. Lanza ValueError si no tiene el formato esperado.
+        """
         try:
-            pagos = Pago.query.all()
-            pagos_list = [pago.serialize() for pago in pagos]
-            return pagos_list
+            if por_fecha:
+                fecha_pago, pago_id = cursor.split(',')
+                return datetime.datetime.fromisoformat(fecha_pago), int(pago_id)
+            return int(cursor)
+        except (TypeError, ValueError):
+            formato = 'fecha_pago,pago_id' if por_fecha else 'el último pago_id'
+            raise ValueError(f"El cursor no es válido: se esperaba {formato}.")
+
+    def list_pagos(self, per_page=100, cursor=None, compacto=False, orden=None, **filtros):
+        """
+        Lista pagos paginados por llave; la respuesta incluye `next_cursor` mientras queden pagos.
+        Por omisión van por pago_id ascendente y `cursor` es el último pago_id de la página anterior.
+        Con orden='fecha', o al filtrar por fecha (desde/hasta), van del más reciente al más antiguo por
+        (fecha_pago, pago_id) y `cursor` es 'fecha_pago,pago_id' del último pago: la llave compuesta mantiene
+        las páginas consistentes aunque varios pagos tengan la misma fecha.
+        Acepta los filtros de _filtrar_pagos (desde, hasta, grupo_id, ruta_id, prestamo_id).
+        """
+        if orden not in (None, 'pago_id', 'fecha'):
+            raise ValueError("El orden debe ser pago_id o fecha.")
+        por_fecha = orden == 'fecha' or (
+            orden is None and (filtros.get('desde') is not None or filtros.get('hasta') is not None)
+        )
+        try:
+            query = PagoService._filtrar_pagos(Pago.query, **filtros)
+            if por_fecha:
+                query = query.order_by(Pago.fecha_pago.desc(), Pago.pago_id.desc())
+                if cursor is not None:
+                    fecha_pago, pago_id = PagoService._leer_cursor_pagos(cursor, por_fecha)
+                    # Postgres acota la comparación de filas con el índice de fecha_pago
+                    query = query.filter(tuple_(Pago.fecha_pago, Pago.pago_id) < tuple_(fecha_pago, pago_id))
+            else:
+                query = query.order_by(Pago.pago_id)
+                if cursor is not None:
+                    query = query.filter(Pago.pago_id > PagoService._leer_cursor_pagos(cursor, por_fecha))
+            pagos = query.limit(per_page).all()
+
+            next_cursor = None
+            if len(pagos) == per_page:
+                ultimo = pagos[-1]
+                next_cursor = f"{ultimo.fecha_pago.isoformat()},{ultimo.pago_id}" if por_fecha else ultimo.pago_id
+            return {
+                'pagos': Pago.serialize_many(pagos, compacto=compacto),
+                'per_page': per_page,
+                'next_cursor': next_cursor
+            }
         except SQLAlchemyError as e:
             app.logger.error(f"Error listando pagos: {str(e)}")
             raise ValueError("No se pudo obtener la lista de pagos.")
 
+    @staticmethod
+    def exportar_pagos(**filtros):
+        """
+        Genera los pagos filtrados como diccionarios planos, uno por fila, leyendo de un cursor del
+        lado del servidor por bloques: la memoria usada no depende del número de pagos exportados.
+        La ruta consume el generador dentro de stream_with_context, así que la sesión (y su transacción,
+        que mantiene abierto el cursor) sigue viva hasta la última fila.
+        """
+        query = db.session.query(
+            Pago.pago_id,
+            Pago.fecha_pago,
+            Pago.monto_pagado,
+            Pago.prestamo_id
+        )
+        query = PagoService._filtrar_pagos(query, **filtros).order_by(Pago.pago_id)
+        # Sin stream_results psycopg2 trae todo el resultado al cliente aunque se lea por bloques
+        resultado = db.session.execute(query.statement.execution_options(stream_results=True, yield_per=1000))
+        try:
+            for fila in resultado:
+                yield {
+                    'pago_id': fila.pago_id,
+                    'fecha_pago': fila.fecha_pago.isoformat(),
+                    'monto_pagado': float(fila.monto_pagado),
+                    'prestamo_id': fila.prestamo_id
+                }
+        finally:
+            # Cierra el cursor del servidor aunque el cliente corte la descarga
+            resultado.close()
+
+    @staticmethod
+    def reconciliar_totales_prestamos():
+        """
+        Reconstruye total_pagado, numero_pagos y fecha_ultimo_pago de todos los préstamos a partir de la tabla de pagos.
+        Retorna el número de préstamos con pagos y el número de préstamos sin pagos actualizados.
+        """
+        try:
+            totales_por_prestamo = (
+                db.session.query(
+                    Pago.prestamo_id.label('prestamo_id'),
+                    func.sum(Pago.monto_pagado).label('total_pagado'),
+                    func.count(Pago.pago_id).label('numero_pagos'),
+                    func.max(Pago.fecha_pago).label('fecha_ultimo_pago')
+                )
+                .group_by(Pago.prestamo_id)
+                .subquery()
+            )
+
+            # Préstamos con pagos
+            con_pagos = db.session.execute(
+                update(Prestamo)
+                .where(Prestamo.prestamo_id == totales_por_prestamo.c.prestamo_id)
+                .values(
+                    total_pagado=totales_por_prestamo.c.total_pagado,
+                    numero_pagos=totales_por_prestamo.c.numero_pagos,
+                    fecha_ultimo_pago=totales_por_prestamo.c.fecha_ultimo_pago
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            # Préstamos sin pagos
+            sin_pagos = db.session.execute(
+                update(Prestamo)
+                .where(~Prestamo.pagos.any())
+                .values(total_pagado=0, numero_pagos=0, fecha_ultimo_pago=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            db.session.commit()
+            return con_pagos, sin_pagos
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Error reconciliando totales de préstamos: {str(e)}")
+            raise ValueError("No se pudo reconciliar los totales de los préstamos.")
+
     @staticmethod
     def get_grupos():
         try:
@@ -167,69 +441,95 @@ class PagoService:
 
     @staticmethod
     def get_prestamos_by_grupo_tabla(grupo_id, page=1, per_page=10):
+        """
+        Hoja de cobranza de un grupo: préstamos no completados de sus titulares con sólo las columnas que usa la pantalla.
+        Titular, aval y tipo de préstamo se obtienen por join, las faltas desde una subconsulta correlacionada,
+        el monto pagado desde el total desnormalizado del préstamo, la cobranza ideal y el adelanto acumulado
+        con las expresiones híbridas de Prestamo y el total de registros con una función de ventana,
+        de modo que la página completa se resuelve en una sola consulta además de la del grupo.
+        """
         try:
             grupo = Grupo.query.get(grupo_id)
             if not grupo:
                 raise ValueError(f"No se encontró el grupo con ID: {grupo_id}")
 
-            # Get all clients (titulares) in the group
-            titulares_en_grupo = ClienteAval.query.filter_by(grupo_id=grupo_id).all()
-            id_titulares = [titular.cliente_id for titular in titulares_en_grupo]
+            Titular = aliased(ClienteAval)
+            Aval = aliased(ClienteAval)
 
-            # Build the query to fetch prestamos for the group's clients,
-            # including any necessary joined relationships.
-            # Add an order_by clause to sort by fecha_inicio.
+            # Filtrar por grupo con join en lugar de una lista IN de titulares,
+            # ordenando por fecha de inicio (y prestamo_id para que la paginación sea estable)
             prestamos_cliente_query = (
-                Prestamo.query.options(
-                    joinedload(Prestamo.titular),
-                    joinedload(Prestamo.tipo_prestamo),
-                    joinedload(Prestamo.pagos)
+                db.session.query(
+                    Prestamo.prestamo_id,
+                    Prestamo.monto_prestamo,
+                    Prestamo.monto_prestamo_real,
+                    Prestamo.monto_utilidad,
+                    Prestamo.fecha_inicio,
+                    Prestamo.semana_activa,
+                    Prestamo.renovacion,
+                    Prestamo.completado,
+                    Prestamo.total_pagado,
+                    TipoPrestamo.nombre.label('tipo_prestamo_nombre'),
+                    TipoPrestamo.numero_semanas,
+                    Prestamo.cobranza_ideal.label('cobranza_ideal'),
+                    Prestamo.adelanto_acumulado.label('adelanto_acumulado'),
+                    Titular.nombre.label('titular_nombre'),
+                    Titular.apellido_paterno.label('titular_apellido_paterno'),
+                    Titular.apellido_materno.label('titular_apellido_materno'),
+                    Aval.nombre.label('aval_nombre'),
+                    Aval.apellido_paterno.label('aval_apellido_paterno'),
+                    Aval.apellido_materno.label('aval_apellido_materno'),
+                    FaltaService.conteo_faltas_de_prestamo().label('faltas'),
+                    func.count().over().label('total_items')
                 )
+                .join(Titular, Titular.cliente_id == Prestamo.cliente_id)
+                .join(TipoPrestamo, TipoPrestamo.tipo_prestamo_id == Prestamo.tipo_prestamo_id)
+                .outerjoin(Aval, Aval.cliente_id == Prestamo.aval_id)
                 .filter(
-                    Prestamo.cliente_id.in_(id_titulares),
+                    Titular.grupo_id == grupo_id,
                     Prestamo.completado == False
                 )
-                .order_by(Prestamo.fecha_inicio.asc())
+                .order_by(Prestamo.fecha_inicio.asc(), Prestamo.prestamo_id.asc())
             )
 
-            total_items = prestamos_cliente_query.count()
-            prestamos_cliente = prestamos_cliente_query.limit(per_page).offset((page - 1) * per_page).all()
+            filas = prestamos_cliente_query.limit(per_page).offset((page - 1) * per_page).all()
+            if filas:
+                total_items = filas[0].total_items
+            elif page > 1:
+                # Página fuera de rango: la ventana no trae filas, contar aparte
+                total_items = prestamos_cliente_query.order_by(None).count()
+            else:
+                total_items = 0
 
             prestamos_list = []
-            for prestamo in prestamos_cliente:
-                titular = prestamo.titular
-                tipo_prestamo = prestamo.tipo_prestamo
-                
+            for fila in filas:
                 # Calculate completed weeks (payments made)
-                semanas_completadas = prestamo.semana_activa
+                semanas_completadas = fila.semana_activa
                 
-                # Calculate the ideal weekly collection
-                cobranza_ideal_prestamo = prestamo.calcular_cobranza_ideal()
-                pagos_validos = len([pago for pago in prestamo.pagos if pago.monto_pagado >= cobranza_ideal_prestamo])
+                # Cobranza ideal y adelanto acumulado vienen de las expresiones híbridas de Prestamo
+                cobranza_ideal_prestamo = float(fila.cobranza_ideal)
+                monto_pagado = float(fila.total_pagado or 0)
                 
                 # Determine weeks due: initial number of weeks plus any recorded faltas minus weeks paid
-                semanas_que_debe = tipo_prestamo.numero_semanas
-                faltas_registradas = FaltaService.get_faltas_by_prestamo_id(prestamo.prestamo_id)
-                faltas = len(faltas_registradas)
-                semanas_que_debe = semanas_que_debe - semanas_completadas + faltas
+                semanas_que_debe = fila.numero_semanas - semanas_completadas + fila.faltas
 
                 prestamos_list.append({
                     'GRUPO': grupo.nombre_grupo,
-                    'CLIENTE': titular.getNombreCompleto(),
-                    'AVAL': prestamo.aval.getNombreCompleto(),
-                    'MONTO_PRÉSTAMO': float(prestamo.monto_prestamo),
-                    'MONTO_PRÉSTAMO_REAL': float(prestamo.monto_prestamo_real) if prestamo.monto_prestamo_real else float(prestamo.monto_prestamo),
-                    'FECHA_PRÉSTAMO': prestamo.fecha_inicio.strftime('%Y-%m-%d'),
+                    'CLIENTE': f"{fila.titular_nombre} {fila.titular_apellido_paterno} {fila.titular_apellido_materno}",
+                    'AVAL': f"{fila.aval_nombre} {fila.aval_apellido_paterno} {fila.aval_apellido_materno}",
+                    'MONTO_PRÉSTAMO': float(fila.monto_prestamo),
+                    'MONTO_PRÉSTAMO_REAL': float(fila.monto_prestamo_real) if fila.monto_prestamo_real else float(fila.monto_prestamo),
+                    'FECHA_PRÉSTAMO': fila.fecha_inicio.strftime('%Y-%m-%d'),
                     'COBRANZA_IDEAL_SEMANAL': cobranza_ideal_prestamo,
-                    'TIPO_PRESTAMO': prestamo.tipo_prestamo.nombre,
+                    'TIPO_PRESTAMO': fila.tipo_prestamo_nombre,
                     'NUMERO_PAGOS': semanas_completadas,
                     'SEMANAS_QUE_DEBE': semanas_que_debe,
-                    'PRESTAMO_ID': prestamo.prestamo_id,
-                    'MONTO_UTILIDAD': float(prestamo.monto_utilidad),
-                    'RENOVACION': prestamo.renovacion,
-                    'COMPLETADO': prestamo.completado,
-                    'MONTO_PAGADO': float(prestamo.calcular_monto_pagado()),
-                    'ADELANTO_ACUMULADO': float(prestamo.calcular_adelanto_acumulado())
+                    'PRESTAMO_ID': fila.prestamo_id,
+                    'MONTO_UTILIDAD': float(fila.monto_utilidad),
+                    'RENOVACION': fila.renovacion,
+                    'COMPLETADO': fila.completado,
+                    'MONTO_PAGADO': monto_pagado,
+                    'ADELANTO_ACUMULADO': float(fila.adelanto_acumulado)
                 })
 
             total_pages = (total_items + per_page - 1) // per_page
@@ -287,10 +587,10 @@ class PagoService:
 
 
     @staticmethod
-    def get_pagos_by_prestamo(prestamo_id):
+    def get_pagos_by_prestamo(prestamo_id, compacto=False):
         try:
             pagos = Pago.query.filter_by(prestamo_id=prestamo_id).all()
-            pagos_list = [pago.serialize() for pago in pagos]
+            pagos_list = Pago.serialize_many(pagos, compacto=compacto)
             return pagos_list
         except SQLAlchemyError as e:
             app.logger.error(f"Error obteniendo pagos: {str(e)}")
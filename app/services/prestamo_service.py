@@ -1,374 +1,447 @@
-from app.models import Prestamo, TipoPrestamo
-from app.models.cliente_aval import ClienteAval
-from app.services import usuario_service
-from app import db
-from flask import current_app as app
-from sqlalchemy.exc import SQLAlchemyError
-from app.constants import TIMEZONE
-from datetime import datetime
-from app.services.falta_service import FaltaService  # Importar el servicio de faltas
-
-class PrestamoService:
-    def __init__(self, prestamo_id=None):
-        self.prestamo_id = prestamo_id
-
-    @staticmethod
-    def __parse_fecha(fecha_string):
-        """
-        Parse date string in multiple formats and return datetime object.
-        Supports: YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY
-        """
-        if isinstance(fecha_string, datetime):
-            return fecha_string
-
-        if not isinstance(fecha_string, str):
-            return datetime.now(TIMEZONE)
-
-        # Try different date formats
-        date_formats = [
-            '%Y-%m-%d',      # ISO format: 2025-01-18
-            '%d/%m/%Y',      # DD/MM/YYYY: 19/06/2025
-            '%d-%m-%Y',      # DD-MM-YYYY: 19-06-2025
-        ]
-
-        for fmt in date_formats:
-            try:
-                # Parse the date and localize to timezone
-                parsed_date = datetime.strptime(fecha_string, fmt)
-                return TIMEZONE.localize(parsed_date) if parsed_date.tzinfo is None else parsed_date
-            except ValueError:
-                continue
-
-        # If no format worked, raise error
-        raise ValueError(f"Formato de fecha no válido: {fecha_string}. Use YYYY-MM-DD, DD/MM/YYYY o DD-MM-YYYY")
-
-    @staticmethod
-    def __check_override_monto_prestamo(monto_prestamo, user):
-        user_role = usuario_service.UsuarioService.get_user_rol_by_user_id(user.id)
-        if monto_prestamo<=5000:
-            return True
-        elif monto_prestamo>=5000 and user_role == 6:
-            return True
-        else:
-            return False
-            
-    @staticmethod
-    def calcular_utilidad(monto_prestamo, tipo_prestamo):
-        return (monto_prestamo * tipo_prestamo.interes) + monto_prestamo
-
-    @staticmethod
-    def aval_valido_para_prestamo(cliente_id, aval_id):
-        print(f"Validando aval {aval_id} para cliente {cliente_id}")
-        prestamo = Prestamo.query.filter_by(aval_id=aval_id).first()
-        if prestamo:
-            # El aval está ocupado
-            if prestamo.cliente_id == cliente_id:
-                # El aval está ocupado con el mismo cliente (es posible para renovación)
-                print(f"El aval está ocupado con el mismo cliente {cliente_id}")
-                return True
-            else:
-                # El aval está ocupado con otro cliente
-                print(f"El aval está ocupado con otro cliente {prestamo.cliente_id}")
-                return False
-        # El aval está libre
-        print(f"El aval está libre")
-        return True
-        
-    # Método para crear un nuevo préstamo
-    def create_prestamo(self, data, user):
-        monto_prestamo = data['monto_prestamo']
-        if self.__check_override_monto_prestamo(monto_prestamo, user):
-            try:
-                # Parse fecha_inicio with support for multiple formats
-                fecha_inicio_raw = data.get('fecha_inicio')
-                if fecha_inicio_raw:
-                    fecha_inicio = self.__parse_fecha(fecha_inicio_raw)
-                else:
-                    fecha_inicio = datetime.now(TIMEZONE)
-
-                # Obtén el tipo de préstamo para calcular el porcentaje semanal y el número de semanas
-                tipo_prestamo = TipoPrestamo.query.get(data['tipo_prestamo_id'])
-                if not tipo_prestamo:
-                    raise ValueError("Tipo de préstamo no encontrado.")
-
-                # Calcula la utilidad usando el método estático
-                monto_utilidad = self.calcular_utilidad(monto_prestamo, tipo_prestamo)
-
-                cliente_id = data['cliente_id']
-                aval_id = data['aval_id']
-
-                #if self.aval_valido_para_prestamo(cliente_id, aval_id):
-                # Crea el nuevo préstamo con el monto de utilidad calculado
-                new_prestamo = Prestamo(
-                    cliente_id=cliente_id,
-                    fecha_inicio=fecha_inicio,
-                    monto_prestamo=monto_prestamo,
-                    monto_utilidad=monto_utilidad,
-                    tipo_prestamo_id=data['tipo_prestamo_id'],
-                    aval_id=aval_id
-                )
-                db.session.add(new_prestamo)
-                db.session.commit()
-                return new_prestamo
-                #else:
-                #    raise ValueError("Aval no disponible para este préstamo.")
-            except SQLAlchemyError as e:
-                db.session.rollback()
-                app.logger.error(f"Error creando préstamo: {str(e)}")
-                raise ValueError("No se pudo crear el préstamo.")
-        else:
-            raise ValueError("No tienes permisos para agregar un préstamo mayor a 5000.")
-
-    # Método para crear múltiples préstamos en batch
-    def create_prestamos_batch(self, prestamos_data, user):
-        """
-        Crea múltiples préstamos en una sola transacción.
-
-        Args:
-            prestamos_data: Lista de diccionarios con datos de préstamos
-            user: Usuario que realiza la operación
-
-        Returns:
-            dict: Resultado con préstamos creados exitosamente y errores
-        """
-        created_prestamos = []
-        errors = []
-
-        try:
-            for index, data in enumerate(prestamos_data):
-                try:
-                    # Validar campos requeridos
-                    required_fields = ['cliente_id', 'monto_prestamo', 'tipo_prestamo_id', 'aval_id']
-                    missing_fields = [field for field in required_fields if field not in data]
-                    if missing_fields:
-                        raise ValueError(f"Campos requeridos faltantes: {', '.join(missing_fields)}")
-
-                    monto_prestamo = data['monto_prestamo']
-
-                    # Validar permisos de monto
-                    if not self.__check_override_monto_prestamo(monto_prestamo, user):
-                        raise ValueError("No tienes permisos para agregar un préstamo mayor a 5000.")
-
-                    # Parse fecha_inicio with support for multiple formats
-                    fecha_inicio_raw = data.get('fecha_inicio')
-                    if fecha_inicio_raw:
-                        fecha_inicio = self.__parse_fecha(fecha_inicio_raw)
-                    else:
-                        fecha_inicio = datetime.now(TIMEZONE)
-
-                    # Obtener tipo de préstamo
-                    tipo_prestamo = TipoPrestamo.query.get(data['tipo_prestamo_id'])
-                    if not tipo_prestamo:
-                        raise ValueError("Tipo de préstamo no encontrado.")
-
-                    # Calcular utilidad
-                    monto_utilidad = self.calcular_utilidad(monto_prestamo, tipo_prestamo)
-
-                    cliente_id = data['cliente_id']
-                    aval_id = data['aval_id']
-
-                    # Crear préstamo
-                    new_prestamo = Prestamo(
-                        cliente_id=cliente_id,
-                        fecha_inicio=fecha_inicio,
-                        monto_prestamo=monto_prestamo,
-                        monto_utilidad=monto_utilidad,
-                        tipo_prestamo_id=data['tipo_prestamo_id'],
-                        aval_id=aval_id
-                    )
-                    db.session.add(new_prestamo)
-                    db.session.flush()  # Obtener el ID sin hacer commit
-
-                    created_prestamos.append({
-                        'index': index,
-                        'prestamo_id': new_prestamo.prestamo_id,
-                        'cliente_id': cliente_id,
-                        'monto_prestamo': float(monto_prestamo)
-                    })
-
-                except Exception as e:
-                    errors.append({
-                        'index': index,
-                        'data': data,
-                        'error': str(e)
-                    })
-                    app.logger.error(f"Error creando préstamo en índice {index}: {str(e)}")
-
-            # Si hay errores, hacer rollback de toda la transacción
-            if errors:
-                db.session.rollback()
-                app.logger.warning(f"Batch creation rolled back. Errors: {len(errors)}/{len(prestamos_data)}")
-                return {
-                    'success': False,
-                    'created': [],
-                    'errors': errors,
-                    'message': f'Batch creation failed. {len(errors)} error(s) out of {len(prestamos_data)} prestamos.'
-                }
-
-            # Si todo está bien, hacer commit
-            db.session.commit()
-            app.logger.info(f"Successfully created {len(created_prestamos)} prestamos in batch")
-
-            return {
-                'success': True,
-                'created': created_prestamos,
-                'errors': [],
-                'message': f'Successfully created {len(created_prestamos)} prestamos.'
-            }
-
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            app.logger.error(f"Database error in batch creation: {str(e)}")
-            raise ValueError("Error en la base de datos durante la creación batch de préstamos.")
-        except Exception as e:
-            db.session.rollback()
-            app.logger.error(f"Unexpected error in batch creation: {str(e)}")
-            raise ValueError("Error inesperado durante la creación batch de préstamos.")
-                
-
-    def get_prestamo(self):
-        if not self.prestamo_id:
-            raise ValueError("Prestamo ID no proporcionado.")
-
-        try:
-            prestamo = Prestamo.query.get(self.prestamo_id)
-            if not prestamo:
-                raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
-            return prestamo
-        except SQLAlchemyError as e:
-            app.logger.error(f"Error obteniendo préstamo: {str(e)}")
-            raise ValueError("No se pudo obtener el préstamo.")
-
-    def update_prestamo(self, data):
-        prestamo = self.get_prestamo()
-        if not prestamo:
-            return None
-
-        try:
-            prestamo.cliente_id = data.get('cliente_id', prestamo.cliente_id)
-            prestamo.fecha_inicio = data.get('fecha_inicio', prestamo.fecha_inicio)
-            prestamo.monto_prestamo = data.get('monto_prestamo', prestamo.monto_prestamo)
-            prestamo.tipo_prestamo_id = data.get('tipo_prestamo_id', prestamo.tipo_prestamo_id)
-            prestamo.aval_id = data.get('aval_id', prestamo.aval_id)
-            prestamo.completado = data.get('completado', prestamo.completado)
-            prestamo.renovacion = data.get('renovacion', prestamo.renovacion)
-            prestamo.semana_activa = data.get('semana_activa', prestamo.semana_activa)
-            
-
-            db.session.commit()
-            return prestamo
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            app.logger.error(f"Error actualizando préstamo: {str(e)}")
-            raise ValueError("No se pudo actualizar el préstamo.")
-
-    def delete_prestamo(self):
-        prestamo = self.get_prestamo()
-        if not prestamo:
-            raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
-
-        try:
-            db.session.delete(prestamo)
-            db.session.commit()
-            return True
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            app.logger.error(f"Error eliminando préstamo: {str(e)}")
-            raise ValueError("No se pudo eliminar el préstamo.")
-
-    def list_prestamos(self, page=1, per_page=10):
-        try:
-            pagination = Prestamo.query.paginate(page=page, per_page=per_page, error_out=False)
-            lista_obj_prestamos = pagination.items
-            total_pages = pagination.pages
-            total_items = pagination.total
-
-            prestamos = []
-            for prestamo in lista_obj_prestamos:
-                tipo_prestamo = prestamo.tipo_prestamo
-
-                # Datos nuevos
-                semanas_completadas = prestamo.semana_activa
-
-                semanas_que_debe = tipo_prestamo.numero_semanas  # Inicialmente igual al número de semanas
-                faltas = 0
-
-                # Obtener las faltas registradas para el préstamo
-                faltas_registradas = FaltaService.get_faltas_by_prestamo_id(prestamo.prestamo_id)
-                faltas += len(faltas_registradas)
-
-                # Calcular semanas que debe sumando las faltas
-                semanas_que_debe = semanas_que_debe - semanas_completadas + faltas  # Número de semanas originales más faltas, menos pagos completados
-
-                prestamos.append({
-                    'prestamo_id': prestamo.prestamo_id,
-                    'cliente_id': prestamo.titular.cliente_id,
-                    'cliente_nombre': f"{prestamo.titular.nombre} {prestamo.titular.apellido_paterno} {prestamo.titular.apellido_materno}",
-                    'fecha_inicio': prestamo.fecha_inicio.strftime('%Y-%m-%d'),
-                    'monto_prestamo': float(prestamo.monto_prestamo),
-                    'monto_prestamo_real': float(prestamo.monto_prestamo_real) if prestamo.monto_prestamo_real else float(prestamo.monto_prestamo),
-                    'monto_utilidad': float(prestamo.monto_utilidad),
-                    'monto_pagado': float(prestamo.calcular_monto_pagado()),
-                    'tipo_prestamo_id': prestamo.tipo_prestamo_id,
-                    'tipo_prestamo_nombre': prestamo.tipo_prestamo.nombre,
-                    'aval_id': prestamo.aval.cliente_id,
-                    'aval_nombre': f"{prestamo.aval.nombre} {prestamo.aval.apellido_paterno} {prestamo.aval.apellido_materno}",
-                    'renovacion': prestamo.renovacion,
-                    'completado': prestamo.completado,
-                    'semana_activa': prestamo.semana_activa,
-                    'fecha_creacion': prestamo.fecha_inicio,
-                    'numero_pagos': semanas_completadas,
-                    'semanas_que_debe': semanas_que_debe,
-                })
-
-            return {
-                'prestamos': prestamos,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': total_pages,
-                'total_items': total_items
-            }
-        except SQLAlchemyError as e:
-            app.logger.error(f"Error listando préstamos: {str(e)}")
-            raise ValueError("No se pudo obtener la lista de préstamos.")
-        
-    def count_prestamos_activos(self, grupo_id):
-        # Dado un id de grupo, obtiene el conteo de préstamos activos (no completados) de ese grupo
-        try:
-            count_activos = Prestamo.query.join(ClienteAval, ClienteAval.cliente_id == Prestamo.cliente_id)\
-                                        .filter(ClienteAval.grupo_id == grupo_id, Prestamo.completado == False)\
-                                        .count()
-            return count_activos
-        except Exception as e:
-            app.logger.error(f"Error contando préstamos activos: {str(e)}")
-            raise ValueError("No se pudo obtener el conteo de préstamos activos.")
-
-        
-    def list_tipos_prestamo(self):
-        try:
-            tipos_prestamo = TipoPrestamo.query.all()
-            tipos = [tipos_prestamo.serialize() for tipos_prestamo in tipos_prestamo]
-            return tipos
-        except SQLAlchemyError as e:
-            app.logger.error(f"Error listando tipos de préstamo: {str(e)}")
-            raise ValueError("No se pudo obtener la lista de tipos de préstamo.")
-    
-    def get_prestamo_real_y_papel_by_grupo(self, grupo_id):
-        try:
-            clientes_grupo = ClienteAval.query.filter_by(grupo_id=grupo_id).all()
-            # Obtener todos los prestamos de cada cliente en el grupo y que esten activos
-            prestamo_real_grupo = 0
-            prestamo_papel_grupo = 0
-            for cliente in clientes_grupo:
-                #print(f'cliente en grupo {grupo_id}: {cliente.nombre} {cliente.apellido_paterno} {cliente.apellido_materno}')
-                prestamo_real_cliente = cliente.calcular_prestamo_real()
-                #print(f'prestamo real cliente: {prestamo_real_cliente}')
-                prestamo_real_grupo += prestamo_real_cliente
-                prestamo_papel_grupo += cliente.calcular_prestamo_papel()
-            return float(prestamo_real_grupo), float(prestamo_papel_grupo)
-            
-                
-        except SQLAlchemyError as e:
-            app.logger.error(f"Error obteniendo préstamos reales y papeles por grupo: {str(e)}")
-            raise ValueError("No se pudo obtener los préstamos reales por grupo.")
-    
+from app.models import Prestamo, TipoPrestamo
+from app.models.cliente_aval import ClienteAval
+from app import db
+from flask import current_app as app
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+from app.constants import TIMEZONE
+from datetime import datetime
+from app.services.falta_service import FaltaService  # Importar el servicio de faltas
+
+class PrestamoService:
+    def __init__(self, prestamo_id=None):
+        self.prestamo_id = prestamo_id
+
+    @staticmethod
+    def __parse_fecha(fecha_string):
+        """
+        Parse date string in multiple formats and return datetime object.
+        Supports: YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY
+        """
+        if isinstance(fecha_string, datetime):
+            return fecha_string
+
+        if not isinstance(fecha_string, str):
+            return datetime.now(TIMEZONE)
+
+        # Try different date formats
+        date_formats = [
+            '%Y-%m-%d',      # ISO format: 2025-01-18
+            '%d/%m/%Y',      # DD/MM/YYYY: 19/06/2025
+            '%d-%m-%Y',      # DD-MM-YYYY: 19-06-2025
+        ]
+
+        for fmt in date_formats:
+            try:
+                # Parse the date and localize to timezone
+                parsed_date = datetime.strptime(fecha_string, fmt)
+                return TIMEZONE.localize(parsed_date) if parsed_date.tzinfo is None else parsed_date
+            except ValueError:
+                continue
+
+        # If no format worked, raise error
+        raise ValueError(f"Formato de fecha no válido: {fecha_string}. Use YYYY-MM-DD, DD/MM/YYYY o DD-MM-YYYY")
+
+    @staticmethod
+    def __check_override_monto_prestamo(monto_prestamo, user):
+        # `user` es el usuario autenticado de la petición: su rol ya está cargado
+        user_role = user.rol_id
+        if monto_prestamo<=5000:
+            return True
+        elif monto_prestamo>=5000 and user_role == 6:
+            return True
+        else:
+            return False
+            
+    @staticmethod
+    def _refrescar_reportes(cliente_ids):
+        """Refresca la foto semanal (y la caché de reportes) de los grupos de los clientes dados."""
+        # Importación local: reporte_service importa este módulo
+        from app.services.reporte_service import ReporteService
+        ReporteService.actualizar_reporte_semanal_por_clientes(cliente_ids)
+
+    @staticmethod
+    def calcular_utilidad(monto_prestamo, tipo_prestamo):
+        return (monto_prestamo * tipo_prestamo.interes) + monto_prestamo
+
+    @staticmethod
+    def aval_valido_para_prestamo(cliente_id, aval_id):
+        print(f"Validando aval {aval_id} para cliente {cliente_id}")
+        prestamo = Prestamo.query.filter_by(aval_id=aval_id).first()
+        if prestamo:
+            # El aval está ocupado
+            if prestamo.cliente_id == cliente_id:
+                # El aval está ocupado con el mismo cliente (es posible para renovación)
+                print(f"El aval está ocupado con el mismo cliente {cliente_id}")
+                return True
+            else:
+                # El aval está ocupado con otro cliente
+                print(f"El aval está ocupado con otro cliente {prestamo.cliente_id}")
+                return False
+        # El aval está libre
+        print(f"El aval está libre")
+        return True
+        
+    # Método para crear un nuevo préstamo
+    def create_prestamo(self, data, user):
+        monto_prestamo = data['monto_prestamo']
+        if self.__check_override_monto_prestamo(monto_prestamo, user):
+            try:
+                # Parse fecha_inicio with support for multiple formats
+                fecha_inicio_raw = data.get('fecha_inicio')
+                if fecha_inicio_raw:
+                    fecha_inicio = self.__parse_fecha(fecha_inicio_raw)
+                else:
+                    fecha_inicio = datetime.now(TIMEZONE)
+
+                # Obtén el tipo de préstamo para calcular el porcentaje semanal y el número de semanas
+                tipo_prestamo = TipoPrestamo.query.get(data['tipo_prestamo_id'])
+                if not tipo_prestamo:
+                    raise ValueError("Tipo de préstamo no encontrado.")
+
+                # Calcula la utilidad usando el método estático
+                monto_utilidad = self.calcular_utilidad(monto_prestamo, tipo_prestamo)
+
+                cliente_id = data['cliente_id']
+                aval_id = data['aval_id']
+
+                #if self.aval_valido_para_prestamo(cliente_id, aval_id):
+                # Crea el nuevo préstamo con el monto de utilidad calculado
+                new_prestamo = Prestamo(
+                    cliente_id=cliente_id,
+                    fecha_inicio=fecha_inicio,
+                    monto_prestamo=monto_prestamo,
+                    monto_utilidad=monto_utilidad,
+                    tipo_prestamo_id=data['tipo_prestamo_id'],
+                    aval_id=aval_id
+                )
+                db.session.add(new_prestamo)
+                db.session.commit()
+                self._refrescar_reportes([cliente_id])
+                return new_prestamo
+                #else:
+                #    raise ValueError("Aval no disponible para este préstamo.")
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                app.logger.error(f"Error creando préstamo: {str(e)}")
+                raise ValueError("No se pudo crear el préstamo.")
+        else:
+            raise ValueError("No tienes permisos para agregar un préstamo mayor a 5000.")
+
+    # Método para crear múltiples préstamos en batch
+    def create_prestamos_batch(self, prestamos_data, user):
+        """
+        Crea múltiples préstamos en una sola transacción.
+
+        Args:
+            prestamos_data: Lista de diccionarios con datos de préstamos
+            user: Usuario que realiza la operación
+
+        Returns:
+            dict: Resultado con préstamos creados exitosamente y errores
+        """
+        created_prestamos = []
+        errors = []
+
+        try:
+            for index, data in enumerate(prestamos_data):
+                try:
+                    # Validar campos requeridos
+                    required_fields = ['cliente_id', 'monto_prestamo', 'tipo_prestamo_id', 'aval_id']
+                    missing_fields = [field for field in required_fields if field not in data]
+                    if missing_fields:
+                        raise ValueError(f"Campos requeridos faltantes: {', '.join(missing_fields)}")
+
+                    monto_prestamo = data['monto_prestamo']
+
+                    # Validar permisos de monto
+                    if not self.__check_override_monto_prestamo(monto_prestamo, user):
+                        raise ValueError("No tienes permisos para agregar un préstamo mayor a 5000.")
+
+                    # Parse fecha_inicio with support for multiple formats
+                    fecha_inicio_raw = data.get('fecha_inicio')
+                    if fecha_inicio_raw:
+                        fecha_inicio = self.__parse_fecha(fecha_inicio_raw)
+                    else:
+                        fecha_inicio = datetime.now(TIMEZONE)
+
+                    # Obtener tipo de préstamo
+                    tipo_prestamo = TipoPrestamo.query.get(data['tipo_prestamo_id'])
+                    if not tipo_prestamo:
+                        raise ValueError("Tipo de préstamo no encontrado.")
+
+                    # Calcular utilidad
+                    monto_utilidad = self.calcular_utilidad(monto_prestamo, tipo_prestamo)
+
+                    cliente_id = data['cliente_id']
+                    aval_id = data['aval_id']
+
+                    # Crear préstamo
+                    new_prestamo = Prestamo(
+                        cliente_id=cliente_id,
+                        fecha_inicio=fecha_inicio,
+                        monto_prestamo=monto_prestamo,
+                        monto_utilidad=monto_utilidad,
+                        tipo_prestamo_id=data['tipo_prestamo_id'],
+                        aval_id=aval_id
+                    )
+                    db.session.add(new_prestamo)
+                    db.session.flush()  # Obtener el ID sin hacer commit
+
+                    created_prestamos.append({
+                        'index': index,
+                        'prestamo_id': new_prestamo.prestamo_id,
+                        'cliente_id': cliente_id,
+                        'monto_prestamo': float(monto_prestamo)
+                    })
+
+                except Exception as e:
+                    errors.append({
+                        'index': index,
+                        'data': data,
+                        'error': str(e)
+                    })
+                    app.logger.error(f"Error creando préstamo en índice {index}: {str(e)}")
+
+            # Si hay errores, hacer rollback de toda la transacción
+            if errors:
+                db.session.rollback()
+                app.logger.warning(f"Batch creation rolled back. Errors: {len(errors)}/{len(prestamos_data)}")
+                return {
+                    'success': False,
+                    'created': [],
+                    'errors': errors,
+                    'message': f'Batch creation failed. {len(errors)} error(s) out of {len(prestamos_data)} prestamos.'
+                }
+
+            # Si todo está bien, hacer commit
+            db.session.commit()
+            app.logger.info(f"Successfully created {len(created_prestamos)} prestamos in batch")
+            self._refrescar_reportes([prestamo['cliente_id'] for prestamo in created_prestamos])
+
+            return {
+                'success': True,
+                'created': created_prestamos,
+                'errors': [],
+                'message': f'Successfully created {len(created_prestamos)} prestamos.'
+            }
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Database error in batch creation: {str(e)}")
+            raise ValueError("Error en la base de datos durante la creación batch de préstamos.")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Unexpected error in batch creation: {str(e)}")
+            raise ValueError("Error inesperado durante la creación batch de préstamos.")
+                
+
+    def get_prestamo(self):
+        if not self.prestamo_id:
+            raise ValueError("Prestamo ID no proporcionado.")
+
+        try:
+            prestamo = Prestamo.query.get(self.prestamo_id)
+            if not prestamo:
+                raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
+            return prestamo
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error obteniendo préstamo: {str(e)}")
+            raise ValueError("No se pudo obtener el préstamo.")
+
+    def update_prestamo(self, data):
+        prestamo = self.get_prestamo()
+        if not prestamo:
+            return None
+
+        try:
+            cliente_id_anterior = prestamo.cliente_id
+            prestamo.cliente_id = data.get('cliente_id', prestamo.cliente_id)
+            prestamo.fecha_inicio = data.get('fecha_inicio', prestamo.fecha_inicio)
+            prestamo.monto_prestamo = data.get('monto_prestamo', prestamo.monto_prestamo)
+            prestamo.tipo_prestamo_id = data.get('tipo_prestamo_id', prestamo.tipo_prestamo_id)
+            prestamo.aval_id = data.get('aval_id', prestamo.aval_id)
+            prestamo.completado = data.get('completado', prestamo.completado)
+            prestamo.renovacion = data.get('renovacion', prestamo.renovacion)
+            prestamo.semana_activa = data.get('semana_activa', prestamo.semana_activa)
+            
+
+            db.session.commit()
+            self._refrescar_reportes([cliente_id_anterior, prestamo.cliente_id])
+            return prestamo
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Error actualizando préstamo: {str(e)}")
+            raise ValueError("No se pudo actualizar el préstamo.")
+
+    def delete_prestamo(self):
+        prestamo = self.get_prestamo()
+        if not prestamo:
+            raise ValueError(f"No se encontró el préstamo con ID: {self.prestamo_id}")
+
+        try:
+            cliente_id = prestamo.cliente_id
+            db.session.delete(prestamo)
+            db.session.commit()
+            self._refrescar_reportes([cliente_id])
+            return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Error eliminando préstamo: {str(e)}")
+            raise ValueError("No se pudo eliminar el préstamo.")
+
+    def list_prestamos(self, page=None, per_page=10, cursor=None, con_total=False):
+        """
+        Lista préstamos ordenados por prestamo_id en una sola consulta: titular, aval y tipo de préstamo
+        se obtienen por join y el conteo de faltas desde una subconsulta agrupada por prestamo_id.
+        Si se recibe `cursor` (último prestamo_id de la página anterior) se pagina por llave (keyset)
+        en lugar de OFFSET, lo que mantiene constante el costo de las páginas profundas; `page` y `cursor`
+        no se pueden combinar. El total de préstamos (count(*) sobre toda la tabla) se calcula en la paginación
+        por número de página y en la primera página; en las páginas por cursor sólo si se pide con `con_total`.
+        """
+        if cursor is not None and page is not None:
+            raise ValueError("No se puede paginar con page y cursor al mismo tiempo.")
+        if page is None:
+            page = 1
+        try:
+            Titular = aliased(ClienteAval)
+            Aval = aliased(ClienteAval)
+
+            # IDs de la página: la subconsulta de faltas sólo agrupa las faltas de estos préstamos
+            pagina = db.session.query(Prestamo.prestamo_id).order_by(Prestamo.prestamo_id)
+            if cursor is not None:
+                pagina = pagina.filter(Prestamo.prestamo_id > cursor)
+            else:
+                pagina = pagina.offset((page - 1) * per_page)
+            pagina = pagina.limit(per_page).subquery()
+            faltas = FaltaService.subconsulta_faltas_por_prestamo(prestamo_ids=select(pagina.c.prestamo_id))
+
+            query = db.session.query(
+                Prestamo,
+                TipoPrestamo.nombre.label('tipo_prestamo_nombre'),
+                TipoPrestamo.numero_semanas,
+                Titular.nombre.label('titular_nombre'),
+                Titular.apellido_paterno.label('titular_apellido_paterno'),
+                Titular.apellido_materno.label('titular_apellido_materno'),
+                Aval.nombre.label('aval_nombre'),
+                Aval.apellido_paterno.label('aval_apellido_paterno'),
+                Aval.apellido_materno.label('aval_apellido_materno'),
+                func.coalesce(faltas.c.faltas, 0).label('faltas')
+            ).join(pagina, pagina.c.prestamo_id == Prestamo.prestamo_id)\
+             .join(TipoPrestamo, TipoPrestamo.tipo_prestamo_id == Prestamo.tipo_prestamo_id)\
+             .join(Titular, Titular.cliente_id == Prestamo.cliente_id)\
+             .outerjoin(Aval, Aval.cliente_id == Prestamo.aval_id)\
+             .outerjoin(faltas, faltas.c.prestamo_id == Prestamo.prestamo_id)
+
+            total_items = total_pages = None
+            if cursor is None or con_total:
+                total_items = db.session.query(func.count(Prestamo.prestamo_id)).scalar()
+                total_pages = (total_items + per_page - 1) // per_page if per_page > 0 else 0
+
+            filas = query.order_by(Prestamo.prestamo_id).all()
+
+            prestamos = []
+            for fila in filas:
+                prestamo = fila.Prestamo
+
+                # Datos nuevos
+                semanas_completadas = prestamo.semana_activa
+
+                # Calcular semanas que debe sumando las faltas
+                semanas_que_debe = fila.numero_semanas - semanas_completadas + fila.faltas  # Número de semanas originales más faltas, menos pagos completados
+
+                prestamos.append({
+                    'prestamo_id': prestamo.prestamo_id,
+                    'cliente_id': prestamo.cliente_id,
+                    'cliente_nombre': f"{fila.titular_nombre} {fila.titular_apellido_paterno} {fila.titular_apellido_materno}",
+                    'fecha_inicio': prestamo.fecha_inicio.strftime('%Y-%m-%d'),
+                    'monto_prestamo': float(prestamo.monto_prestamo),
+                    'monto_prestamo_real': float(prestamo.monto_prestamo_real) if prestamo.monto_prestamo_real else float(prestamo.monto_prestamo),
+                    'monto_utilidad': float(prestamo.monto_utilidad),
+                    'monto_pagado': float(prestamo.calcular_monto_pagado()),
+                    'tipo_prestamo_id': prestamo.tipo_prestamo_id,
+                    'tipo_prestamo_nombre': fila.tipo_prestamo_nombre,
+                    'aval_id': prestamo.aval_id,
+                    'aval_nombre': f"{fila.aval_nombre} {fila.aval_apellido_paterno} {fila.aval_apellido_materno}" if prestamo.aval_id else None,
+                    'renovacion': prestamo.renovacion,
+                    'completado': prestamo.completado,
+                    'semana_activa': prestamo.semana_activa,
+                    'fecha_creacion': prestamo.fecha_inicio,
+                    'numero_pagos': semanas_completadas,
+                    'semanas_que_debe': semanas_que_debe,
+                })
+
+            return {
+                'prestamos': prestamos,
+                'page': page if cursor is None else None,
+                'per_page': per_page,
+                'total_pages': total_pages,
+                'total_items': total_items,
+                'next_cursor': prestamos[-1]['prestamo_id'] if len(prestamos) == per_page else None
+            }
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error listando préstamos: {str(e)}")
+            raise ValueError("No se pudo obtener la lista de préstamos.")
+        
+    def count_prestamos_activos(self, grupo_id):
+        # Dado un id de grupo, obtiene el conteo de préstamos activos (no completados) de ese grupo
+        try:
+            count_activos = Prestamo.query.join(ClienteAval, ClienteAval.cliente_id == Prestamo.cliente_id)\
+                                        .filter(ClienteAval.grupo_id == grupo_id, Prestamo.completado == False)\
+                                        .count()
+            return count_activos
+        except Exception as e:
+            app.logger.error(f"Error contando préstamos activos: {str(e)}")
+            raise ValueError("No se pudo obtener el conteo de préstamos activos.")
+
+        
+    def list_tipos_prestamo(self):
+        try:
+            tipos_prestamo = TipoPrestamo.query.all()
+            tipos = [tipos_prestamo.serialize() for tipos_prestamo in tipos_prestamo]
+            return tipos
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error listando tipos de préstamo: {str(e)}")
+            raise ValueError("No se pudo obtener la lista de tipos de préstamo.")
+    
+    def get_prestamo_real_y_papel_by_grupo(self, grupo_id):
+        return PrestamoService.get_prestamo_real_y_papel_by_grupos([grupo_id])[grupo_id]
+
+    @staticmethod
+    def prestamo_real_y_papel_por_grupo_query(grupo_ids):
+        """
+        Subconsulta (grupo_id, prestamo_papel, prestamo_real) para los grupos dados,
+        sumando por grupo los montos del préstamo actual de cada titular (ClienteAval.prestamos_actuales_query).
+        """
+        prestamos_actuales = ClienteAval.prestamos_actuales_query(grupo_ids)
+        return (
+            db.session.query(
+                prestamos_actuales.c.grupo_id.label('grupo_id'),
+                func.sum(prestamos_actuales.c.prestamo_papel).label('prestamo_papel'),
+                func.sum(prestamos_actuales.c.prestamo_real).label('prestamo_real')
+            )
+            .group_by(prestamos_actuales.c.grupo_id)
+            .subquery()
+        )
+
+    @staticmethod
+    def get_prestamo_real_y_papel_by_grupos(grupo_ids):
+        """
+        Calcula préstamo real y préstamo papel de varios grupos en una sola consulta.
+        Retorna {grupo_id: (prestamo_real, prestamo_papel)}, con ceros para los grupos sin préstamos.
+        """
+        grupo_ids = list(grupo_ids)
+        if not grupo_ids:
+            return {}
+        try:
+            por_grupo = PrestamoService.prestamo_real_y_papel_por_grupo_query(grupo_ids)
+            filas = db.session.query(por_grupo).all()
+            resultados = {grupo_id: (0.0, 0.0) for grupo_id in grupo_ids}
+            for fila in filas:
+                resultados[fila.grupo_id] = (float(fila.prestamo_real or 0), float(fila.prestamo_papel or 0))
+            return resultados
+        except SQLAlchemyError as e:
+            app.logger.error(f"Error obteniendo préstamos reales y papeles por grupo: {str(e)}")
+            raise ValueError("No se pudo obtener los préstamos reales por grupo.")
+    
@@ -1,6 +1,10 @@
-from sqlalchemy import func, case, and_, text
+from bisect import bisect_right
+from sqlalchemy import func, case, and_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import aliased
 from app.models import (
+    ReporteSemanalGrupo,
     Grupo,
     Ruta,
     Usuario,
@@ -11,18 +15,133 @@ from app.models import (
     Rol
 )
 from app import db
+from app.extensions import report_cache
+from flask import current_app as app
 from flask_jwt_extended import get_jwt_identity
 from app.models.bono import Bono
-from app.models.falta import Falta
+from app.services.falta_service import FaltaService
 from app.services.usuario_service import UsuarioService
+from app.services.prestamo_service import PrestamoService
+from app.services.service_helpers import ventana_semana, es_semana_cerrada
 from datetime import datetime, timedelta
-import pytz
 from app.constants import TIMEZONE
-from app.services import PrestamoService
+
+class TablaBonos:
+    """
+    Tabla de bonos cargada una sola vez y ordenada por entrega_min.
+    Si los rangos de entrega no se traslapan basta una búsqueda binaria para encontrar el único bono
+    cuyo rango puede contener la cobranza del grupo. BonoService no impide rangos traslapados (por
+    ejemplo, dos bonos del mismo rango con distintas fallas); en ese caso se recorren los bonos en el
+    orden de la consulta y se toma el primero que aplique, como lo hacía regla_bono bono por bono.
+    """
+    def __init__(self, bonos):
+        self.bonos_en_orden = list(bonos)
+        self.bonos = sorted(self.bonos_en_orden, key=lambda bono: bono.entrega_min)
+        self.entregas_min = [bono.entrega_min for bono in self.bonos]
+        self.traslapados = any(
+            siguiente.entrega_min <= anterior.entrega_max
+            for anterior, siguiente in zip(self.bonos, self.bonos[1:])
+        )
+
+    def buscar(self, cobranza_real_grupo, faltas_de_grupo):
+        if self.traslapados:
+            return next(
+                (bono for bono in self.bonos_en_orden if bono.regla_bono(cobranza_real_grupo, faltas_de_grupo)),
+                None
+            )
+        indice = bisect_right(self.entregas_min, cobranza_real_grupo) - 1
+        if indice < 0:
+            return None
+        bono = self.bonos[indice]
+        return bono if bono.regla_bono(cobranza_real_grupo, faltas_de_grupo) else None
+
+
+class TotalesReporte:
+    """
+    Acumula las métricas semanales de varios grupos para los totales del reporte general.
+    Permite sumar grupo por grupo (por ejemplo, mientras se exporta el reporte por lotes).
+    """
+    def __init__(self):
+        self.total_cobranza_ideal = 0
+        self.total_cobranza_real = 0
+        self.total_numero_de_creditos = 0
+        self.total_prestamos_activos = 0
+        self.total_bono = 0
+        self.total_sobrante_logico = 0
+        self.total_prestamo_real = 0
+        self.total_prestamo_papel = 0
+
+    def agregar(self, metricas):
+        bono_grupo = metricas['bono']
+        self.total_cobranza_ideal += metricas['cobranza_ideal']
+        # La cobranza real de los totales incluye los pagos de todos los préstamos de la semana
+        self.total_cobranza_real += metricas['cobranza_real_semanal']
+        self.total_numero_de_creditos += metricas['numero_de_creditos']
+        self.total_prestamos_activos += metricas['prestamos_activos']
+        self.total_bono += bono_grupo
+        self.total_sobrante_logico += float(metricas['sobrante_grupo'] - bono_grupo)
+        self.total_prestamo_papel += metricas['prestamo_papel']
+        self.total_prestamo_real += metricas['prestamo_real']
+
+    def resultado(self):
+        total_cobranza_ideal = float(self.total_cobranza_ideal)
+        total_cobranza_real = float(self.total_cobranza_real)
+
+        # Morosidad y métricas relacionadas
+        morosidad_monto = float(total_cobranza_ideal - total_cobranza_real)
+        morosidad_porcentaje = round((morosidad_monto / total_cobranza_ideal) * 100, 2) if total_cobranza_ideal != 0 else 0
+        porcentaje_prestamo = round((self.total_prestamo_real / total_cobranza_real) * 100, 2) if total_cobranza_real != 0 else 0
+        sobrante = total_cobranza_real - self.total_prestamo_papel - self.total_bono
+
+        # Construir el resultado
+        return {
+            'total_cobranza_ideal': total_cobranza_ideal,
+            'total_cobranza_real': total_cobranza_real,
+            'total_prestamo_real': self.total_prestamo_real,
+            'total_prestamo_papel': self.total_prestamo_papel,
+            'total_numero_de_creditos': self.total_numero_de_creditos,
+            'total_prestamos_activos': self.total_prestamos_activos,
+            'morosidad_monto': morosidad_monto,
+            'morosidad_porcentaje': morosidad_porcentaje,
+            'porcentaje_prestamo': porcentaje_prestamo,
+            'sobrante': sobrante,
+            'total_sobrante_logico': self.total_sobrante_logico,
+            'total_bono': self.total_bono
+        }
+
+    def fila_total(self):
+        """
+        Los totales con las columnas de una fila del reporte general. Los montos son los mismos de
+        /reporte/general/totales; los porcentajes se expresan como fracción, igual que en las filas.
+        """
+        totales = self.resultado()
+        cobranza_ideal = totales['total_cobranza_ideal']
+        cobranza_real = totales['total_cobranza_real']
+        return {
+            'grupo_id': None,
+            'gerente': '',
+            'supervisor': '',
+            'titular': '',
+            'ruta': '',
+            'grupo': 'TOTAL',
+            'cobranza_ideal': cobranza_ideal,
+            'cobranza_real': cobranza_real,
+            'prestamo_papel': totales['total_prestamo_papel'],
+            'prestamo_real': totales['total_prestamo_real'],
+            'morosidad_monto': totales['morosidad_monto'],
+            'morosidad_porcentaje': totales['morosidad_monto'] / cobranza_ideal if cobranza_ideal != 0 else None,
+            'porcentaje_prestamo': totales['total_prestamo_real'] / cobranza_real if cobranza_real != 0 else None,
+            'sobrante': totales['sobrante'],
+            'sobrante_logico': totales['total_sobrante_logico'],
+            'bono': totales['total_bono'],
+            'numero_de_creditos': totales['total_numero_de_creditos'],
+            'prestamos_activos': totales['total_prestamos_activos']
+        }
+
 
 class ReporteService:
     @staticmethod
-    def obtener_reporte(page=1, per_page=10):
+    def obtener_reporte(page=1, per_page=10, semana=None, en_vivo=False):
         # Configuración inicial y obtención del usuario
         user = UsuarioService.get_user_from_jwt()
         user_role_id = user.rol_id
@@ -30,93 +149,39 @@ class ReporteService:
         if user_role_id == 1:
             return []
 
-        # Definir filtros según rol de usuario
-        filters = []
-        if user_role_id == 4:
-            filters.append(Ruta.usuario_id_gerente == user.id)
-        elif user_role_id == 3:
-            filters.append(Ruta.usuario_id_supervisor == user.id)
-        elif user_role_id == 2:
-            filters.append(Grupo.usuario_id_titular == user.id)
+        alcance = ReporteService.alcance_por_usuario(user)
 
-        # Definición de alias para usuarios
-        usuarios_gerente = aliased(Usuario)
-        usuarios_supervisor = aliased(Usuario)
-        usuarios_titular = aliased(Usuario)
+        # Semana del reporte (la actual si no se indica)
+        semana_inicio = ventana_semana(semana)[2]
 
-        
-        # Configuración de fechas para la semana actual
-        mexico_city_tz = pytz.timezone('America/Mexico_City')
-        current_date = datetime.now(mexico_city_tz).date()
-        start_of_week = current_date - timedelta(days=current_date.weekday())
-        start_of_week_dt = datetime.combine(start_of_week, datetime.min.time())
-        start_of_week_dt = mexico_city_tz.localize(start_of_week_dt)
-        start_of_week = start_of_week_dt
-        
-        end_of_week = start_of_week + timedelta(days=6)
-        end_of_week_dt = datetime.combine(end_of_week, datetime.max.time())
-        end_of_week_dt = mexico_city_tz.localize(end_of_week_dt)
-        end_of_week = end_of_week_dt
-        
-
-        # Subconsulta para pagos por grupo (cobranza real) - sólo préstamos activos
-        pagos_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.sum(Pago.monto_pagado).label('total_pagos')
-            )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .join(Pago, Pago.prestamo_id == Prestamo.prestamo_id)
-            .filter(
-                Pago.fecha_pago >= start_of_week_dt,
-                Pago.fecha_pago <= end_of_week_dt,
-                Prestamo.completado == False
-            )
-            .group_by(Grupo.grupo_id)
-            .subquery()
+        if en_vivo:
+            return ReporteService._calcular_reporte(user, page, per_page, semana_inicio, en_vivo=True)
+        return report_cache.get_or_set(
+            alcance,
+            ['general', semana_inicio.isoformat(), page, per_page],
+            lambda: ReporteService._calcular_reporte(user, page, per_page, semana_inicio)
         )
 
-        # Subconsulta para cobranza ideal por grupo - sólo préstamos activos
-        cobranza_ideal_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.sum(Prestamo.monto_prestamo * TipoPrestamo.porcentaje_semanal).label('cobranza_ideal')
-            )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .join(TipoPrestamo, Prestamo.tipo_prestamo_id == TipoPrestamo.tipo_prestamo_id)
-            .filter(Prestamo.completado == False)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
-
-        # Subconsulta para número de créditos por grupo
-        numero_de_creditos_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.count(Prestamo.prestamo_id).label('numero_de_creditos')
-            )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
+    @staticmethod
+    def alcance_por_usuario(user):
+        """Alcance con el que se guardan en caché los reportes del usuario (ver ReportCache)."""
+        if user.rol_id == 4:  # Gerente
+            return f'gerente:{user.id}'
+        if user.rol_id == 3:  # Supervisor
+            return f'supervisor:{user.id}'
+        if user.rol_id == 2:  # Titular
+            return f'titular:{user.id}'
+        return 'todos'
 
-        # Subconsulta para número de préstamos activos por grupo
-        numero_de_prestamos_activos_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.count(Prestamo.prestamo_id).label('numero_de_prestamos_activos')
-            )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .filter(Prestamo.completado == False)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
+    @staticmethod
+    def _consulta_grupos_reporte(user):
+        """Consulta de los datos descriptivos (gerente, supervisor, titular, ruta, grupo) de los grupos visibles."""
+        # Definición de alias para usuarios
+        usuarios_gerente = aliased(Usuario)
+        usuarios_supervisor = aliased(Usuario)
+        usuarios_titular = aliased(Usuario)
 
-        # Construcción de la consulta principal
+        # Construcción de la consulta principal: datos descriptivos de cada grupo
         query = db.session.query(
             Grupo.grupo_id,
             Ruta.ruta_id,
@@ -124,11 +189,7 @@ class ReporteService:
             func.coalesce(func.concat(usuarios_supervisor.nombre, ' ', usuarios_supervisor.apellido_paterno), '').label('supervisor'),
             func.coalesce(func.concat(usuarios_titular.nombre, ' ', usuarios_titular.apellido_paterno), '').label('titular'),
             Ruta.nombre_ruta.label('ruta'),
-            Grupo.nombre_grupo.label('grupo'),
-            func.coalesce(cobranza_ideal_por_grupo.c.cobranza_ideal, 0).label('cobranza_ideal'),
-            func.coalesce(pagos_por_grupo.c.total_pagos, 0).label('cobranza_real'),
-            func.coalesce(numero_de_creditos_por_grupo.c.numero_de_creditos, 0).label('numero_de_creditos'),
-            func.coalesce(numero_de_prestamos_activos_por_grupo.c.numero_de_prestamos_activos, 0).label('prestamos_activos')
+            Grupo.nombre_grupo.label('grupo')
         ).select_from(Grupo)
 
         # Joins necesarios
@@ -136,429 +197,500 @@ class ReporteService:
         query = query.outerjoin(usuarios_supervisor, Ruta.usuario_id_supervisor == usuarios_supervisor.id)
         query = query.outerjoin(usuarios_gerente, Ruta.usuario_id_gerente == usuarios_gerente.id)
         query = query.outerjoin(usuarios_titular, Grupo.usuario_id_titular == usuarios_titular.id)
-        query = query.outerjoin(pagos_por_grupo, pagos_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query = query.outerjoin(cobranza_ideal_por_grupo, cobranza_ideal_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query = query.outerjoin(numero_de_creditos_por_grupo, numero_de_creditos_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query = query.outerjoin(numero_de_prestamos_activos_por_grupo, numero_de_prestamos_activos_por_grupo.c.grupo_id == Grupo.grupo_id)
 
-        # Aplicar filtros si existen
-        if filters:
-            query = query.filter(*filters)
+        # Limitar a los grupos visibles para el usuario
+        return query.filter(Grupo.grupo_id.in_(UsuarioService.get_grupos_visibles(user)))
 
-        # Agrupamiento de datos
-        query = query.group_by(
-            Grupo.grupo_id,
-            Ruta.ruta_id,
-            usuarios_gerente.nombre,
-            usuarios_gerente.apellido_paterno,
-            usuarios_supervisor.nombre,
-            usuarios_supervisor.apellido_paterno,
-            usuarios_titular.nombre,
-            usuarios_titular.apellido_paterno,
-            Ruta.nombre_ruta,
-            Grupo.nombre_grupo,
-            pagos_por_grupo.c.total_pagos,
-            cobranza_ideal_por_grupo.c.cobranza_ideal,
-            numero_de_creditos_por_grupo.c.numero_de_creditos,
-            numero_de_prestamos_activos_por_grupo.c.numero_de_prestamos_activos
-        )
+    @staticmethod
+    def _fila_reporte(row, metricas):
+        """Fila del reporte general de un grupo a partir de sus datos descriptivos y sus métricas semanales."""
+        prestamo_real = metricas['prestamo_real']
+        prestamo_papel = metricas['prestamo_papel']
+        bono = metricas['bono']
+
+        # Cálculos adicionales
+        cobranza_ideal = metricas['cobranza_ideal']
+        cobranza_real = metricas['cobranza_real']
+
+        morosidad_monto = cobranza_ideal - cobranza_real if cobranza_ideal else 0
+        morosidad_porcentaje = (morosidad_monto / cobranza_ideal) if cobranza_ideal != 0 else None
+        porcentaje_prestamo = (prestamo_real / cobranza_real) if cobranza_real != 0 else None
+        sobrante = cobranza_real - prestamo_papel - bono
+        sobrante_logico = float(metricas['sobrante_grupo'] - bono)
+
+        return {
+            'grupo_id': row.grupo_id,
+            'gerente': row.gerente,
+            'supervisor': row.supervisor,
+            'titular': row.titular,
+            'ruta': row.ruta,
+            'grupo': row.grupo,
+            'cobranza_ideal': cobranza_ideal,
+            'cobranza_real': cobranza_real,
+            'prestamo_papel': prestamo_papel,
+            'prestamo_real': prestamo_real,
+            'morosidad_monto': morosidad_monto,
+            'morosidad_porcentaje': morosidad_porcentaje,
+            'porcentaje_prestamo': porcentaje_prestamo,
+            'sobrante': sobrante,
+            'sobrante_logico': sobrante_logico,
+            'bono': bono,
+            'numero_de_creditos': metricas['numero_de_creditos'],
+            'prestamos_activos': metricas['prestamos_activos']
+        }
+
+    @staticmethod
+    def _calcular_reporte(user, page, per_page, semana_inicio, en_vivo=False):
+        query = ReporteService._consulta_grupos_reporte(user)
 
         # Obtener el total de resultados antes de la paginación
         total_items = query.count()
 
         # Agregar paginación
-        paginated_query = query.limit(per_page).offset((page - 1) * per_page)
+        paginated_query = query.order_by(Grupo.grupo_id).limit(per_page).offset((page - 1) * per_page)
 
         # Procesar los resultados de la consulta paginada
         results = paginated_query.all()
-        report_data = []
-        
-        for row in results:
-            try:
-                # Obtener los valores de prestamo_real y prestamo_papel desde PrestamoService
-                prestamo_real, prestamo_papel = PrestamoService().get_prestamo_real_y_papel_by_grupo(row.grupo_id)
-
-                # Obtener el bono para cada grupo (si aplica)
-                bono_data = ReporteService.calcular_bono_por_grupo(row.grupo_id)
-                bono = bono_data['bono_aplicado']['monto'] if bono_data['bono_aplicado'] else 0
-
-                # Cálculos adicionales
-                cobranza_ideal = float(row.cobranza_ideal or 0)
-                cobranza_real = float(row.cobranza_real or 0)
-
-                morosidad_monto = cobranza_ideal - cobranza_real if cobranza_ideal else 0
-                morosidad_porcentaje = (morosidad_monto / cobranza_ideal) if cobranza_ideal != 0 else None
-                porcentaje_prestamo = (prestamo_real / cobranza_real) if cobranza_real != 0 else None
-                sobrante = cobranza_real - prestamo_papel - bono
-                
-                # Add error handling for sobrante_logico calculation
-                try:
-                    sobrante_grupo = Grupo.calcular_sobrante_grupo(row.grupo_id)
-                    sobrante_logico = float(sobrante_grupo - bono)
-                except Exception as e:
-                    app.logger.warning(f"Error calculating sobrante_logico for grupo {row.grupo_id}: {str(e)}")
-                    sobrante_logico = 0.0
-                    
-            except Exception as e:
-                app.logger.error(f"Error processing grupo {row.grupo_id} in report: {str(e)}")
-                # Skip this group and continue with the next one
-                continue
-                
-            # Agregar datos al reporte
-            report_data.append({
-                'grupo_id': row.grupo_id,
-                'gerente': row.gerente,
-                'supervisor': row.supervisor,
-                'titular': row.titular,
-                'ruta': row.ruta,
-                'grupo': row.grupo,
-                'cobranza_ideal': cobranza_ideal,
-                'cobranza_real': cobranza_real,
-                'prestamo_papel': prestamo_papel,
-                'prestamo_real': prestamo_real,
-                'morosidad_monto': morosidad_monto,
-                'morosidad_porcentaje': morosidad_porcentaje,
-                'porcentaje_prestamo': porcentaje_prestamo,
-                'sobrante': sobrante,
-                'sobrante_logico': sobrante_logico,
-                'bono': bono,
-                'numero_de_creditos': row.numero_de_creditos,
-                'prestamos_activos': row.prestamos_activos
-            })
+
+        # Métricas semanales de toda la página: desde la foto semanal o calculadas en vivo
+        grupo_ids = [row.grupo_id for row in results]
+        metricas_por_grupo = ReporteService.obtener_metricas_semanales(grupo_ids, semana_inicio, en_vivo=en_vivo)
+
+        report_data = [ReporteService._fila_reporte(row, metricas_por_grupo[row.grupo_id]) for row in results]
 
         return {
             'reporte': report_data,
             'page': page,
             'per_page': per_page,
-            'total_items': total_items
+            'total_items': total_items,
+            'semana_inicio': semana_inicio.isoformat()
         }
 
+    COLUMNAS_EXPORTACION = [
+        'grupo_id', 'gerente', 'supervisor', 'titular', 'ruta', 'grupo',
+        'cobranza_ideal', 'cobranza_real', 'prestamo_papel', 'prestamo_real',
+        'morosidad_monto', 'morosidad_porcentaje', 'porcentaje_prestamo',
+        'sobrante', 'sobrante_logico', 'bono', 'numero_de_creditos', 'prestamos_activos'
+    ]
+
     @staticmethod
-    def obtener_totales():
-        # Configuración inicial y obtención del usuario
+    def exportar_reporte(semana=None, en_vivo=False, tamano_lote=200):
+        """
+        Genera el reporte general de todos los grupos visibles para el usuario, fila por fila, seguido de
+        una fila de totales calculada en la misma pasada. Los grupos se leen por lotes de `tamano_lote`
+        paginando por llave sobre grupo_id, así la memoria usada no depende del número de grupos.
+        """
         user = UsuarioService.get_user_from_jwt()
-        user_role_id = user.rol_id
+        if user.rol_id == 1:
+            return iter([])
+        semana_inicio = ventana_semana(semana)[2]
+        return ReporteService._generar_exportacion(user, semana_inicio, en_vivo, tamano_lote)
 
-        # Filtros basados en el rol del usuario
-        filters = []
-        if user_role_id == 4:  # Gerente
-            filters.append(Ruta.usuario_id_gerente == user.id)
-        elif user_role_id == 3:  # Supervisor
-            filters.append(Ruta.usuario_id_supervisor == user.id)
-        elif user_role_id == 2:  # Titular
-            filters.append(Grupo.usuario_id_titular == user.id)
-
-        # Calcular la semana actual
-        from datetime import datetime, timedelta
-        import pytz
-        mexico_city_tz = pytz.timezone('America/Mexico_City')
-        current_date = datetime.now(mexico_city_tz).date()
-        start_of_week = current_date - timedelta(days=current_date.weekday())
-        start_of_week_dt = datetime.combine(start_of_week, datetime.min.time())
-        start_of_week_dt = mexico_city_tz.localize(start_of_week_dt)
-        start_of_week = start_of_week_dt
-        
-        end_of_week = start_of_week + timedelta(days=6)
-        end_of_week_dt = datetime.combine(end_of_week, datetime.max.time())
-        end_of_week_dt = mexico_city_tz.localize(end_of_week_dt)
-        end_of_week = end_of_week_dt
-
-        # Subconsulta para pagos agrupados por grupo (cobranza real)
-        pagos_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.sum(Pago.monto_pagado).label('total_pagos')
+    @staticmethod
+    def _generar_exportacion(user, semana_inicio, en_vivo, tamano_lote):
+        query = ReporteService._consulta_grupos_reporte(user).order_by(Grupo.grupo_id)
+        totales = TotalesReporte()
+        ultimo_grupo_id = None
+        while True:
+            lote = query
+            if ultimo_grupo_id is not None:
+                lote = lote.filter(Grupo.grupo_id > ultimo_grupo_id)
+            results = lote.limit(tamano_lote).all()
+            if not results:
+                break
+
+            grupo_ids = [row.grupo_id for row in results]
+            metricas_por_grupo = ReporteService.obtener_metricas_semanales(grupo_ids, semana_inicio, en_vivo=en_vivo)
+            for row in results:
+                metricas = metricas_por_grupo[row.grupo_id]
+                totales.agregar(metricas)
+                yield ReporteService._fila_reporte(row, metricas)
+            ultimo_grupo_id = grupo_ids[-1]
+
+        yield totales.fila_total()
+
+    @staticmethod
+    def calcular_metricas_semanales(grupo_ids, start_of_week_dt, end_of_week_dt):
+        """
+        Calcula en vivo las métricas del reporte general de varios grupos para la semana indicada:
+        cobranza ideal y real, préstamo papel y real, sobrante, faltas, bono y número de créditos.
+        Retorna un diccionario {grupo_id: metricas}.
+        """
+        if not grupo_ids:
+            return {}
+
+        # Cobranza ideal, número de créditos y préstamos activos por grupo
+        prestamos_por_grupo = {
+            row.grupo_id: row
+            for row in db.session.query(
+                ClienteAval.grupo_id.label('grupo_id'),
+                func.sum(case(
+                    (Prestamo.completado == False, Prestamo.monto_prestamo * TipoPrestamo.porcentaje_semanal),
+                    else_=0
+                )).label('cobranza_ideal'),
+                func.count(Prestamo.prestamo_id).label('numero_de_creditos'),
+                func.count(case((Prestamo.completado == False, Prestamo.prestamo_id))).label('prestamos_activos')
             )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
+            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
+            .join(TipoPrestamo, Prestamo.tipo_prestamo_id == TipoPrestamo.tipo_prestamo_id)
+            .filter(ClienteAval.grupo_id.in_(grupo_ids))
+            .group_by(ClienteAval.grupo_id)
+            .all()
+        }
+
+        # Cobranza real de la semana por grupo - sólo préstamos activos
+        cobranza_real_por_grupo = dict(
+            db.session.query(ClienteAval.grupo_id, func.sum(Pago.monto_pagado))
             .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
             .join(Pago, Pago.prestamo_id == Prestamo.prestamo_id)
             .filter(
+                ClienteAval.grupo_id.in_(grupo_ids),
                 Pago.fecha_pago >= start_of_week_dt,
-                Pago.fecha_pago <= end_of_week_dt
+                Pago.fecha_pago <= end_of_week_dt,
+                Prestamo.completado == False
             )
-            .group_by(Grupo.grupo_id)
-            .subquery()
+            .group_by(ClienteAval.grupo_id)
+            .all()
         )
 
-        # Subconsulta para calcular cobranza ideal por grupo
-        cobranza_ideal_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.sum(Prestamo.monto_prestamo * TipoPrestamo.porcentaje_semanal).label('cobranza_ideal')
-            )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .join(TipoPrestamo, Prestamo.tipo_prestamo_id == TipoPrestamo.tipo_prestamo_id)
-            .filter(Prestamo.completado == False)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
+        metricas_por_grupo = ReporteService.calcular_metricas_por_grupo(grupo_ids)
+        bonos_por_grupo = ReporteService.calcular_bono_por_grupos(grupo_ids, start_of_week_dt, end_of_week_dt)
+
+        resultado = {}
+        for grupo_id in grupo_ids:
+            prestamos = prestamos_por_grupo.get(grupo_id)
+            metricas = metricas_por_grupo.get(grupo_id, {})
+            bono_data = bonos_por_grupo[grupo_id]
+            resultado[grupo_id] = {
+                'cobranza_ideal': float(prestamos.cobranza_ideal or 0) if prestamos else 0.0,
+                'cobranza_real': float(cobranza_real_por_grupo.get(grupo_id) or 0),
+                'cobranza_real_semanal': float(bono_data['cobranza_real_semanal'] or 0),
+                'prestamo_papel': metricas.get('prestamo_papel', 0.0),
+                'prestamo_real': metricas.get('prestamo_real', 0.0),
+                'sobrante_grupo': metricas.get('sobrante_grupo', 0.0),
+                'faltas': bono_data['faltas_de_grupo'],
+                'bono': float(bono_data['bono_aplicado']['monto']) if bono_data['bono_aplicado'] else 0,
+                'numero_de_creditos': prestamos.numero_de_creditos if prestamos else 0,
+                'prestamos_activos': prestamos.prestamos_activos if prestamos else 0
+            }
+        return resultado
 
+    @staticmethod
+    def obtener_metricas_semanales(grupo_ids, semana=None, en_vivo=False):
         """
-        # Subconsulta para total de prestamo_papel y prestamo_real por grupo usando propiedades híbridas
-        prestamo_totales_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.sum(func.coalesce(ClienteAval.prestamo_papel, 0)).label('total_prestamo_papel'),
-                func.sum(func.coalesce(ClienteAval.prestamo_real, 0)).label('total_prestamo_real')
+        Métricas semanales de los grupos dados leídas de la foto `reporte_semanal_grupo`.
+        Los grupos sin foto para esa semana (o todos, si `en_vivo` es verdadero) se calculan en vivo.
+        """
+        start_of_week_dt, end_of_week_dt, semana_inicio = ventana_semana(semana)
+        if not grupo_ids:
+            return {}
+
+        metricas_por_grupo = {}
+        if not en_vivo:
+            fotos = ReporteSemanalGrupo.query.filter(
+                ReporteSemanalGrupo.grupo_id.in_(grupo_ids),
+                ReporteSemanalGrupo.semana_inicio == semana_inicio
+            ).all()
+            metricas_por_grupo = {foto.grupo_id: foto.metricas() for foto in fotos}
+
+        faltantes = [grupo_id for grupo_id in grupo_ids if grupo_id not in metricas_por_grupo]
+        if faltantes:
+            metricas_por_grupo.update(
+                ReporteService.calcular_metricas_semanales(faltantes, start_of_week_dt, end_of_week_dt)
             )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
+        return metricas_por_grupo
+
+    # Columnas de la foto que dependen sólo de los pagos y faltas de la semana; el resto (cobranza ideal,
+    # préstamo papel y real, sobrante y créditos) sale del estado de la cartera al momento de calcularse
+    COLUMNAS_DE_PAGOS = ('cobranza_real', 'cobranza_real_semanal', 'faltas', 'bono')
 
-        # Imprimir los resultados de prestamo_totales_por_grupo
-        resultados_prestamo_totales = db.session.query(
-            prestamo_totales_por_grupo.c.grupo_id,
-            prestamo_totales_por_grupo.c.total_prestamo_papel,
-            prestamo_totales_por_grupo.c.total_prestamo_real
-        ).all()
-
-        for resultado in resultados_prestamo_totales:
-            grupo_id = resultado.grupo_id
-            total_prestamo_papel = resultado.total_prestamo_papel
-            total_prestamo_real = resultado.total_prestamo_real
-            print(f"Grupo ID: {grupo_id}, Total Prestamo Papel: {total_prestamo_papel}, Total Prestamo Real: {total_prestamo_real}")
+    @staticmethod
+    def actualizar_reporte_semanal(grupo_ids=None, semana=None):
         """
-        
-        # Subconsulta para número de créditos por grupo
-        numero_de_creditos_por_grupo = (
-            db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.count(Prestamo.prestamo_id).label('numero_de_creditos')
+        Recalcula y guarda (upsert) la foto semanal de los grupos dados, o de todos si no se indican.
+        En una semana cerrada la foto guardada conserva los montos de la cartera de esa semana: sólo se
+        recalculan las columnas que dependen de los pagos y faltas (COLUMNAS_DE_PAGOS); los grupos sin foto
+        se guardan completos. Retorna el número de grupos actualizados.
+        """
+        start_of_week_dt, end_of_week_dt, semana_inicio = ventana_semana(semana)
+        todos = grupo_ids is None
+        if todos:
+            grupo_ids = [grupo_id for (grupo_id,) in db.session.query(Grupo.grupo_id).all()]
+        grupo_ids = list(grupo_ids)
+        if not grupo_ids:
+            return 0
+
+        try:
+            metricas_por_grupo = ReporteService.calcular_metricas_semanales(grupo_ids, start_of_week_dt, end_of_week_dt)
+            ahora = datetime.now(TIMEZONE)
+            filas = [
+                {'grupo_id': grupo_id, 'semana_inicio': semana_inicio, 'fecha_actualizacion': ahora, **metricas}
+                for grupo_id, metricas in metricas_por_grupo.items()
+            ]
+            if es_semana_cerrada(semana_inicio):
+                columnas = ReporteService.COLUMNAS_DE_PAGOS + ('fecha_actualizacion',)
+            else:
+                columnas = [columna for columna in filas[0] if columna not in ('grupo_id', 'semana_inicio')]
+            stmt = pg_insert(ReporteSemanalGrupo).values(filas)
+            stmt = stmt.on_conflict_do_update(
+                constraint='uq_reporte_semanal_grupo_semana',
+                set_={columna: stmt.excluded[columna] for columna in columnas}
             )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
+            db.session.execute(stmt)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Error actualizando el reporte semanal: {str(e)}")
+            raise ValueError("No se pudo actualizar el reporte semanal.")
+
+        # Los reportes en caché de estos grupos ya no corresponden a la foto
+        if todos:
+            report_cache.invalidate_all()
+        else:
+            report_cache.invalidate_grupos(grupo_ids)
+        return len(filas)
+
+    @staticmethod
+    def recalcular_bonos_reporte_semanal(semana=None):
+        """
+        Recalcula sólo el bono de la foto semanal de todos los grupos (semana actual si no se indica) con la
+        tabla de bonos vigente. El bono depende únicamente de la cobranza real semanal y las faltas, que la
+        foto ya guarda, así que un cambio en los rangos de bono no requiere recalcular la cartera.
+        Retorna el número de grupos cuyo bono cambió.
+        """
+        semana_inicio = ventana_semana(semana)[2]
+        try:
+            tabla_bonos = TablaBonos(db.session.query(Bono).all())
+            fotos = db.session.query(
+                ReporteSemanalGrupo.id,
+                ReporteSemanalGrupo.cobranza_real_semanal,
+                ReporteSemanalGrupo.faltas,
+                ReporteSemanalGrupo.bono
+            ).filter(ReporteSemanalGrupo.semana_inicio == semana_inicio).all()
+
+            cambios = []
+            for foto in fotos:
+                bono_aplicado = tabla_bonos.buscar(foto.cobranza_real_semanal, foto.faltas)
+                bono = bono_aplicado.monto if bono_aplicado else 0
+                if bono != foto.bono:
+                    cambios.append({'id': foto.id, 'bono': bono})
+            if cambios:
+                db.session.execute(update(ReporteSemanalGrupo), cambios)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.error(f"Error recalculando los bonos del reporte semanal: {str(e)}")
+            raise ValueError("No se pudieron recalcular los bonos del reporte semanal.")
+
+        # Los reportes calculados en vivo (semanas sin foto) también dependen de la tabla de bonos
+        report_cache.invalidate_all()
+        return len(cambios)
+
+    @staticmethod
+    def refrescar_reporte_semanal(grupo_ids=None, fechas=None):
+        """
+        Refresca la foto semanal de los grupos dados (todos si no se indican) para las semanas de `fechas`
+        (la semana actual si no se indican). Se llama después de escrituras ya confirmadas; un error aquí
+        sólo se registra en el log porque los datos ya quedaron guardados.
+        """
+        try:
+            if grupo_ids is not None:
+                grupo_ids = [grupo_id for grupo_id in set(grupo_ids) if grupo_id is not None]
+                if not grupo_ids:
+                    return
+            semanas = {ventana_semana(fecha)[2] for fecha in (fechas or [None])}
+            for semana_inicio in semanas:
+                ReporteService.actualizar_reporte_semanal(grupo_ids, semana_inicio)
+        except (ValueError, SQLAlchemyError) as e:
+            db.session.rollback()
+            app.logger.warning(f"No se pudo refrescar el reporte semanal de los grupos {grupo_ids}: {str(e)}")
+
+    @staticmethod
+    def actualizar_reporte_semanal_por_prestamos(prestamo_ids, fechas=None):
+        """Refresca la foto semanal de los grupos de los préstamos dados (ver refrescar_reporte_semanal)."""
+        prestamo_ids = list(prestamo_ids)
+        if not prestamo_ids:
+            return
+        grupo_ids = [
+            grupo_id for (grupo_id,) in db.session.query(ClienteAval.grupo_id)
             .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .group_by(Grupo.grupo_id)
-            .subquery()
-        )
-        
-        # Subconsulta para total numero de prestamos activos por grupo
-        numero_de_prestamos_activos_por_grupo = (
+            .filter(Prestamo.prestamo_id.in_(prestamo_ids), ClienteAval.grupo_id.isnot(None))
+            .distinct()
+            .all()
+        ]
+        ReporteService.refrescar_reporte_semanal(grupo_ids, fechas)
+
+    @staticmethod
+    def actualizar_reporte_semanal_por_clientes(cliente_ids, fechas=None):
+        """Refresca la foto semanal de los grupos de los clientes dados (ver refrescar_reporte_semanal)."""
+        cliente_ids = [cliente_id for cliente_id in set(cliente_ids) if cliente_id is not None]
+        if not cliente_ids:
+            return
+        grupo_ids = [
+            grupo_id for (grupo_id,) in db.session.query(ClienteAval.grupo_id)
+            .filter(ClienteAval.cliente_id.in_(cliente_ids), ClienteAval.grupo_id.isnot(None))
+            .distinct()
+            .all()
+        ]
+        ReporteService.refrescar_reporte_semanal(grupo_ids, fechas)
+
+    @staticmethod
+    def calcular_metricas_por_grupo(grupo_ids):
+        """
+        Calcula en una sola consulta, para todos los grupos dados:
+        prestamo_real, prestamo_papel y sobrante del grupo.
+        Retorna un diccionario {grupo_id: metricas}.
+        """
+        if not grupo_ids:
+            return {}
+
+        # prestamo_papel y prestamo_real por grupo (último y penúltimo préstamo de cada titular)
+        prestamos_por_grupo = PrestamoService.prestamo_real_y_papel_por_grupo_query(grupo_ids)
+
+        # Sobrante por grupo: total pagado menos monto de utilidad de todos los préstamos del grupo
+        sobrante_por_grupo = Grupo.sobrante_por_grupo_query(grupo_ids)
+
+        results = (
             db.session.query(
-                Grupo.grupo_id.label('grupo_id'),
-                func.count(Prestamo.prestamo_id).label('numero_de_prestamos_activos')
+                Grupo.grupo_id,
+                func.coalesce(prestamos_por_grupo.c.prestamo_papel, 0).label('prestamo_papel'),
+                func.coalesce(prestamos_por_grupo.c.prestamo_real, 0).label('prestamo_real'),
+                func.coalesce(sobrante_por_grupo.c.sobrante_grupo, 0).label('sobrante_grupo')
             )
-            .join(ClienteAval, ClienteAval.grupo_id == Grupo.grupo_id)
-            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .filter(Prestamo.completado == False)
-            .group_by(Grupo.grupo_id)
-            .subquery()
+            .outerjoin(prestamos_por_grupo, prestamos_por_grupo.c.grupo_id == Grupo.grupo_id)
+            .outerjoin(sobrante_por_grupo, sobrante_por_grupo.c.grupo_id == Grupo.grupo_id)
+            .filter(Grupo.grupo_id.in_(grupo_ids))
+            .all()
         )
 
-        # Construcción de la consulta principal para los totales
-        query_totales = db.session.query(
-            func.sum(cobranza_ideal_por_grupo.c.cobranza_ideal).label('total_cobranza_ideal'),
-            func.sum(pagos_por_grupo.c.total_pagos).label('total_cobranza_real'),
-            #func.sum(prestamo_totales_por_grupo.c.total_prestamo_papel).label('total_prestamo_papel'),
-            #func.sum(prestamo_totales_por_grupo.c.total_prestamo_real).label('total_prestamo_real'),
-            func.sum(numero_de_creditos_por_grupo.c.numero_de_creditos).label('total_numero_de_creditos'),
-            func.sum(numero_de_prestamos_activos_por_grupo.c.numero_de_prestamos_activos).label('total_numero_de_prestamos_activos'),
-            #func.sum(morosidad_por_grupo.c.morosidad).label('total_morosidad'),
-            func.array_agg(Grupo.grupo_id).label('grupo_ids')  # Listado de IDs de grupo
-        ).select_from(Grupo)
+        return {
+            row.grupo_id: {
+                'prestamo_papel': float(row.prestamo_papel),
+                'prestamo_real': float(row.prestamo_real),
+                'sobrante_grupo': float(row.sobrante_grupo)
+            }
+            for row in results
+        }
 
-        # Unir las subconsultas
-        query_totales = query_totales.outerjoin(cobranza_ideal_por_grupo, cobranza_ideal_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query_totales = query_totales.outerjoin(pagos_por_grupo, pagos_por_grupo.c.grupo_id == Grupo.grupo_id)
-        #query_totales = query_totales.outerjoin(prestamo_totales_por_grupo, prestamo_totales_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query_totales = query_totales.outerjoin(numero_de_creditos_por_grupo, numero_de_creditos_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query_totales = query_totales.outerjoin(numero_de_prestamos_activos_por_grupo, numero_de_prestamos_activos_por_grupo.c.grupo_id == Grupo.grupo_id)
-        #query_totales = query_totales.outerjoin(morosidad_por_grupo, morosidad_por_grupo.c.grupo_id == Grupo.grupo_id)
-        query_totales = query_totales.outerjoin(Ruta, Grupo.ruta_id == Ruta.ruta_id)
+    @staticmethod
+    def obtener_sobrante_por_grupo(grupo_id):
+        return Grupo.calcular_sobrante_grupo(grupo_id)
 
-        # Aplicar filtros de usuario si existen
-        if filters:
-            query_totales = query_totales.filter(*filters)
+    @staticmethod
+    def obtener_totales(semana=None, en_vivo=False):
+        # Configuración inicial y obtención del usuario
+        user = UsuarioService.get_user_from_jwt()
 
-        # Ejecutar la consulta
-        result_totales = query_totales.one()
+        alcance = ReporteService.alcance_por_usuario(user)
+        semana_inicio = ventana_semana(semana)[2]
 
-        # Calcular el bono
-        total_bono = 0
-        
-        #Calcular sobrante lógico
-        total_sobrante_logico = 0
-
-        #Calcular prestamo real y papel
-        total_prestamo_real = 0
-        total_prestamo_papel = 0
-        
-        grupo_ids = result_totales.grupo_ids or []
-        for grupo_id in grupo_ids:
-            #print(f'Grupo ID: {grupo_id}')
-            bono_data = ReporteService.calcular_bono_por_grupo(grupo_id)
-            total_bono += float(bono_data['bono_aplicado']['monto']) if bono_data['bono_aplicado'] else 0
-            sobrante_logico = float(Grupo.calcular_sobrante_grupo(grupo_id) - total_bono)
-            total_sobrante_logico += sobrante_logico
-            prestamo_real_grupo, prestamo_papel_grupo = PrestamoService().get_prestamo_real_y_papel_by_grupo(grupo_id)
-            total_prestamo_papel += prestamo_papel_grupo
-            total_prestamo_real += prestamo_real_grupo
-
-        # Extraer resultados y calcular adicionales
-        total_cobranza_ideal = float(result_totales.total_cobranza_ideal or 0)
-        total_cobranza_real = float(result_totales.total_cobranza_real or 0)
-        #total_prestamo_papel = float(result_totales.total_prestamo_papel or 0)
-        #total_prestamo_real = float(result_totales.total_prestamo_real or 0)
-        total_numero_de_creditos = int(result_totales.total_numero_de_creditos or 0)
-        total_prestamos_activos = int(result_totales.total_numero_de_prestamos_activos or 0)
-        
-        # Morosidad y métricas relacionadas
-        morosidad_monto = float(total_cobranza_ideal - total_cobranza_real)
-        morosidad_porcentaje = round((morosidad_monto / total_cobranza_ideal) * 100, 2) if total_cobranza_ideal != 0 else 0
-        porcentaje_prestamo = round((total_prestamo_real / total_cobranza_real) * 100, 2) if total_cobranza_real != 0 else 0
-        sobrante = total_cobranza_real - total_prestamo_papel - total_bono
+        if en_vivo:
+            return ReporteService._calcular_totales(user, semana_inicio, en_vivo=True)
+        return report_cache.get_or_set(
+            alcance,
+            ['totales', semana_inicio.isoformat()],
+            lambda: ReporteService._calcular_totales(user, semana_inicio)
+        )
 
-        # Construir el resultado
-        return {
-            'total_cobranza_ideal': total_cobranza_ideal,
-            'total_cobranza_real': total_cobranza_real,
-            'total_prestamo_real': total_prestamo_real,
-            'total_prestamo_papel': total_prestamo_papel,
-            'total_numero_de_creditos': total_numero_de_creditos,
-            'total_prestamos_activos': total_prestamos_activos,
-            'morosidad_monto': morosidad_monto,
-            'morosidad_porcentaje': morosidad_porcentaje,
-            'porcentaje_prestamo': porcentaje_prestamo,
-            'sobrante': sobrante,
-            'total_sobrante_logico': total_sobrante_logico,
-            'total_bono': total_bono
-        }
+    @staticmethod
+    def _calcular_totales(user, semana_inicio, en_vivo=False):
+        # Grupos visibles para el usuario
+        grupo_ids = list(UsuarioService.get_grupos_visibles(user))
+
+        # Métricas semanales de todos los grupos: desde la foto semanal o calculadas en vivo
+        metricas_por_grupo = ReporteService.obtener_metricas_semanales(grupo_ids, semana_inicio, en_vivo=en_vivo)
+
+        totales = TotalesReporte()
+        for metricas in metricas_por_grupo.values():
+            totales.agregar(metricas)
+        return totales.resultado()
 
-        
     @staticmethod
     def obtener_sobrante_total_usuario_por_prestamo(user_id):
-        # Filtrar grupos por rol del usuario
+        """
+        Suma del sobrante (total pagado menos monto de utilidad) de todos los préstamos
+        de los grupos visibles para el usuario.
+        """
         usuario = UsuarioService.get_user_by_id(user_id)
-        user_role_id = usuario.rol_id
-        filters = []
-
-        if user_role_id in [5, 6]:
-            pass
-        elif user_role_id == 4:
-            filters.append(Ruta.usuario_id_gerente == user_id)
-        elif user_role_id == 3:
-            filters.append(Ruta.usuario_id_supervisor == user_id)
-        elif user_role_id == 2:
-            filters.append(Grupo.usuario_id_titular == user_id)
-        
-        # Subconsulta para calcular el sobrante por préstamo en cada grupo del usuario
-        sobrante_por_prestamo = (
-            db.session.query(
-                Prestamo.prestamo_id,
-                (func.coalesce(func.sum(Pago.monto_pagado), 0) - Prestamo.monto_utilidad).label('sobrante')
-            )
-            .join(ClienteAval, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .join(Grupo, ClienteAval.grupo_id == Grupo.grupo_id)
-            .outerjoin(Pago, Pago.prestamo_id == Prestamo.prestamo_id)
-            .filter(*filters)
-            .group_by(Prestamo.prestamo_id)
-        ).subquery()
-
-        # Imprimir los resultados de la consulta sobrante_por_prestamo
-        results = db.session.query(sobrante_por_prestamo).all()
-
-        # Consulta para sumar el sobrante total de todos los préstamos del usuario
-        total_sobrante = (
-            db.session.query(func.coalesce(func.sum(sobrante_por_prestamo.c.sobrante), 0).label('total_sobrante'))
-            .scalar()
-        )     
-
-        # Devuelve el total de sobrante por usuario
-        return total_sobrante
-        
+        grupo_ids = UsuarioService.get_grupos_visibles(usuario)
+        if not grupo_ids:
+            return 0
+
+        sobrante_por_grupo = Grupo.sobrante_por_grupo_query(grupo_ids)
+        return db.session.query(func.coalesce(func.sum(sobrante_por_grupo.c.sobrante_grupo), 0)).scalar()
+
     # CALCULO DE BONOS --------------------------------------------------------------------------
     @staticmethod
-    def calcular_bono_por_grupo(grupo_id):
-        
-        mexico_city_tz = pytz.timezone('America/Mexico_City')
-        current_date = datetime.now(mexico_city_tz).date()
-        start_of_week = current_date - timedelta(days=current_date.weekday())
-        start_of_week_dt = datetime.combine(start_of_week, datetime.min.time())
-        start_of_week_dt = mexico_city_tz.localize(start_of_week_dt)
-        start_of_week = start_of_week_dt
-        
-        end_of_week = start_of_week + timedelta(days=6)
-        end_of_week_dt = datetime.combine(end_of_week, datetime.max.time())
-        end_of_week_dt = mexico_city_tz.localize(end_of_week_dt)
-        end_of_week = end_of_week_dt
-
-        # Obtener la cobranza real de la semana sumando los pagos de los préstamos en esa semana
-        cobranza_real_semanal = (
-            db.session.query(func.sum(Pago.monto_pagado).label('cobranza_real'))
-            .join(Prestamo, Pago.prestamo_id == Prestamo.prestamo_id)
-            .join(ClienteAval, Prestamo.cliente_id == ClienteAval.cliente_id)
+    def calcular_bono_por_grupo(grupo_id, semana=None):
+        start_of_week_dt, end_of_week_dt, _ = ventana_semana(semana)
+        return ReporteService.calcular_bono_por_grupos([grupo_id], start_of_week_dt, end_of_week_dt)[grupo_id]
+
+    @staticmethod
+    def calcular_bono_por_grupos(grupo_ids, start_of_week_dt=None, end_of_week_dt=None):
+        """
+        Calcula el bono de varios grupos a la vez.
+        La cobranza real semanal y las faltas se obtienen con una consulta agrupada cada una,
+        y la tabla de bonos se carga una sola vez. Si no se indica la semana se usa la actual.
+        Retorna un diccionario {grupo_id: datos del bono}.
+        """
+        if start_of_week_dt is None or end_of_week_dt is None:
+            start_of_week_dt, end_of_week_dt, _ = ventana_semana()
+
+        if not grupo_ids:
+            return {}
+
+        # Cobranza real de la semana por grupo sumando los pagos de los préstamos en esa semana
+        cobranza_real_semanal = dict(
+            db.session.query(ClienteAval.grupo_id, func.sum(Pago.monto_pagado))
+            .join(Prestamo, Prestamo.cliente_id == ClienteAval.cliente_id)
+            .join(Pago, Pago.prestamo_id == Prestamo.prestamo_id)
             .filter(
-                ClienteAval.grupo_id == grupo_id,
+                ClienteAval.grupo_id.in_(grupo_ids),
                 Pago.fecha_pago >= start_of_week_dt,
                 Pago.fecha_pago <= end_of_week_dt
             )
-        ).scalar() or 0  # Asegurarse de que sea al menos 0
+            .group_by(ClienteAval.grupo_id)
+            .all()
+        )
 
-        # Contar las faltas del grupo en la semana
-        faltas_de_grupo = (
-            db.session.query(func.count(Falta.id).label('faltas'))
-            .join(Prestamo, Falta.prestamo_id == Prestamo.prestamo_id)
-            .join(ClienteAval, Prestamo.cliente_id == ClienteAval.cliente_id)
-            .filter(
-                ClienteAval.grupo_id == grupo_id,
-                Falta.fecha >= start_of_week_dt,
-                Falta.fecha <= end_of_week_dt
-            )
-        ).scalar() or 0  # Asegurarse de que sea al menos 0
-
-        # Iterar sobre los posibles bonos y verificar si el grupo cumple con los criterios
-        bonos = db.session.query(Bono).all()
-        bono_aplicado = None
-        for bono in bonos:
-            if bono.regla_bono(cobranza_real_semanal, faltas_de_grupo):
-                bono_aplicado = bono
-                break
+        # Faltas de la semana por grupo
+        faltas_de_grupo = FaltaService.contar_faltas_por_grupos(grupo_ids, start_of_week_dt, end_of_week_dt)
 
-        # Retornar el bono y la cobranza real de la semana
-        return {
-            'grupo_id': grupo_id,
-            'cobranza_real_semanal': cobranza_real_semanal,
-            'faltas_de_grupo': faltas_de_grupo,
-            'bono_aplicado': bono_aplicado.serialize() if bono_aplicado else None
-        }
+        tabla_bonos = TablaBonos(db.session.query(Bono).all())
+
+        bonos_por_grupo = {}
+        for grupo_id in grupo_ids:
+            cobranza_grupo = cobranza_real_semanal.get(grupo_id) or 0
+            faltas_grupo = faltas_de_grupo.get(grupo_id) or 0
+            bono_aplicado = tabla_bonos.buscar(cobranza_grupo, faltas_grupo)
+            bonos_por_grupo[grupo_id] = {
+                'grupo_id': grupo_id,
+                'cobranza_real_semanal': cobranza_grupo,
+                'faltas_de_grupo': faltas_grupo,
+                'bono_aplicado': bono_aplicado.serialize() if bono_aplicado else None
+            }
+        return bonos_por_grupo
 
     @staticmethod
-    def calcular_bono_para_grupos_de_titular(user_id):
+    def calcular_bono_para_grupos_de_titular(user_id, semana=None):
         # Obtener los grupos donde el usuario es el titular
-        grupos = db.session.query(Grupo).filter(Grupo.usuario_id_titular == user_id).all()
-        report_data = []
-
-        # Calcular bono y cobranza real para cada grupo del titular
-        for grupo in grupos:
-            reporte_grupo = ReporteService.calcular_bono_por_grupo(grupo.grupo_id)
-            report_data.append(reporte_grupo)
-
-        return report_data
+        grupo_ids = [
+            grupo_id for (grupo_id,) in db.session.query(Grupo.grupo_id).filter(Grupo.usuario_id_titular == user_id).all()
+        ]
+
+        # Calcular bono y cobranza real de la semana indicada (la actual por defecto) para todos los grupos del titular
+        start_of_week_dt, end_of_week_dt, _ = ventana_semana(semana)
+        bonos_por_grupo = ReporteService.calcular_bono_por_grupos(grupo_ids, start_of_week_dt, end_of_week_dt)
+        return [bonos_por_grupo[grupo_id] for grupo_id in grupo_ids]
     
     @staticmethod
-    def calcular_bono_global_titular(user_id):
-        # Obtener los grupos donde el usuario es el titular
-        grupos = db.session.query(Grupo).filter(Grupo.usuario_id_titular == user_id).all()
+    def calcular_bono_global_titular(user_id, semana=None):
         total_bono = 0
-        
-
-        # Calcular bono para cada grupo y sumar los montos de los bonos aplicados
-        for grupo in grupos:
-            reporte_grupo = ReporteService.calcular_bono_por_grupo(grupo.grupo_id)
-            
-            
-            # Si el grupo tiene un bono aplicado, sumar el monto del bono
+
+        # Sumar los montos de los bonos aplicados de todos los grupos del titular
+        for reporte_grupo in ReporteService.calcular_bono_para_grupos_de_titular(user_id, semana):
             if reporte_grupo['bono_aplicado']:
                 total_bono += reporte_grupo['bono_aplicado']['monto']
 
         # Retornar el total del bono para todos los grupos del titular
         return total_bono
-    
-    
-    
-    
-    
-    
-    
-    
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 from app.models import Ruta, Usuario
 from app import db
+from app.extensions import report_cache
+from app.services.usuario_service import UsuarioService
 from flask import current_app as app
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -19,6 +21,8 @@ class RutaService:
             new_ruta.validate_gerente_supervisor()
             db.session.add(new_ruta)
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return new_ruta
         except ValueError as e:
             db.session.rollback()
@@ -53,6 +57,8 @@ class RutaService:
             ruta.usuario_id_supervisor = data.get('usuario_id_supervisor', ruta.usuario_id_supervisor)
             ruta.validate_gerente_supervisor()
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return ruta
         except ValueError as e:
             db.session.rollback()
@@ -71,6 +77,8 @@ class RutaService:
         try:
             db.session.delete(ruta)
             db.session.commit()
+            UsuarioService.invalidar_grupos_visibles()
+            report_cache.invalidate_all()
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -1,20 +1,59 @@
-def validate_key(data, required_keys):
-    """
-    Verifica si todas las claves obligatorias están presentes en el diccionario `data`.
-
-    Args:
-        data (dict): Diccionario con los datos a validar.
-        required_keys (list): Lista de claves obligatorias.
-
-    Returns:
-        bool: True si todas las claves están presentes, False en caso contrario.
-
-    Raises:
-        ValueError: Si alguna de las claves obligatorias falta en `data`.
-    """
-    missing_keys = [key for key in required_keys if key not in data]
-    
-    if missing_keys:
-        raise ValueError(f"Faltan las siguientes claves obligatorias: {', '.join(missing_keys)}")
-    
-    return True
+from datetime import datetime, timedelta
+from app.constants import TIMEZONE
+
+def validate_key(data, required_keys):
+    """
+    Verifica si todas las claves obligatorias están presentes en el diccionario `data`.
+
+    Args:
+        data (dict): Diccionario con los datos a validar.
+        required_keys (list): Lista de claves obligatorias.
+
+    Returns:
+        bool: True si todas las claves están presentes, False en caso contrario.
+
+    Raises:
+        ValueError: Si alguna de las claves obligatorias falta en `data`.
+    """
+    missing_keys = [key for key in required_keys if key not in data]
+    
+    if missing_keys:
+        raise ValueError(f"Faltan las siguientes claves obligatorias: {', '.join(missing_keys)}")
+    
+    return True
+
+
+def ventana_semana(fecha=None):
+    """
+    Calcula la ventana de la semana (lunes a domingo, hora de Ciudad de México) que contiene `fecha`.
+
+    Args:
+        fecha (date | datetime | None): Cualquier fecha dentro de la semana; None para la semana actual.
+            Un datetime sin zona se toma como hora de Ciudad de México.
+
+    Returns:
+        tuple: (inicio, fin, lunes) con el inicio y fin de la semana como datetimes con zona horaria
+        (ambos inclusivos) y el lunes de la semana como date.
+    """
+    if fecha is None:
+        fecha = datetime.now(TIMEZONE).date()
+    elif isinstance(fecha, datetime):
+        # Las fechas sin zona que vienen de la base (p. ej. Pago.fecha_pago) ya son hora de Ciudad de México;
+        # astimezone() las tomaría como hora del sistema, que en Lambda es UTC
+        fecha = TIMEZONE.localize(fecha) if fecha.tzinfo is None else fecha.astimezone(TIMEZONE)
+        fecha = fecha.date()
+
+    lunes = fecha - timedelta(days=fecha.weekday())
+    inicio = TIMEZONE.localize(datetime.combine(lunes, datetime.min.time()))
+    fin = TIMEZONE.localize(datetime.combine(lunes + timedelta(days=6), datetime.max.time()))
+    return inicio, fin, lunes
+
+
+def es_semana_cerrada(fecha):
+    """
+    Indica si la semana que contiene `fecha` ya terminó, es decir, es anterior a la semana actual.
+    Los datos de una semana cerrada ya no cambian con la operación normal y pueden guardarse en caché.
+    """
+    _, _, lunes = ventana_semana(fecha)
+    _, _, lunes_actual = ventana_semana()
+    return lunes < lunes_actual
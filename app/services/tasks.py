@@ -1,22 +1,93 @@
+import time
 from datetime import datetime, timedelta
-from app.models import Prestamo
+from sqlalchemy import func, insert, select, literal
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Prestamo, Pago, Falta, TipoPrestamo
 from app.constants import TIMEZONE
+from app.services.reporte_service import ReporteService
+from app.services.service_helpers import ventana_semana
 
-def verificar_pagos_semanal():
-    print("Cronjob ejecutado: Verificación de pagos semanal.")
+def verificar_pagos_semanal(hoy=None):
     """
     Verifica todos los préstamos activos para ver si cumplieron con la cobranza ideal durante la semana anterior.
+
+    La verificación se hace por conjuntos: una sola consulta agrupada suma los pagos de la semana por préstamo
+    y las faltas faltantes se insertan con un único INSERT ... SELECT en una sola transacción.
+    Es idempotente: cada falta del barrido se fecha con una marca propia (lunes de la semana actual a las
+    00:00:00.000001) y no se vuelve a registrar si el préstamo ya tiene esa falta. Las faltas que se registran
+    al pagar se fechan a la medianoche del día del pago, así que nunca chocan con la marca del barrido.
     """
-    # Obtener la fecha y hora actuales en la zona horaria de Ciudad de México
-    ahora = datetime.now(TIMEZONE)
-    hoy = ahora.date()
-    
-    # Obtener el lunes de la semana anterior
-    lunes_anterior = hoy - timedelta(days=hoy.weekday() + 7)
-
-    # Obtener todos los préstamos activos
-    prestamos_activos = Prestamo.query.filter_by(status='activo').all()
-
-    # Verificar pagos semanales para cada préstamo
-    for prestamo in prestamos_activos:
-        prestamo.verificar_pagos_semana(lunes_anterior)
+    print("Cronjob ejecutado: Verificación de pagos semanal.")
+    inicio_proceso = time.perf_counter()
+
+    # Obtener la fecha actual en la zona horaria de Ciudad de México
+    if hoy is None:
+        hoy = datetime.now(TIMEZONE).date()
+
+    # Ventana de la semana anterior y lunes de la semana actual (cierre de la semana revisada)
+    inicio_semana, fin_semana, lunes_anterior = ventana_semana(hoy - timedelta(days=7))
+    lunes_actual = lunes_anterior + timedelta(days=7)
+    # Marca de las faltas del barrido: un microsegundo después de la medianoche del lunes, para no confundirlas
+    # con una falta registrada al pagar ese mismo lunes
+    fecha_falta = datetime.combine(lunes_actual, datetime.min.time()) + timedelta(microseconds=1)
+
+    # Suma de pagos de la semana anterior por préstamo
+    pagos_semana = (
+        select(
+            Pago.prestamo_id.label('prestamo_id'),
+            func.sum(Pago.monto_pagado).label('pagado')
+        )
+        .where(Pago.fecha_pago >= inicio_semana, Pago.fecha_pago <= fin_semana)
+        .group_by(Pago.prestamo_id)
+        .subquery()
+    )
+    pagado = func.coalesce(pagos_semana.c.pagado, 0)
+
+    # Faltas ya registradas por el barrido para la misma semana (sólo las que llevan su marca)
+    falta_existente = (
+        select(Falta.id)
+        .where(Falta.prestamo_id == Prestamo.prestamo_id, Falta.fecha == fecha_falta)
+        .exists()
+    )
+
+    faltantes = (
+        select(literal(fecha_falta), Prestamo.prestamo_id, pagado)
+        .join(TipoPrestamo, Prestamo.tipo_prestamo_id == TipoPrestamo.tipo_prestamo_id)
+        .outerjoin(pagos_semana, pagos_semana.c.prestamo_id == Prestamo.prestamo_id)
+        .where(
+            Prestamo.status == 'activo',
+            pagado < Prestamo.monto_prestamo * TipoPrestamo.porcentaje_semanal,
+            ~falta_existente
+        )
+    )
+
+    try:
+        prestamos_procesados = db.session.scalar(
+            select(func.count(Prestamo.prestamo_id)).where(Prestamo.status == 'activo')
+        )
+        resultado = db.session.execute(
+            insert(Falta).from_select(['fecha', 'prestamo_id', 'monto_abonado'], faltantes)
+        )
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        raise ValueError(f"No se pudo completar la verificación de pagos semanal: {str(e)}")
+
+    # Las faltas del barrido cuentan en la semana actual: refrescar su foto semanal
+    try:
+        ReporteService.actualizar_reporte_semanal(semana=lunes_actual)
+    except ValueError as e:
+        print(f"No se pudo refrescar el reporte semanal: {str(e)}")
+
+    resumen = {
+        'semana_inicio': lunes_anterior.isoformat(),
+        'prestamos_procesados': prestamos_procesados,
+        'faltas_registradas': resultado.rowcount,
+        'duracion_segundos': round(time.perf_counter() - inicio_proceso, 3)
+    }
+    print(
+        f"Verificación semanal ({resumen['semana_inicio']}): {resumen['prestamos_procesados']} préstamos procesados, "
+        f"{resumen['faltas_registradas']} faltas registradas en {resumen['duracion_segundos']}s."
+    )
+    return resumen
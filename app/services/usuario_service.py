@@ -1,89 +1,128 @@
-from app.models import Usuario
-from flask_jwt_extended import get_jwt_identity
-from app import db, bcrypt
-
-class UsuarioService:
-    @staticmethod
-    def create_user(data):
-        password = bcrypt.generate_password_hash(data['contrasena']).decode('utf-8')
-        new_user = Usuario(
-            nombre=data['nombre'],
-            apellido_paterno=data['apellido_paterno'],
-            apellido_materno=data['apellido_materno'],
-            usuario=data['usuario'],
-            contrasena=password,
-            rol_id=data['rol_id']
-        )
-        db.session.add(new_user)
-        db.session.commit()
-        return new_user
-
-    @staticmethod
-    def get_all_users():
-        return Usuario.query.all()
-
-    @staticmethod
-    def get_user_by_id(user_id):
-        return Usuario.query.get(user_id)
-    @staticmethod
-    def get_user_rol_by_user_id(user_id):
-        user = Usuario.query.get(user_id)
-        return user.rol_id
-    @staticmethod
-    def get_user_by_usuario(usuario):
-        return Usuario.query.filter_by(usuario=usuario).first()
-    
-    @staticmethod
-    def get_specific_users(rol_name):
-        roles = {
-            "Gestor de cobranza": 1,
-            "Titular": 2,
-            "Supervisor": 3,
-            "Gerente": 4,
-            "Director": 5,
-            "Admin": 6
-        }
-        if rol_name not in roles.keys():
-            raise ValueError("Rol no encontrado")
-        print(roles[rol_name])
-        usuarios_con_rol = Usuario.query.filter_by(rol_id=roles[rol_name]).all()
-        if not usuarios_con_rol:
-            raise ValueError("No se encontraron usuarios con el rol proporcionado")
-        return usuarios_con_rol
-
-            
-    @staticmethod
-    def get_user_from_jwt():
-        # Retrieve the JWT identity
-        id_from_jwt = get_jwt_identity()
-        
-        # Query your database for the user
-        user = Usuario.query.filter_by(id=id_from_jwt).first()
-
-        # Check if a user was found
-        if not user:
-            raise Exception("User not found")
-
-        return user
-    
-    @staticmethod
-    def update_user(user_id, data):
-        user = Usuario.query.get(user_id)
-        if user:
-            user.nombre = data.get('nombre', user.nombre)
-            user.apellido_paterno = data.get('apellido_paterno', user.apellido_paterno)
-            user.apellido_materno = data.get('apellido_materno', user.apellido_materno)
-            user.usuario = data.get('usuario', user.usuario)
-            user.rol_id = data.get('rol_id', user.rol_id)
-            db.session.commit()
-            return user
-        return None
-
-    @staticmethod
-    def delete_user(user_id):
-        user = Usuario.query.get(user_id)
-        if user:
-            db.session.delete(user)
-            db.session.commit()
-            return True
+from app.models import Usuario, Grupo, Ruta
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from app import db, bcrypt
+
+class UsuarioService:
+    @staticmethod
+    def create_user(data):
+        password = bcrypt.generate_password_hash(data['contrasena']).decode('utf-8')
+        new_user = Usuario(
+            nombre=data['nombre'],
+            apellido_paterno=data['apellido_paterno'],
+            apellido_materno=data['apellido_materno'],
+            usuario=data['usuario'],
+            contrasena=password,
+            rol_id=data['rol_id']
+        )
+        db.session.add(new_user)
+        db.session.commit()
+        return new_user
+
+    @staticmethod
+    def get_all_users():
+        return Usuario.query.all()
+
+    @staticmethod
+    def get_user_by_id(user_id):
+        # El usuario autenticado ya resuelto en esta petición no se vuelve a consultar
+        usuario_actual = g.get('usuario_actual')
+        if usuario_actual is not None and str(usuario_actual.id) == str(user_id):
+            return usuario_actual
+        return Usuario.query.get(user_id)
+    @staticmethod
+    def get_user_rol_by_user_id(user_id):
+        user = UsuarioService.get_user_by_id(user_id)
+        return user.rol_id
+    @staticmethod
+    def get_user_by_usuario(usuario):
+        return Usuario.query.filter_by(usuario=usuario).first()
+    
+    @staticmethod
+    def get_specific_users(rol_name):
+        roles = {
+            "Gestor de cobranza": 1,
+            "Titular": 2,
+            "Supervisor": 3,
+            "Gerente": 4,
+            "Director": 5,
+            "Admin": 6
+        }
+        if rol_name not in roles.keys():
+            raise ValueError("Rol no encontrado")
+        print(roles[rol_name])
+        usuarios_con_rol = Usuario.query.filter_by(rol_id=roles[rol_name]).all()
+        if not usuarios_con_rol:
+            raise ValueError("No se encontraron usuarios con el rol proporcionado")
+        return usuarios_con_rol
+
+            
+    @staticmethod
+    def get_grupos_visibles(user):
+        """
+        Retorna el conjunto de grupo_ids que el usuario puede ver según su rol: el gerente y el supervisor
+        los grupos de sus rutas, el titular sus grupos y los demás roles todos los grupos.
+        Se calcula una vez por petición (se guarda en flask.g) y se descarta con invalidar_grupos_visibles
+        cuando cambian las asignaciones de rutas o grupos.
+        """
+        grupos_visibles = g.setdefault('grupos_visibles', {})
+        llave = (user.id, user.rol_id)
+        if llave not in grupos_visibles:
+            query = db.session.query(Grupo.grupo_id)
+            if user.rol_id == 4:  # Gerente
+                query = query.join(Ruta, Grupo.ruta_id == Ruta.ruta_id).filter(Ruta.usuario_id_gerente == user.id)
+            elif user.rol_id == 3:  # Supervisor
+                query = query.join(Ruta, Grupo.ruta_id == Ruta.ruta_id).filter(Ruta.usuario_id_supervisor == user.id)
+            elif user.rol_id == 2:  # Titular
+                query = query.filter(Grupo.usuario_id_titular == user.id)
+            grupos_visibles[llave] = {grupo_id for (grupo_id,) in query.all()}
+        return grupos_visibles[llave]
+
+    @staticmethod
+    def invalidar_grupos_visibles():
+        g.pop('grupos_visibles', None)
+
+    @staticmethod
+    def get_user_from_jwt():
+        """
+        Retorna el usuario autenticado. Se consulta una sola vez por petición y se guarda en flask.g,
+        así la ruta y los servicios que atienden la petición comparten la misma instancia.
+        """
+        # Retrieve the JWT identity
+        id_from_jwt = get_jwt_identity()
+
+        usuario_actual = g.get('usuario_actual')
+        if usuario_actual is not None and str(usuario_actual.id) == str(id_from_jwt):
+            return usuario_actual
+
+        # Query your database for the user
+        user = Usuario.query.filter_by(id=id_from_jwt).first()
+
+        # Check if a user was found
+        if not user:
+            raise Exception("User not found")
+
+        g.usuario_actual = user
+        return user
+    
+    @staticmethod
+    def update_user(user_id, data):
+        user = Usuario.query.get(user_id)
+        if user:
+            user.nombre = data.get('nombre', user.nombre)
+            user.apellido_paterno = data.get('apellido_paterno', user.apellido_paterno)
+            user.apellido_materno = data.get('apellido_materno', user.apellido_materno)
+            user.usuario = data.get('usuario', user.usuario)
+            user.rol_id = data.get('rol_id', user.rol_id)
+            db.session.commit()
+            return user
+        return None
+
+    @staticmethod
+    def delete_user(user_id):
+        user = Usuario.query.get(user_id)
+        if user:
+            db.session.delete(user)
+            db.session.commit()
+            return True
         return False
\ No newline at end of file
@@ -0,0 +1 @@
+"""Benchmarks de rendimiento sobre una cartera sintética (ver `python -m benchmarks --help`)."""
@@ -0,0 +1,135 @@
+"""
+Corre los benchmarks de rendimiento sobre una cartera sintética.
+
+    BENCHMARK_DATABASE_URL=postgresql://.../prosmex_bench python -m benchmarks --pagos 100000
+
+La base indicada se borra y se vuelve a crear (salvo con --sin-generar), así que debe ser una base
+exclusiva para benchmarks; nunca se usa DATABASE_URL. Con --comparar se revisan los resultados contra
+los de una corrida anterior (--salida) y el proceso termina con código 1 si hay regresiones.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks de rendimiento de Prosmex.')
+    parser.add_argument('--database-url', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help='Base exclusiva para benchmarks (por defecto BENCHMARK_DATABASE_URL).')
+    parser.add_argument('--pagos', type=int, default=10000,
+                        help='Número de pagos de la cartera sintética (de 1,000 a 500,000).')
+    parser.add_argument('--semilla', type=int, default=1, help='Semilla del generador de la cartera.')
+    parser.add_argument('--sin-generar', action='store_true',
+                        help='Usar la cartera que ya está en la base en lugar de regenerarla.')
+    parser.add_argument('--escenarios', default=None,
+                        help='Escenarios a correr, separados por comas (por defecto todos).')
+    parser.add_argument('--solo-lectura', action='store_true', help='Omitir los escenarios que modifican la base.')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Corridas medidas por escenario.')
+    parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--comparar', default=None, help='Archivo JSON de una corrida base para detectar regresiones.')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento relativo de tiempo o memoria que se considera regresión.')
+    return parser.parse_args(argv)
+
+
+def configurar_entorno(database_url):
+    """
+    Apunta la app a la base de benchmarks y desactiva la caché de reportes (se mide el cálculo, no la caché).
+    Debe llamarse antes de importar `app`: Config lee las variables de entorno al importarse.
+    """
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['REPORT_CACHE_BACKEND'] = 'none'
+    os.environ['FAST_START'] = '1'
+
+
+def regenerar_base(app, pagos, semilla):
+    from app import db
+    from app.populate_data import populate_data
+    from benchmarks.cartera import generar_cartera
+
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        db.drop_all()
+        db.create_all()
+        populate_data()
+        return generar_cartera(pagos=pagos, semilla=semilla)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.database_url:
+        sys.exit("Indique la base de benchmarks con --database-url o BENCHMARK_DATABASE_URL.")
+    if args.database_url == os.environ.get('DATABASE_URL'):
+        sys.exit("La base de benchmarks no puede ser la de DATABASE_URL: se borra en cada corrida.")
+    configurar_entorno(args.database_url)
+
+    from app import create_app, db
+    from benchmarks.escenarios import ESCENARIOS, encabezados_usuario, preparar_contexto
+    from benchmarks.medicion import comparar, medir
+
+    nombres = args.escenarios.split(',') if args.escenarios else list(ESCENARIOS)
+    desconocidos = [nombre for nombre in nombres if nombre not in ESCENARIOS]
+    if desconocidos:
+        sys.exit(f"Escenarios desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(ESCENARIOS)}")
+    if args.solo_lectura:
+        nombres = [nombre for nombre in nombres if not ESCENARIOS[nombre][2]]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app()
+    # Los mensajes informativos de los servicios no son parte de la salida del benchmark
+    app.logger.setLevel(logging.WARNING)
+
+    cartera = None
+    if not args.sin_generar:
+        inicio = time.perf_counter()
+        cartera = regenerar_base(app, args.pagos, args.semilla)
+        print(f"Cartera generada en {time.perf_counter() - inicio:.1f} s: "
+              + ', '.join(f"{tabla}={filas}" for tabla, filas in cartera.items()))
+
+    with app.app_context():
+        contexto = preparar_contexto()
+        encabezados = encabezados_usuario(contexto['director_id'])
+        pagos_en_base = db.session.execute(db.text("SELECT count(*) FROM pagos")).scalar()
+
+    resultados = {}
+    print(f"{'escenario':<32}{'mediana ms':>12}{'min ms':>10}{'consultas':>11}{'memoria KB':>12}")
+    for nombre in nombres:
+        funcion, autenticado, _ = ESCENARIOS[nombre]
+        resultado = medir(app, funcion, contexto, encabezados if autenticado else None, args.repeticiones)
+        resultados[nombre] = resultado
+        print(f"{nombre:<32}{resultado['mediana_ms']:>12}{resultado['min_ms']:>10}"
+              f"{resultado['consultas']:>11}{resultado['memoria_pico_kb']:>12}")
+
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'pagos': pagos_en_base,
+                'semilla': args.semilla,
+                'repeticiones': args.repeticiones,
+                'cartera': cartera,
+                'resultados': resultados
+            }, archivo, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            base = json.load(archivo)
+        if base.get('pagos') != pagos_en_base:
+            print(f"Aviso: la corrida base tiene {base.get('pagos')} pagos y esta {pagos_en_base}.")
+        regresiones = comparar(resultados, base['resultados'], args.tolerancia)
+        if regresiones:
+            print("Regresiones respecto a la corrida base:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print("Sin regresiones respecto a la corrida base.")
+
+
+if __name__ == '__main__':
+    main()
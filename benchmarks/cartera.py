@@ -0,0 +1,269 @@
+"""
+Generador de una cartera sintética para los benchmarks.
+
+Construye rutas, grupos, clientes y préstamos de varios ciclos (con renovaciones), con sus pagos
+semanales y faltas, hasta alcanzar el número de pagos pedido. La cartera es determinista para una
+misma semilla y fecha de referencia, así que dos corridas con los mismos parámetros miden lo mismo.
+"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, text
+
+from app import bcrypt, db
+from app.constants import TIMEZONE
+from app.models import ClienteAval, Falta, Grupo, Pago, Prestamo, Ruta, TipoPrestamo, Usuario
+from app.services.service_helpers import ventana_semana
+
+CLIENTES_POR_GRUPO = 25
+GRUPOS_POR_RUTA = 10
+GRUPOS_POR_TITULAR = 3
+RUTAS_POR_GERENTE = 5
+RUTAS_POR_SUPERVISOR = 2
+TAMANO_LOTE = 10000
+
+MONTOS = [1000, 1500, 2000, 3000, 5000, 8000]
+# Número de préstamos por cliente (el último es el vigente) y sus probabilidades
+CICLOS = [1, 2, 3, 4]
+PESOS_CICLOS = [35, 35, 20, 10]
+# Probabilidades de pago completo, parcial y sin pago en cada semana
+PROBABILIDAD_PAGO_COMPLETO = 0.85
+PROBABILIDAD_PAGO_PARCIAL = 0.07
+# Clientes cuyo último préstamo ya se liquidó (sin préstamo vigente)
+PROBABILIDAD_LIQUIDADO = 0.1
+
+
+class GeneradorCartera:
+    """
+    Genera la cartera cliente por cliente y la inserta por lotes con INSERT en bloque.
+    Los IDs se asignan en memoria a partir del máximo existente de cada tabla, y las secuencias
+    se ajustan al terminar.
+    """
+    def __init__(self, pagos, semilla=1, hoy=None):
+        self.pagos_objetivo = pagos
+        self.rnd = random.Random(semilla)
+        # Las fechas se guardan sin zona horaria, en hora de Ciudad de México (como las que registra la app)
+        self.ahora = datetime.now(TIMEZONE).replace(tzinfo=None) if hoy is None \
+            else datetime.combine(hoy, datetime.min.time()) + timedelta(hours=12)
+        self.hoy = self.ahora.date()
+        self.lunes_actual = ventana_semana(self.hoy)[2]
+        # La semana anterior queda sin faltas registradas, como antes del barrido de verificar_pagos_semanal
+        self.lunes_anterior = self.lunes_actual - timedelta(days=7)
+
+        self.tipos = TipoPrestamo.query.order_by(TipoPrestamo.tipo_prestamo_id).all()
+        if not self.tipos:
+            raise ValueError("No hay tipos de préstamo; cargue los catálogos iniciales primero.")
+        self.contrasena = bcrypt.generate_password_hash('benchmark').decode('utf-8')
+
+        self.siguiente_id = {
+            modelo: (db.session.query(func.max(columna)).scalar() or 0) + 1
+            for modelo, columna in (
+                (Usuario, Usuario.id), (Ruta, Ruta.ruta_id), (Grupo, Grupo.grupo_id),
+                (ClienteAval, ClienteAval.cliente_id), (Prestamo, Prestamo.prestamo_id)
+            )
+        }
+        self.pendientes = {modelo: [] for modelo in (Usuario, Ruta, Grupo, ClienteAval, Prestamo, Pago, Falta)}
+        self.conteos = {modelo.__tablename__: 0 for modelo in self.pendientes}
+
+        self.gerente_id = self.supervisor_id = self.titular_id = None
+        self.ruta_id = self.grupo_id = None
+        self.rutas_creadas = self.grupos_creados = 0
+        self.clientes_en_grupo = CLIENTES_POR_GRUPO
+        self.ultimo_cliente_id = None
+
+    def _nuevo_id(self, modelo):
+        nuevo_id = self.siguiente_id[modelo]
+        self.siguiente_id[modelo] += 1
+        return nuevo_id
+
+    def _agregar(self, modelo, fila):
+        self.pendientes[modelo].append(fila)
+        self.conteos[modelo.__tablename__] += 1
+
+    def _insertar_pendientes(self):
+        # Orden de las llaves foráneas: cada lote sólo referencia filas de lotes ya insertados
+        for modelo, filas in self.pendientes.items():
+            if filas:
+                db.session.execute(insert(modelo), filas)
+                filas.clear()
+
+    def _usuario(self, nombre, rol_id):
+        usuario_id = self._nuevo_id(Usuario)
+        self._agregar(Usuario, {
+            'id': usuario_id,
+            'nombre': nombre,
+            'apellido_paterno': 'Benchmark',
+            'apellido_materno': str(usuario_id),
+            'usuario': f'benchmark_{nombre.lower()}_{usuario_id}',
+            'contrasena': self.contrasena,
+            'rol_id': rol_id
+        })
+        return usuario_id
+
+    def _siguiente_grupo(self):
+        """Abre un grupo nuevo (y una ruta y usuarios nuevos cuando corresponde)."""
+        if self.grupos_creados % GRUPOS_POR_RUTA == 0:
+            if self.rutas_creadas % RUTAS_POR_GERENTE == 0:
+                self.gerente_id = self._usuario('Gerente', 4)
+            if self.rutas_creadas % RUTAS_POR_SUPERVISOR == 0:
+                self.supervisor_id = self._usuario('Supervisor', 3)
+            self.ruta_id = self._nuevo_id(Ruta)
+            self._agregar(Ruta, {
+                'ruta_id': self.ruta_id,
+                'nombre_ruta': f'Ruta benchmark {self.ruta_id}',
+                'usuario_id_gerente': self.gerente_id,
+                'usuario_id_supervisor': self.supervisor_id
+            })
+            self.rutas_creadas += 1
+        if self.grupos_creados % GRUPOS_POR_TITULAR == 0:
+            self.titular_id = self._usuario('Titular', 2)
+        self.grupo_id = self._nuevo_id(Grupo)
+        self._agregar(Grupo, {
+            'grupo_id': self.grupo_id,
+            'nombre_grupo': f'Grupo benchmark {self.grupo_id}',
+            'ruta_id': self.ruta_id,
+            'usuario_id_titular': self.titular_id
+        })
+        self.grupos_creados += 1
+        self.clientes_en_grupo = 0
+        self.ultimo_cliente_id = None
+
+    def _cliente(self):
+        if self.clientes_en_grupo >= CLIENTES_POR_GRUPO:
+            self._siguiente_grupo()
+        cliente_id = self._nuevo_id(ClienteAval)
+        self._agregar(ClienteAval, {
+            'cliente_id': cliente_id,
+            'nombre': 'Cliente',
+            'apellido_paterno': 'Benchmark',
+            'apellido_materno': str(cliente_id),
+            'colonia': 'Centro',
+            'cp': f'{self.rnd.randint(1000, 99999):05d}',
+            'codigo_ine': f'BENCH{cliente_id:013d}',
+            'estado_civil': self.rnd.choice(['casado', 'divorciado', 'viudo', 'soltero']),
+            'num_hijos': self.rnd.randint(0, 4),
+            'propiedad': self.rnd.choice(['casa_propia', 'rentada', 'prestada']),
+            'es_aval': True,
+            'grupo_id': self.grupo_id
+        })
+        self.clientes_en_grupo += 1
+        # El aval es el cliente anterior del mismo grupo
+        aval_id, self.ultimo_cliente_id = self.ultimo_cliente_id, cliente_id
+        return cliente_id, aval_id
+
+    def _prestamos_de_cliente(self, cliente_id, aval_id):
+        """Préstamos consecutivos del cliente: cada renovación empieza cuando termina el préstamo anterior."""
+        ciclos = self.rnd.choices(CICLOS, PESOS_CICLOS)[0]
+        liquidado = self.rnd.random() < PROBABILIDAD_LIQUIDADO
+        tipos = [self.rnd.choice(self.tipos) for _ in range(ciclos)]
+
+        # El último préstamo va en curso (o terminó hace poco si el cliente liquidó); los anteriores le preceden
+        ultimo = tipos[-1]
+        semanas_transcurridas = ultimo.numero_semanas + self.rnd.randint(1, 8) if liquidado \
+            else self.rnd.randint(0, ultimo.numero_semanas - 1)
+        inicio = self.lunes_actual - timedelta(weeks=semanas_transcurridas)
+        inicios = [inicio]
+        for tipo in reversed(tipos[:-1]):
+            inicio -= timedelta(weeks=tipo.numero_semanas)
+            inicios.insert(0, inicio)
+
+        monto = self.rnd.choice(MONTOS)
+        for ciclo, (tipo, inicio) in enumerate(zip(tipos, inicios)):
+            vigente = ciclo == ciclos - 1 and not liquidado
+            self._prestamo(cliente_id, aval_id, tipo, inicio, monto, ciclo > 0, vigente,
+                           'activo' if vigente else ('liquidado' if ciclo == ciclos - 1 else 'renovado'))
+            # Las renovaciones suelen ser por un monto mayor
+            monto = min(monto * self.rnd.choice([1, 1, 1.5, 2]), MONTOS[-1] * 2)
+
+    def _prestamo(self, cliente_id, aval_id, tipo, inicio, monto, renovacion, vigente, status):
+        prestamo_id = self._nuevo_id(Prestamo)
+        monto = Decimal(monto)
+        utilidad = monto * Decimal(str(1 + tipo.interes))
+        cuota = monto * Decimal(str(tipo.porcentaje_semanal))
+
+        total_pagado = Decimal(0)
+        numero_pagos = semana_activa = 0
+        fecha_ultimo_pago = None
+        for semana in range(tipo.numero_semanas):
+            lunes = inicio + timedelta(weeks=semana)
+            if lunes > self.lunes_actual:
+                break
+            azar = self.rnd.random()
+            if not vigente and semana == tipo.numero_semanas - 1:
+                # Los préstamos terminados se liquidan con el último pago
+                monto_pagado = max(utilidad - total_pagado, cuota)
+            elif azar < PROBABILIDAD_PAGO_COMPLETO:
+                monto_pagado = cuota
+            elif azar < PROBABILIDAD_PAGO_COMPLETO + PROBABILIDAD_PAGO_PARCIAL:
+                monto_pagado = (cuota / 2).quantize(Decimal('0.01'))
+            else:
+                monto_pagado = Decimal(0)
+
+            fecha_pago = datetime.combine(lunes, datetime.min.time()) \
+                + timedelta(days=self.rnd.randint(0, 5), hours=self.rnd.randint(8, 19), minutes=self.rnd.randint(0, 59))
+            if fecha_pago > self.ahora:
+                break
+            if monto_pagado > 0:
+                self._agregar(Pago, {'fecha_pago': fecha_pago, 'monto_pagado': monto_pagado, 'prestamo_id': prestamo_id})
+                total_pagado += monto_pagado
+                numero_pagos += 1
+                fecha_ultimo_pago = fecha_pago
+            if monto_pagado >= cuota:
+                semana_activa += 1
+            elif lunes < self.lunes_anterior:
+                # Falta registrada por el barrido semanal, fechada al lunes siguiente
+                self._agregar(Falta, {
+                    'fecha': datetime.combine(lunes + timedelta(days=7), datetime.min.time()),
+                    'prestamo_id': prestamo_id,
+                    'monto_abonado': monto_pagado
+                })
+
+        self._agregar(Prestamo, {
+            'prestamo_id': prestamo_id,
+            'monto_prestamo': monto,
+            'monto_utilidad': utilidad,
+            'fecha_inicio': datetime.combine(inicio, datetime.min.time()) + timedelta(days=self.rnd.randint(0, 4), hours=10),
+            'cliente_id': cliente_id,
+            'aval_id': aval_id,
+            'tipo_prestamo_id': tipo.tipo_prestamo_id,
+            'completado': not vigente,
+            'status': status,
+            'renovacion': renovacion,
+            'semana_activa': tipo.numero_semanas if not vigente else semana_activa,
+            'total_pagado': total_pagado,
+            'numero_pagos': numero_pagos,
+            'fecha_ultimo_pago': fecha_ultimo_pago
+        })
+
+    def generar(self):
+        """Genera clientes hasta alcanzar el número de pagos pedido. Retorna el número de filas por tabla."""
+        self._usuario('Director', 5)
+        while self.conteos['pagos'] < self.pagos_objetivo:
+            self._prestamos_de_cliente(*self._cliente())
+            # Se inserta entre clientes, cuando los préstamos de cada pago pendiente ya están en la lista
+            if len(self.pendientes[Pago]) >= TAMANO_LOTE:
+                self._insertar_pendientes()
+        self._insertar_pendientes()
+
+        for tabla, columna in (('usuarios', 'id'), ('rutas', 'ruta_id'), ('grupos', 'grupo_id'),
+                               ('clientes_avales', 'cliente_id'), ('prestamos', 'prestamo_id')):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', '{columna}'), (SELECT MAX({columna}) FROM {tabla}))"
+            ))
+        db.session.commit()
+        return dict(self.conteos)
+
+
+def generar_cartera(pagos=10000, semilla=1, hoy=None):
+    """
+    Agrega a la base una cartera sintética con al menos `pagos` pagos y deja lista la foto semanal
+    de la semana actual y las estadísticas del planificador. Retorna el número de filas creadas por tabla.
+    """
+    from app.services.reporte_service import ReporteService
+
+    conteos = GeneradorCartera(pagos, semilla, hoy).generar()
+    ReporteService.actualizar_reporte_semanal()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    return conteos
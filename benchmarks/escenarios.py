@@ -0,0 +1,114 @@
+"""
+Escenarios de benchmark: cada uno ejecuta una operación de la app tal como la atiende una petición.
+
+Cada escenario recibe el contexto preparado por `preparar_contexto` (usuarios e IDs representativos
+de la cartera) y corre dentro de su propio contexto de petición.
+"""
+from contextlib import contextmanager
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from sqlalchemy import func
+
+from app import db
+from app.models import ClienteAval, Prestamo, TipoPrestamo, Usuario
+
+PAGOS_POR_LOTE = 100
+
+
+def preparar_contexto():
+    """IDs que usan los escenarios: el director, el grupo más grande y préstamos vigentes para el lote de pagos."""
+    director_id = db.session.query(func.max(Usuario.id)).filter(Usuario.rol_id == 5).scalar()
+    grupo_id = db.session.query(ClienteAval.grupo_id).filter(ClienteAval.grupo_id.isnot(None))\
+        .group_by(ClienteAval.grupo_id).order_by(func.count().desc(), ClienteAval.grupo_id).limit(1).scalar()
+    prestamos = (
+        db.session.query(Prestamo.prestamo_id, Prestamo.monto_prestamo * TipoPrestamo.porcentaje_semanal)
+        .join(TipoPrestamo, TipoPrestamo.tipo_prestamo_id == Prestamo.tipo_prestamo_id)
+        .filter(Prestamo.completado == False)
+        .order_by(Prestamo.prestamo_id)
+        .limit(PAGOS_POR_LOTE)
+        .all()
+    )
+    total_prestamos = db.session.query(func.count(Prestamo.prestamo_id)).scalar()
+    if director_id is None or grupo_id is None or not prestamos:
+        raise ValueError("La base no tiene una cartera con la que correr los benchmarks; genérela primero.")
+    return {
+        'director_id': director_id,
+        'grupo_id': grupo_id,
+        'cuotas': [(prestamo_id, round(float(cuota), 2)) for prestamo_id, cuota in prestamos],
+        # Cursor a la mitad de la lista de préstamos, para medir una página profunda
+        'cursor_medio': db.session.query(Prestamo.prestamo_id).order_by(Prestamo.prestamo_id)
+        .offset(total_prestamos // 2).limit(1).scalar()
+    }
+
+
+def encabezados_usuario(usuario_id):
+    """Encabezado Authorization con un JWT del usuario (requiere un contexto de la app)."""
+    return {'Authorization': f'Bearer {create_access_token(identity=str(usuario_id))}'}
+
+
+@contextmanager
+def contexto_peticion(app, encabezados=None):
+    """Contexto de petición propio para cada corrida, autenticado si se pasan encabezados con un JWT."""
+    with app.test_request_context(headers=encabezados or {}):
+        if encabezados:
+            verify_jwt_in_request()
+        yield
+
+
+def obtener_reporte(contexto):
+    from app.services.reporte_service import ReporteService
+    return ReporteService.obtener_reporte(page=1, per_page=10)
+
+
+def obtener_reporte_en_vivo(contexto):
+    from app.services.reporte_service import ReporteService
+    return ReporteService.obtener_reporte(page=1, per_page=10, en_vivo=True)
+
+
+def obtener_totales(contexto):
+    from app.services.reporte_service import ReporteService
+    return ReporteService.obtener_totales()
+
+
+def hoja_de_cobranza(contexto):
+    from app.services.pago_service import PagoService
+    return PagoService.get_prestamos_by_grupo_tabla(contexto['grupo_id'], page=1, per_page=50)
+
+
+def list_prestamos(contexto):
+    from app.services.prestamo_service import PrestamoService
+    return PrestamoService().list_prestamos(page=1, per_page=100)
+
+
+def list_prestamos_pagina_profunda(contexto):
+    from app.services.prestamo_service import PrestamoService
+    return PrestamoService().list_prestamos(per_page=100, cursor=contexto['cursor_medio'])
+
+
+def create_pago_lote(contexto):
+    """Un pago de la cuota semanal para cada uno de los préstamos vigentes del contexto, en un solo lote."""
+    from app.services.pago_service import PagoService
+    pagos = [{'prestamo_id': prestamo_id, 'monto_pagado': cuota} for prestamo_id, cuota in contexto['cuotas']]
+    return PagoService().create_pago(pagos)
+
+
+def verificar_pagos_semanal(contexto):
+    """
+    Barrido semanal de faltas. La primera corrida registra las faltas de la semana anterior;
+    las siguientes miden el caso idempotente (faltas ya registradas).
+    """
+    from app.services.tasks import verificar_pagos_semanal as barrido
+    return barrido()
+
+
+# Nombre: (función, si requiere un usuario autenticado, si modifica la base)
+ESCENARIOS = {
+    'obtener_reporte': (obtener_reporte, True, False),
+    'obtener_reporte_en_vivo': (obtener_reporte_en_vivo, True, False),
+    'obtener_totales': (obtener_totales, True, False),
+    'hoja_de_cobranza': (hoja_de_cobranza, False, False),
+    'list_prestamos': (list_prestamos, False, False),
+    'list_prestamos_pagina_profunda': (list_prestamos_pagina_profunda, False, False),
+    'create_pago_lote': (create_pago_lote, False, True),
+    'verificar_pagos_semanal': (verificar_pagos_semanal, False, True),
+}
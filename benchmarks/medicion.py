@@ -0,0 +1,88 @@
+"""Medición de escenarios (tiempo, consultas SQL y memoria) y comparación contra una corrida base."""
+import contextlib
+import io
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import event
+
+from app import db
+from benchmarks.escenarios import contexto_peticion
+
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL que el engine envía a la base mientras está activo."""
+    def __init__(self, engine):
+        self.engine = engine
+        self.consultas = 0
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        self.consultas += 1
+
+    def __enter__(self):
+        self.consultas = 0
+        event.listen(self.engine, 'before_cursor_execute', self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._contar)
+
+
+def _correr(app, funcion, contexto, encabezados):
+    # Los servicios imprimen mensajes de avance; no forman parte de la medición
+    with contexto_peticion(app, encabezados), contextlib.redirect_stdout(io.StringIO()):
+        funcion(contexto)
+
+
+def medir(app, funcion, contexto, encabezados=None, repeticiones=5):
+    """
+    Corre el escenario una vez de calentamiento y `repeticiones` veces medidas, cada una en su propio
+    contexto de petición. La memoria pico se mide en una corrida adicional con tracemalloc, que hace
+    más lento el código y por eso no se mezcla con los tiempos.
+    """
+    _correr(app, funcion, contexto, encabezados)
+
+    tiempos = []
+    consultas = []
+    with app.app_context():
+        engine = db.engine
+    for _ in range(repeticiones):
+        with ContadorConsultas(engine) as contador:
+            inicio = time.perf_counter()
+            _correr(app, funcion, contexto, encabezados)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(contador.consultas)
+
+    tracemalloc.start()
+    try:
+        _correr(app, funcion, contexto, encabezados)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'mediana_ms': round(statistics.median(tiempos), 2),
+        'min_ms': round(min(tiempos), 2),
+        'max_ms': round(max(tiempos), 2),
+        'consultas': max(consultas),
+        'memoria_pico_kb': round(pico / 1024, 1)
+    }
+
+
+def comparar(resultados, base, tolerancia=0.25):
+    """
+    Regresiones respecto a una corrida base: tiempo mediano o memoria pico mayores en más de
+    `tolerancia` (fracción), o más consultas SQL. Retorna una lista de descripciones.
+    """
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        for metrica in ('mediana_ms', 'memoria_pico_kb'):
+            if actual[metrica] > anterior[metrica] * (1 + tolerancia):
+                regresiones.append(f"{nombre}: {metrica} {anterior[metrica]} -> {actual[metrica]}")
+        if actual['consultas'] > anterior['consultas']:
+            regresiones.append(f"{nombre}: consultas {anterior['consultas']} -> {actual['consultas']}")
+    return regresiones
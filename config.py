@@ -1,52 +1,101 @@
-import os
-import pytz
-from datetime import timedelta
-
-# Definir la zona horaria de Ciudad de México
-TIMEZONE = pytz.timezone('America/Mexico_City')
-
-class Config:
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-
-    # Establece la clave secreta y la clave JWT
-    SECRET_KEY = os.environ.get('SECRET_KEY', 'prosmex_luis_sebas')
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'prosmex_luis_sebas')
-    # Convert the environment variables to integers and create timedelta objects
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(
-        minutes=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES_MINUTES', 15))
-    )
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(
-        days=int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES_DAYS', 30))
-    )
-    # Split the JWT_TOKEN_LOCATION environment variable into a list
-    JWT_TOKEN_LOCATION = ["headers", "cookies"]
-    JWT_COOKIE_SECURE = os.environ.get('JWT_COOKIE_SECURE', False)
-    FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
-    DEBUG = True
-    
-
-class LocalConfig(Config):
-    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    DEBUG = True
-    # Puedes sobrescribir las claves si es necesario en el entorno local
-    SECRET_KEY = os.environ.get('LOCAL_SECRET_KEY', Config.SECRET_KEY)
-    JWT_SECRET_KEY = os.environ.get('LOCAL_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
-
-
-class QAConfig(Config):
-    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-
-    # Puedes sobrescribir las claves si es necesario en el entorno de QA
-    SECRET_KEY = os.environ.get('QA_SECRET_KEY', Config.SECRET_KEY)
-    JWT_SECRET_KEY = os.environ.get('QA_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
-
-class ProductionConfig(Config):
-    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-
-    # Puedes sobrescribir las claves si es necesario en el entorno de producción
-    SECRET_KEY = os.environ.get('PRODUCTION_SECRET_KEY', Config.SECRET_KEY)
-    JWT_SECRET_KEY = os.environ.get('PRODUCTION_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
+import os
+import pytz
+from datetime import timedelta
+
+# Definir la zona horaria de Ciudad de México
+TIMEZONE = pytz.timezone('America/Mexico_City')
+
+class Config:
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Establece la clave secreta y la clave JWT
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'prosmex_luis_sebas')
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'prosmex_luis_sebas')
+    # Convert the environment variables to integers and create timedelta objects
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(
+        minutes=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES_MINUTES', 15))
+    )
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(
+        days=int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES_DAYS', 30))
+    )
+    # Split the JWT_TOKEN_LOCATION environment variable into a list
+    JWT_TOKEN_LOCATION = ["headers", "cookies"]
+    JWT_COOKIE_SECURE = os.environ.get('JWT_COOKIE_SECURE', False)
+    FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
+    DEBUG = True
+
+    # Pool de conexiones del engine de la app (ver app.database.opciones_engine).
+    # DB_POOL_MODE: 'queue' (servidor de larga duración), 'single' (Lambda sin proxy) o 'null' (PgBouncer/RDS Proxy)
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true')
+    DB_POOL_SLOW_CHECKOUT_MS = float(os.environ.get('DB_POOL_SLOW_CHECKOUT_MS', 100))
+
+    # Arranque rápido (Lambda): no crear el esquema ni cargar catálogos al iniciar la app.
+    # También se omiten si existe SCHEMA_READY_MARKER (por defecto instance/schema_ready), que escribe
+    # `flask preparar-base`.
+    FAST_START = os.environ.get('FAST_START', '').lower() in ('1', 'true')
+    SCHEMA_READY_MARKER = os.environ.get('SCHEMA_READY_MARKER')
+    # Migraciones de Flask-Migrate (`flask db upgrade`; `flask preparar-base` también las aplica)
+    MIGRATIONS_DIR = os.environ.get('MIGRATIONS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
+
+    # Perfil de SQL por petición (app.perfil_sql): una línea de log JSON por petición y advertencias si se excede
+    # el presupuesto de consultas de la ruta, se repite una sentencia o hay una sentencia lenta.
+    # Los encabezados X-DB-* sólo se agregan fuera de producción: FLASK_CONFIG (lo define zappa_settings.json)
+    # o FLASK_ENV igual a 'production' los desactivan, salvo que SQL_PROFILING_HEADERS indique otra cosa.
+    FLASK_CONFIG = os.environ.get('FLASK_CONFIG', 'local')
+    SQL_PROFILING = os.environ.get('SQL_PROFILING', 'true').lower() in ('1', 'true')
+    SQL_PROFILING_HEADERS = os.environ.get(
+        'SQL_PROFILING_HEADERS', str('production' not in (FLASK_CONFIG, FLASK_ENV))
+    ).lower() in ('1', 'true')
+    SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', 30))
+    # Presupuestos por ruta ('<ruta>' o '<MÉTODO> <ruta>'); las demás usan SQL_QUERY_BUDGET
+    SQL_QUERY_BUDGETS = {
+        '/reporte/general': 12,
+        '/reporte/general/totales': 8,
+        'GET /pagos/': 5,
+        'GET /prestamos/': 5,
+        '/pagos/prestamos': 5,
+        '/pagos/pagos-prestamo/<int:prestamo_id>': 5,
+    }
+    SQL_DUPLICATE_WARNING = int(os.environ.get('SQL_DUPLICATE_WARNING', 5))
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 500))
+
+    # Caché de reportes: 'redis' (compartida entre procesos), 'memory' (LRU de un solo proceso) o 'none'.
+    # Por defecto 'redis' si se indica REPORT_CACHE_REDIS_URL y 'none' si no. 'memory' sólo es válida cuando un
+    # único proceso atiende las peticiones: con varios (contenedores de Lambda, workers de gunicorn) un pago sólo
+    # invalidaría la caché del proceso que lo registró. En Lambda se ignora y no se usa caché.
+    REPORT_CACHE_REDIS_URL = os.environ.get('REPORT_CACHE_REDIS_URL')
+    REPORT_CACHE_BACKEND = os.environ.get('REPORT_CACHE_BACKEND', 'redis' if REPORT_CACHE_REDIS_URL else 'none')
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 300))
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 512))
+    
+
+class LocalConfig(Config):
+    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DEBUG = True
+    # Puedes sobrescribir las claves si es necesario en el entorno local
+    SECRET_KEY = os.environ.get('LOCAL_SECRET_KEY', Config.SECRET_KEY)
+    JWT_SECRET_KEY = os.environ.get('LOCAL_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
+
+
+class QAConfig(Config):
+    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Puedes sobrescribir las claves si es necesario en el entorno de QA
+    SECRET_KEY = os.environ.get('QA_SECRET_KEY', Config.SECRET_KEY)
+    JWT_SECRET_KEY = os.environ.get('QA_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
+
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = Config.SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Puedes sobrescribir las claves si es necesario en el entorno de producción
+    SECRET_KEY = os.environ.get('PRODUCTION_SECRET_KEY', Config.SECRET_KEY)
+    JWT_SECRET_KEY = os.environ.get('PRODUCTION_JWT_SECRET_KEY', Config.JWT_SECRET_KEY)
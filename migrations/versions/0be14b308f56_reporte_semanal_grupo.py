@@ -0,0 +1,55 @@
+"""reporte semanal grupo
+
+Revision ID: 0be14b308f56
+Revises: 59d5bbbf059a
+Create Date: 2026-10-18 11:09:23.633892
+
+Tabla reporte_semanal_grupo con la foto semanal de las métricas de cada grupo que lee el reporte general.
+El upsert de ReporteService.actualizar_reporte_semanal (ON CONFLICT) depende de la restricción única
+(grupo_id, semana_inicio). Las bases creadas con db.create_all() ya tienen la tabla; sólo se agrega la
+restricción si faltara. La foto se llena después con `flask reconstruir-reporte-semanal`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0be14b308f56'
+down_revision = '59d5bbbf059a'
+branch_labels = None
+depends_on = None
+
+
+TABLA = 'reporte_semanal_grupo'
+RESTRICCION = 'uq_reporte_semanal_grupo_semana'
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(TABLA):
+        op.create_table(
+            TABLA,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('grupo_id', sa.Integer(), nullable=False),
+            sa.Column('semana_inicio', sa.Date(), nullable=False),
+            sa.Column('cobranza_ideal', sa.Numeric(), nullable=False),
+            sa.Column('cobranza_real', sa.Numeric(), nullable=False),
+            sa.Column('cobranza_real_semanal', sa.Numeric(), nullable=False),
+            sa.Column('prestamo_papel', sa.Numeric(), nullable=False),
+            sa.Column('prestamo_real', sa.Numeric(), nullable=False),
+            sa.Column('sobrante_grupo', sa.Numeric(), nullable=False),
+            sa.Column('faltas', sa.Integer(), nullable=False),
+            sa.Column('bono', sa.Numeric(), nullable=False),
+            sa.Column('numero_de_creditos', sa.Integer(), nullable=False),
+            sa.Column('prestamos_activos', sa.Integer(), nullable=False),
+            sa.Column('fecha_actualizacion', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['grupo_id'], ['grupos.grupo_id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('grupo_id', 'semana_inicio', name=RESTRICCION)
+        )
+    elif RESTRICCION not in {restriccion['name'] for restriccion in inspector.get_unique_constraints(TABLA)}:
+        op.create_unique_constraint(RESTRICCION, TABLA, ['grupo_id', 'semana_inicio'])
+
+
+def downgrade():
+    op.drop_table(TABLA, if_exists=True)
@@ -0,0 +1,68 @@
+"""indices de rutas criticas
+
+Revision ID: 59d5bbbf059a
+Revises: dad4a77ebb8f
+Create Date: 2026-10-18 11:01:12.481903
+
+Índices de las llaves foráneas y consultas del reporte general, la hoja de cobranza, los listados y la
+verificación semanal (falta, pagos, prestamos, clientes_avales, grupos y rutas). Se crean con
+CREATE INDEX CONCURRENTLY, fuera de la transacción de la migración, para no bloquear las escrituras
+sobre tablas en uso. Las bases creadas con db.create_all() ya los tienen; sólo se crean los que falten.
+`flask verificar-planes` revisa después que las rutas críticas los usen.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59d5bbbf059a'
+down_revision = 'dad4a77ebb8f'
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, columnas, condición del índice parcial)
+INDICES = (
+    ('ix_falta_prestamo_id_fecha', 'falta', ['prestamo_id', 'fecha'], None),
+    ('ix_falta_fecha', 'falta', ['fecha'], None),
+    ('ix_pagos_fecha_pago', 'pagos', ['fecha_pago'], None),
+    ('ix_pagos_prestamo_id_fecha_pago', 'pagos', ['prestamo_id', 'fecha_pago'], None),
+    ('ix_prestamos_cliente_id_prestamo_id', 'prestamos', ['cliente_id', sa.text('prestamo_id DESC')], None),
+    ('ix_prestamos_aval_id', 'prestamos', ['aval_id'], None),
+    ('ix_prestamos_cliente_id_no_completado', 'prestamos', ['cliente_id'], 'completado = false'),
+    ('ix_prestamos_activos', 'prestamos', ['prestamo_id'], "status = 'activo'"),
+    ('ix_clientes_avales_grupo_id', 'clientes_avales', ['grupo_id'], None),
+    ('ix_grupos_ruta_id', 'grupos', ['ruta_id'], None),
+    ('ix_grupos_usuario_id_titular', 'grupos', ['usuario_id_titular'], None),
+    ('ix_rutas_usuario_id_gerente', 'rutas', ['usuario_id_gerente'], None),
+    ('ix_rutas_usuario_id_supervisor', 'rutas', ['usuario_id_supervisor'], None),
+)
+
+
+def _indices_invalidos():
+    """Índices que dejó a medias un CREATE INDEX CONCURRENTLY interrumpido: hay que borrarlos y volver a crearlos."""
+    if op.get_context().as_sql:
+        return set()  # Modo --sql: no hay conexión que consultar
+    return set(op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    )).scalars())
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        invalidos = _indices_invalidos()
+        for nombre, tabla, columnas, condicion in INDICES:
+            if nombre in invalidos:
+                op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                nombre, tabla, columnas,
+                postgresql_where=sa.text(condicion) if condicion else None,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,63 @@
+"""totales de pagos en prestamos
+
+Revision ID: dad4a77ebb8f
+Revises:
+Create Date: 2026-10-18 10:55:35.360586
+
+Agrega a prestamos los totales de pagos desnormalizados que mantiene PagoService y los llena a partir
+de la tabla pagos en la misma migración, antes de que un pago nuevo se sume sobre un total en cero. Las
+bases creadas con db.create_all() después de agregarlos al modelo ya tienen las columnas, por eso sólo se
+agregan las que falten; los totales se recalculan igual. `flask reconciliar-pagos` sigue sirviendo para
+reconstruirlos si alguna vez se desvían.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dad4a77ebb8f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columnas():
+    return [
+        sa.Column('total_pagado', sa.Numeric(), server_default='0', nullable=False),
+        sa.Column('numero_pagos', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('fecha_ultimo_pago', sa.DateTime(), nullable=True),
+    ]
+
+
+def _columnas_existentes():
+    return {columna['name'] for columna in sa.inspect(op.get_bind()).get_columns('prestamos')}
+
+
+def upgrade():
+    existentes = _columnas_existentes()
+    for columna in _columnas():
+        if columna.name not in existentes:
+            op.add_column('prestamos', columna)
+
+    # Préstamos con pagos
+    op.execute(
+        "UPDATE prestamos p SET total_pagado = s.total, numero_pagos = s.n, fecha_ultimo_pago = s.ultima "
+        "FROM (SELECT prestamo_id, sum(monto_pagado) AS total, count(*) AS n, max(fecha_pago) AS ultima "
+        "FROM pagos GROUP BY prestamo_id) s "
+        "WHERE s.prestamo_id = p.prestamo_id"
+    )
+    # Préstamos sin pagos (las columnas que ya existían pueden traer nulos o valores viejos)
+    op.execute(
+        "UPDATE prestamos p SET total_pagado = 0, numero_pagos = 0, fecha_ultimo_pago = NULL "
+        "WHERE NOT EXISTS (SELECT 1 FROM pagos WHERE pagos.prestamo_id = p.prestamo_id)"
+    )
+
+    for columna in ('total_pagado', 'numero_pagos'):
+        op.alter_column('prestamos', columna, server_default='0', nullable=False)
+
+
+def downgrade():
+    existentes = _columnas_existentes()
+    for columna in reversed(_columnas()):
+        if columna.name in existentes:
+            op.drop_column('prestamos', columna.name)
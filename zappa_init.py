@@ -1,8 +1,8 @@
-from app import create_app
-from dotenv import load_dotenv
-load_dotenv()
-
-app = create_app()
-
-# if __name__ == '__main__':
-#     app.run(debug=True)
+from app import create_app
+from dotenv import load_dotenv
+load_dotenv()
+
+app = create_app()
+
+# if __name__ == '__main__':
+#     app.run(debug=True)